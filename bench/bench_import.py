@@ -0,0 +1,85 @@
+"""
+Benchmark for module import time.
+
+Runs `python -X importtime -c "import zipgrade_reporter"` several times in
+fresh processes and reports the median cumulative import time, along with
+the slowest top-level imports from the last run. Pass --src to measure a
+different checkout (e.g. an older version extracted with git show).
+
+Usage:
+    python bench/bench_import.py [--runs 7] [--src DIR]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+default_src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def import_times(src):
+    """
+    Imports zipgrade_reporter in a new process.
+
+    Args:
+        src (str): Directory containing zipgrade_reporter.py.
+
+    Returns:
+        List of (self microseconds, cumulative microseconds, indent, module)
+        tuples in the order reported by -X importtime.
+    """
+    code = 'import sys; sys.path.insert(0, {!r}); import zipgrade_reporter'.format(src)
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+
+    result = []
+
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        own, cumulative, name = line[len('import time:'):].split('|')
+        indent = len(name) - len(name.lstrip())
+        result.append((int(own), int(cumulative), indent, name.strip()))
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--src', default=default_src)
+    args = parser.parse_args()
+
+    totals = []
+
+    for i in range(args.runs):
+        times = import_times(args.src)
+        total = [c for own, c, indent, name in times if name == 'zipgrade_reporter']
+        totals.append(total[0] / 1000)
+
+    print('zipgrade_reporter import: median {:.1f} ms, min {:.1f} ms ({} runs)'.format(
+          statistics.median(totals), min(totals), args.runs))
+
+    # -X importtime lists a module's imports just before it, one level deeper
+    names = [name for own, c, indent, name in times]
+    end = names.index('zipgrade_reporter')
+    level = times[end][2]
+    direct = []
+
+    for own, cumulative, indent, name in reversed(times[:end]):
+        if indent <= level:
+            break
+        if indent == level + 2:
+            direct.append((cumulative, name))
+
+    print()
+    print('Slowest imports:')
+    for cumulative, name in sorted(direct, reverse=True)[:10]:
+        print('  {:>8.1f} ms  {}'.format(cumulative / 1000, name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for CSV ingestion.
+
+Compares the original ingestion path (readlines() and a dict-backed Scoresheet
+for each line, as App.generate did before the ScoreMatrix) with the streaming
+csv reader used by ZipGrade Reporter now. The original path runs the module as
+it was at --baseline-rev, loaded from git. Each path is run in a separate
+process so that peak RSS can be measured independently; the RSS after importing
+the module is shown too, since the original module imported python-docx,
+matplotlib and tkinter up front.
+
+Usage:
+    python bench/bench_ingest.py [--rows 100000] [--questions 50] [--baseline-rev e6bfc26]
+"""
+
+import argparse
+import importlib.util
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(bench_dir, '..')
+
+
+def peak_rss():
+    """Gets the peak RSS of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+
+    return peak
+
+
+def baseline_load(module, path):
+    """Reads the export the way App.generate originally did."""
+    with open(path) as f:
+        lines = f.readlines()
+
+    header = module.App.fix_csv(None, lines[0])
+
+    return module.Report([module.Scoresheet(header, line) for line in lines[1:]])
+
+
+def stream_load(module, path):
+    """Reads the export with the streaming csv reader."""
+    with open(path, newline='') as f:
+        return module.Report(module.load_matrix(f))
+
+
+def run_child(mode, path, module_path):
+    """Loads the file once and prints wall time, RSS after importing, and peak RSS."""
+    spec = importlib.util.spec_from_file_location('zipgrade_reporter', module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = peak_rss()
+
+    load = baseline_load if mode == 'baseline' else stream_load
+
+    start = time.perf_counter()
+    report = load(module, path)
+    elapsed = time.perf_counter() - start
+
+    print(elapsed, imported, peak_rss(), len(report.scoresheets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--baseline-rev', default='e6bfc26',
+                        help='git revision of the original module (default: e6bfc26, the baseline)')
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        baseline_path = os.path.join(tmpdirname, 'baseline_zipgrade_reporter.py')
+        with open(baseline_path, 'wb') as f:
+            f.write(subprocess.check_output(['git', 'show', args.baseline_rev + ':src/zipgrade_reporter.py'],
+                                            cwd=repo_dir))
+
+        modules = {'baseline': baseline_path, 'stream': os.path.join(repo_dir, 'src', 'zipgrade_reporter.py')}
+
+        # written by another process, since Linux carries the peak RSS over into the children started later
+        path = os.path.join(tmpdirname, 'export.csv')
+        subprocess.check_call([sys.executable, os.path.join(bench_dir, 'make_export.py'), path,
+                               '--students', str(args.rows), '--questions', str(args.questions),
+                               '--blank-rate', '0', '--multi-rate', '0'])
+        size = os.path.getsize(path) / 2**20
+
+        print('{} rows x {} questions ({:.1f} MiB)'.format(args.rows, args.questions, size))
+        print('{:<8} {:>10} {:>18} {:>14}'.format('path', 'time (s)', 'after import (MiB)', 'peak RSS (MiB)'))
+
+        for mode in ('baseline', 'stream'):
+            out = subprocess.check_output([sys.executable, __file__, '--child', mode, path, modules[mode]])
+            elapsed, imported, peak, rows = out.split()
+            print('{:<8} {:>10.2f} {:>18.1f} {:>14.1f}'.format(mode, float(elapsed), int(imported) / 1024,
+                                                               int(peak) / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark for rendering class summaries and individual reports.
+
+Generates a synthetic export and times the bulk sections of the report (class
+score tables and individual student reports) for every class, after gathering
+the report's content. Each checkout is
+run in a separate process. Pass --src more than once to compare versions (e.g.
+an older version extracted with git show).
+
+Usage:
+    python bench/bench_render.py [--students 10000] [--questions 50] [--src DIR ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from make_export import write_export
+
+default_src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def run_child(src, path):
+    """Renders the bulk sections once and prints the time for each."""
+    sys.path.insert(0, src)
+    import zipgrade_reporter as zgr
+
+    with open(path, newline='') as f:
+        report = zgr.Report(zgr.load_matrix(f))
+
+    start = time.perf_counter()
+    if hasattr(zgr, 'DocxRenderer'):
+        renderer = zgr.DocxRenderer(report.get_model())
+        add_class_summary = renderer.add_class_summary
+    else:
+        # older versions render straight from the report
+        renderer = report
+        add_class_summary = lambda document, c: report.add_class_summary(document, report.get_sheets_by_class(c), c)
+    model = time.perf_counter() - start
+
+    document = renderer.new_document()
+
+    start = time.perf_counter()
+    for class_name in report.classes:
+        add_class_summary(document, class_name)
+    summaries = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for class_name in report.classes:
+        renderer.add_individual_reports(document, class_name)
+    individual = time.perf_counter() - start
+
+    start = time.perf_counter()
+    zgr.document_bytes(document)
+    saving = time.perf_counter() - start
+
+    print(model, summaries, individual, saving)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--src', action='append')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, 'export.csv')
+        write_export(path, args.students, args.questions)
+
+        print('{} students x {} questions'.format(args.students, args.questions))
+        print('{:<30} {:>10} {:>12} {:>12} {:>10} {:>10}'.format('src', 'model (s)', 'tables (s)', 'reports (s)',
+                                                                 'save (s)', 'total (s)'))
+
+        for src in args.src or [default_src]:
+            out = subprocess.check_output([sys.executable, __file__, '--child', src, path])
+            times = [float(t) for t in out.split()]
+            print('{:<30} {:>10.2f} {:>12.2f} {:>12.2f} {:>10.2f} {:>10.2f}'.format(src[-30:], *times, sum(times)))
+
+
+if __name__ == '__main__':
+    main()
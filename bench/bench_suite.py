@@ -0,0 +1,158 @@
+"""
+Benchmark suite for the whole report pipeline.
+
+Writes synthetic exports (see make_export.py) at several sizes and times each
+stage of making a report: parsing the CSV file, indexing the scoresheets,
+summary statistics and item analysis, the difficulty analysis section, the
+grade distribution graph, computing the report's content, and rendering and
+saving the full report from it, first with --jobs worker processes and then
+with --parallel-jobs, to show the gain from rendering individual reports in
+parallel. Each size runs in a fresh process, and the peak RSS after each
+stage is reported, so a stage that raises the peak shows up as a jump. If the process dies (e.g. it
+runs out of memory), the stages it finished are still reported.
+
+Save the results with --json and pass them back with --baseline on a later
+run to see the change for every stage.
+
+Usage:
+    python bench/bench_suite.py [--sizes 1000 10000 100000] [--questions 50] [--versions 2]
+        [--format web|phone] [--jobs 1] [--parallel-jobs N] [--src DIR] [--json OUT] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+default_src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+stages = ('parse', 'index', 'statistics', 'difficulty', 'graph', 'model', 'generate', 'generate_parallel')
+
+
+def peak_rss():
+    """Gets the peak RSS of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+
+    return peak / 1024
+
+
+def run_child(src, path, jobs, parallel_jobs):
+    """Runs every stage once and prints the time and peak RSS after each as a line of JSON."""
+    sys.path.insert(0, src)
+    import zipgrade_reporter as zgr
+
+    def timed(stage, run):
+        start = time.perf_counter()
+        value = run()
+        print(json.dumps([stage, {'seconds': time.perf_counter() - start, 'peak_mib': peak_rss()}]), flush=True)
+        return value
+
+    def parse():
+        with open(path, newline='') as f:
+            matrix = zgr.load_matrix(f)
+        matrix.trim()
+        return matrix
+
+    def statistics():
+        report.get_summary_statistics()
+        for version in report.versions:
+            report.get_item_analysis(version)
+
+    def difficulty():
+        renderer = zgr.DocxRenderer(report.get_model(('difficulty',)))
+        document = renderer.new_document()
+        for version in report.versions:
+            renderer.add_difficulty_analysis(document, version)
+
+    def graph():
+        zgr._graph_cache.clear()
+        zgr.grade_distribution_images([report.get_grade_counts()])
+
+    def generate(jobs):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            renderer = zgr.DocxRenderer(model, jobs=jobs)
+            zgr.save_file(os.path.join(tmpdirname, 'report.docx'), renderer.render)
+
+    matrix = timed('parse', parse)
+    report = timed('index', lambda: zgr.Report(matrix))
+    timed('statistics', statistics)
+    timed('difficulty', difficulty)
+    timed('graph', graph)
+    model = timed('model', report.get_model)
+    timed('generate', lambda: generate(jobs))
+    timed('generate_parallel', lambda: generate(parallel_jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--versions', type=int, default=2)
+    parser.add_argument('--format', choices=('web', 'phone'), default='web')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--parallel-jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes for the generate_parallel stage (default: number of CPUs)')
+    parser.add_argument('--src', default=default_src)
+    parser.add_argument('--json', metavar='OUT', help='save the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='results saved by an earlier run, to compare with')
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], int(args.child[2]), int(args.child[3]))
+        return
+
+    from make_export import write_export
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+
+    print('{} questions, {} key version(s), {} format, {} job(s), {} parallel job(s)'.format(
+          args.questions, args.versions, args.format, args.jobs, args.parallel_jobs))
+    print('{:>8} {:<18} {:>10} {:>14} {:>10}'.format('rows', 'stage', 'time (s)', 'peak RSS (MiB)',
+                                                     'vs base'))
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        for size in args.sizes:
+            path = os.path.join(tmpdirname, 'export.csv')
+            write_export(path, size, args.questions, num_versions=args.versions, blank_rate=0.01,
+                         multi_rate=0.005, export_format=args.format)
+
+            child = subprocess.run([sys.executable, __file__, '--child', args.src, path, str(args.jobs),
+                                    str(args.parallel_jobs)],
+                                   stdout=subprocess.PIPE, universal_newlines=True)
+            results[str(size)] = times = dict(json.loads(line) for line in child.stdout.splitlines())
+
+            for stage in stages:
+                if stage not in times:
+                    print('{:>8} {:<18} {:>10}'.format(size, stage, 'failed' if child.returncode else ''))
+                    break
+
+                base = baseline.get(str(size), {}).get(stage)
+                change = '{:+.0%}'.format(times[stage]['seconds'] / base['seconds'] - 1) if base else ''
+                print('{:>8} {:<18} {:>10.2f} {:>14.1f} {:>10}'.format(size, stage, times[stage]['seconds'],
+                                                                       times[stage]['peak_mib'], change))
+
+            if 'generate_parallel' in times:
+                print('{:>8} generate speedup with {} job(s) over {}: {:.2f}x'.format(
+                      size, args.parallel_jobs, args.jobs,
+                      times['generate']['seconds'] / times['generate_parallel']['seconds']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'questions': args.questions, 'versions': args.versions, 'format': args.format,
+                       'jobs': args.jobs, 'parallel_jobs': args.parallel_jobs, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Synthetic ZipGrade export generator.
+
+Writes a CSV file laid out like a real ZipGrade export, in either the web
+format or the phone app format, so that the pipeline can be measured at sizes
+the sample data doesn't reach. Students are spread over classes and key
+versions, and a share of the answers can be left blank or double marked to
+exercise the flagged reports.
+
+Usage:
+    python bench/make_export.py OUT.csv [--students 10000] [--questions 50] [--classes 8]
+        [--versions 1] [--blank-rate 0.01] [--multi-rate 0.005] [--format web|phone] [--seed 0]
+"""
+
+import argparse
+
+import numpy as np
+
+letters = np.array(list('ABCD'))
+
+web_metadata = ['QuizName', 'QuizClass', 'FirstName', 'LastName', 'StudentID', 'CustomID',
+                'Earned Points', 'Possible Points', 'PercentCorrect', 'QuizCreated',
+                'DataExported', 'Key Version']
+
+phone_metadata = ['QuizName', 'QuizClass', 'FirstName', 'LastName', 'ZipGradeID', 'ExternalID',
+                  'EarnedPts', 'PossiblePts', 'PercentCorrect', 'QuizCreated',
+                  'DataExported', 'KeyVersion']
+
+formats = {
+    'web': {'metadata': web_metadata, 'question': ('Stu', 'PriKey', 'Points', 'Mark'),
+            'created': '10/8/2019 0:00', 'exported': '10/10/2019 15:23'},
+    'phone': {'metadata': phone_metadata, 'question': ('Stu', 'Key', 'PossPt'),
+              'created': 'Oct 08 2019 08:00 AM', 'exported': 'Oct 10 2019 03:23 PM'},
+}
+
+
+def write_export(path, num_students, num_questions, num_classes=8, num_versions=1, blank_rate=0.0,
+                 multi_rate=0.0, export_format='web', seed=0, quiz_name='Benchmark Quiz'):
+    """
+    Writes a synthetic ZipGrade export.
+
+    Each student gets a skill level, and answers each question correctly with
+    that probability, so scores are spread out like a real class.
+
+    Args:
+        path (str): File to write.
+        num_students (int): Number of students.
+        num_questions (int): Number of questions on the quiz.
+        num_classes (int): Number of classes the students are spread over.
+        num_versions (int): Number of answer key versions.
+        blank_rate (float): Share of answers left blank.
+        multi_rate (float): Share of answers with two letters marked.
+        export_format (str): 'web' or 'phone'.
+        seed (int): Random seed. The same arguments always write the same file.
+        quiz_name (str): Name of the quiz.
+    """
+    rng = np.random.default_rng(seed)
+    layout = formats[export_format]
+
+    header = list(layout['metadata'])
+    for q in range(1, num_questions + 1):
+        header += [prefix + str(q) for prefix in layout['question']]
+
+    keys = letters[rng.integers(0, 4, size=(num_versions, num_questions))]
+    versions = rng.integers(0, num_versions, size=num_students)
+    key = keys[versions]
+
+    skill = rng.uniform(0.4, 0.95, size=(num_students, 1))
+    correct = rng.random((num_students, num_questions)) < skill
+    answers = np.where(correct, key, letters[rng.integers(0, 4, size=key.shape)]).astype('<U2')
+
+    roll = rng.random(key.shape)
+    answers[roll < blank_rate] = ''
+    multi = (roll >= blank_rate) & (roll < blank_rate + multi_rate)
+    answers[multi] = np.char.add(answers[multi], np.where(answers[multi] == 'A', 'B', 'A'))
+
+    points = (answers == key).astype(int)
+    earned = points.sum(axis=1)
+
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(header) + '\n')
+
+        for i in range(num_students):
+            pct = round(earned[i] / num_questions * 100, 2)
+            row = [quiz_name, 'Period ' + str(i % num_classes + 1), 'First' + str(i), 'Last' + str(i),
+                   str(10000 + i), '', str(earned[i]), str(num_questions), str(pct),
+                   layout['created'], layout['exported'],
+                   str(versions[i] + 1) if num_versions > 1 else '']
+
+            a, k, p = answers[i].tolist(), key[i].tolist(), points[i].tolist()
+            if export_format == 'web':
+                cells = [c for q in range(num_questions) for c in (a[q], k[q], str(p[q]), 'C' if p[q] else 'X')]
+            else:
+                cells = [c for q in range(num_questions) for c in (a[q], k[q], '1')]
+
+            f.write(','.join(row + cells) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--classes', type=int, default=8)
+    parser.add_argument('--versions', type=int, default=1)
+    parser.add_argument('--blank-rate', type=float, default=0.01)
+    parser.add_argument('--multi-rate', type=float, default=0.005)
+    parser.add_argument('--format', choices=sorted(formats), default='web')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_export(args.path, args.students, args.questions, args.classes, args.versions, args.blank_rate,
+                 args.multi_rate, args.format, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,23 +5,26 @@ detailed test statistics, score summaries by class, and individual score reports
 for distribution to students.
 """
 
-import docx
+import csv
+import collections
+import contextlib
+import copy
+import functools
+import glob
+import html
+import io
+import itertools
 import json
+import math
+import operator
 import os
-import statistics
+import queue
+import re
 import sys
-import tempfile
-import urllib.request
-import webbrowser
+import threading
+import time
 
-import matplotlib.pyplot as plt; plt.rcdefaults()
 import numpy as np
-import matplotlib.pyplot as plt
-
-from docx.shared import Inches
-from docx.shared import Pt
-from tkinter import *
-from tkinter.filedialog import askopenfilename
 
 if getattr(sys, 'frozen', False):
     application_path = sys._MEIPASS + '/'
@@ -37,640 +40,5581 @@ version_url = 'https://raw.githubusercontent.com/joncoop/zipgrade-reporter/maste
 help_url = "https://joncoop.github.io/zipgrade-reporter/"
 """str: Support website."""
 
+update_check_timeout = 5
+"""int: Seconds to wait for the version info before giving up."""
 
-class Scoresheet:
+update_cache_max_age = 24 * 60 * 60
+"""int: Seconds before the cached version info is checked again."""
+
+report_cache_format = 2
+"""int: Version of the incremental report cache file format."""
+
+report_cache_max_files = 32
+"""int: Maximum number of quizzes to keep incremental report caches for."""
+
+parallel_min_students = 2000
+"""int: Fewest students for a report to use more than one worker process when no number of jobs is given."""
+
+recurring_miss_count = 2
+"""int: Number of quizzes a question must be missed on to show in a progress report."""
+
+report_sections = ('cover', 'statistics', 'graph', 'difficulty', 'classes', 'individual', 'flagged', 'similarity')
+"""tuple: Names of the sections of a report, in order."""
+
+section_titles = {'cover': 'Cover page', 'statistics': 'Summary statistics', 'graph': 'Grade distribution',
+                  'difficulty': 'Difficulty analysis', 'classes': 'Class scores',
+                  'individual': 'Individual reports', 'flagged': 'Flagged reports',
+                  'similarity': 'Similar answers'}
+"""dict: Title of each section of a report, for the GUI and timing summaries."""
+
+
+class Schema:
     """
-    Quiz data for a single student.
+    Column layout of a ZipGrade CSV export.
 
-    Scoresheets contain all meta data for a quiz as well as student responses,
-    correct answers, and point values for each question.
+    The phone app and the ZipGrade website name their columns differently. A
+    schema detects which flavor a header comes from and compiles the column
+    index of every metadata field and of the Stu/PriKey/Points/Mark cells for
+    each question, so that rows can be read with index lookups alone. Use
+    compile_schema() to get a cached schema for a header.
 
     Attributes:
-        quiz_name (str): Quiz name
-        class_name (str): Class name
-        first_name (str): Student's first name
-        last_name = (str): Student's first name
-        zip_id (str): Student's ZipGrade ID
-        external_id (str): Unused field in ZipGrade CSV data (Not sure what it's for)
-        earned_points (str): Total points earned
-        possible_points (str): Total points possible
-        percent_correct (str): Percent correct
-        date_created (str): Date quiz was created
-        date_exported (str): Date quiz data was exported
-        key_version (str): Answer key version
-        num_questions (str): Number of questions on quiz
-        responses = (list) Number of student responses
+        flavor (str): 'phone' or 'web'
+        source_fields (tuple): Column names as they appear in the CSV file.
+        header_fields (list): Column names, renamed to the web format.
+        metadata_index (dict): Scoresheet attribute name -> column index.
+        question_numbers (tuple): Question numbers present in the export.
+        num_questions (int): Number of questions on quiz.
+        stu_index (list): Column of each question's student answer.
+        key_index (list): Column of each question's correct answer.
+        points_index (list): Column of each question's points, or None.
+        mark_index (list): Column of each question's mark, or None.
     """
 
-    def __init__(self, header_row, data_row):
+    metadata_columns = (('quiz_name', 'QuizName'),
+                        ('class_name', 'QuizClass'),
+                        ('first_name', 'FirstName'),
+                        ('last_name', 'LastName'),
+                        ('zip_id', 'StudentID'),
+                        ('external_id', 'CustomID'),
+                        ('earned_points', 'Earned Points'),
+                        ('possible_points', 'Possible Points'),
+                        ('percent_correct', 'PercentCorrect'),
+                        ('date_created', 'QuizCreated'),
+                        ('date_exported', 'DataExported'),
+                        ('key_version', 'Key Version'))
+    """tuple: Scoresheet attribute names paired with their CSV column names."""
+
+    phone_columns = {'ZipGradeID': 'StudentID',
+                     'ExternalID': 'CustomID',
+                     'EarnedPts': 'Earned Points',
+                     'PossiblePts': 'Possible Points',
+                     'KeyVersion': 'Key Version'}
+    """dict: Phone app metadata column names mapped to web names."""
+
+    phone_prefixes = {'Key': 'PriKey', 'PossPt': 'Mark'}
+    """dict: Phone app per-question column prefixes mapped to web prefixes."""
+
+    question_column = re.compile(r'([A-Za-z]+?)(\d+)')
+    """re.Pattern: Splits a per-question column name into prefix and number."""
+
+    def __init__(self, header_fields):
         """
-        Constructor for a Scoresheet.
+        Constructor for a Schema.
 
         Args:
-            header_row (str): The top row of the ZipGrade CSV export file.
-            data_row (str): A single row containing one student's CSV quiz data.
+            header_fields (list): Column names from the top row of the ZipGrade CSV export file.
+
+        Raises:
+            ValueError: If a required column is missing.
         """
-        
-        def remove_quotes(s):
-            # Gets rid of quotes around non-numeric CSV data values
-            # I really should be using the csv module, but I just learned
-            # that it existed.
-            if len(s) > 0 and s[0] == '"':
-                s = s[1:]
-            if len(s) > 0 and s[-1] == '"':
-                s = s[:-1]
-
-            return s.strip()
-        
-        delimiter = ","
-        fields = header_row.split(delimiter)
-        values = data_row.split(delimiter)
-        values = [remove_quotes(v) for v in values]
-        
-        data = {}
-
-        for f, v in zip(fields, values):
-            data[f] = v
-
-        self.quiz_name = data['QuizName']
-        self.class_name = data['QuizClass']
-        self.first_name = data['FirstName']
-        self.last_name = data['LastName']
-        self.zip_id = data['StudentID']
-        self.external_id = data['CustomID'] # unused
-        self.earned_points = data['Earned Points']
-        self.possible_points = data['Possible Points']
-        self.percent_correct = data['PercentCorrect']
-        self.date_created = data['QuizCreated']
-        self.date_exported = data['DataExported']
-        self.key_version = data['Key Version']
-        self.num_questions = int((len(fields) - 12) / 4) # 12 metadata colums, 4 data cells per answer
-
-        self.responses = []
-
-        q = 1
-        count = 0
-
-        while count < self.num_questions:
-            k = 'PriKey' + str(q)
-            s = 'Stu' + str(q)
-
-            if k in data:
-                student_answer = data[s]
-                correct_answer = data[k]
-                r = {'question': q, 'answer': student_answer, 'correct': correct_answer}
-                self.responses.append(r)
-                count += 1
-
-            q += 1
-
-    
-class Report:
+        self.source_fields = tuple(header_fields)
+        fields = [f.strip() for f in header_fields]
+
+        if any(f in self.phone_columns for f in fields):
+            self.flavor = 'phone'
+            fields = [self.rename_phone_column(f) for f in fields]
+        else:
+            self.flavor = 'web'
+
+        self.header_fields = fields
+        index = {f: i for i, f in enumerate(fields)}
+
+        missing = [col for _, col in self.metadata_columns if col not in index]
+        if len(missing) > 0:
+            raise ValueError('Not a ZipGrade CSV export. Missing columns: ' + ', '.join(missing))
+
+        self.metadata_index = {attr: index[col] for attr, col in self.metadata_columns}
+
+        questions = {}
+        for i, f in enumerate(fields):
+            match = self.question_column.fullmatch(f)
+            if match:
+                prefix, q = match.group(1), int(match.group(2))
+                questions.setdefault(q, {})[prefix] = i
+
+        question_numbers = sorted(q for q, cols in questions.items() if 'PriKey' in cols and 'Stu' in cols)
+
+        self.question_numbers = tuple(question_numbers)
+        self.num_questions = len(question_numbers)
+        self.stu_index = [questions[q]['Stu'] for q in question_numbers]
+        self.key_index = [questions[q]['PriKey'] for q in question_numbers]
+        self.points_index = [questions[q].get('Points') for q in question_numbers]
+        self.mark_index = [questions[q].get('Mark') for q in question_numbers]
+
+        self.get_metadata = gather([self.metadata_index[attr] for attr, _ in self.metadata_columns])
+        self.get_stu = gather(self.stu_index)
+        self.get_key = gather(self.key_index)
+        self.get_points = gather(self.points_index)
+        self.get_mark = gather(self.mark_index)
+
+    def __reduce__(self):
+        # The compiled getters can't be pickled, so schemas sent to worker
+        # processes are recompiled from the original header.
+        return (compile_schema, (self.source_fields,))
+
+    def rename_phone_column(self, name):
+        """
+        Gets the web format name of a phone app column.
+
+        Args:
+            name (str): Column name from a phone app export.
+
+        Returns:
+            The equivalent column name used by the ZipGrade website.
+        """
+        if name in self.phone_columns:
+            return self.phone_columns[name]
+
+        match = self.question_column.fullmatch(name)
+        if match and match.group(1) in self.phone_prefixes:
+            return self.phone_prefixes[match.group(1)] + match.group(2)
+
+        return name
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_schema(header_fields):
+    return Schema(header_fields)
+
+
+def compile_schema(header_fields):
     """
-    Processes multiple ZipGrade scoresheets to create score report.
+    Gets the schema for a CSV header.
+
+    Schemas are cached, so files sharing a header are only compiled once.
 
-    A report uses the scoresheets to calculate summary statistics as well
-    as to generate the report as an MS Word document.
+    Args:
+        header_fields (list): Column names from the top row of the ZipGrade CSV export file.
+
+    Returns:
+        Schema for the header.
+    """
+    return _compile_schema(tuple(header_fields))
+
+
+class ScoreMatrix:
+    """
+    Columnar quiz data for all students.
+
+    Rather than keeping a dictionary of fields for every student, a ScoreMatrix
+    stores each metadata field as a column and the per-question data as 2-D
+    NumPy arrays indexed by (student, question). Rows are appended one at a time
+    as the CSV data is read and converted to arrays in chunks. The arrays are
+    available once trim() has been called.
 
     Attributes:
-        scoresheets (list): List of all scoresheets for a quiz.
+        schema (Schema): Column layout of the CSV export.
+        question_numbers (numpy.ndarray): Question numbers present in the export.
+        num_questions (int): Number of questions on quiz.
+        num_rows (int): Number of students stored.
+        metadata (dict): Scoresheet attribute name -> list of str values.
+        earned_points (numpy.ndarray): Total points earned by each student.
+        possible_points (numpy.ndarray): Total points possible for each student.
+        percent_correct (numpy.ndarray): Percent correct for each student.
+        responses (numpy.ndarray): Student answers (students x questions).
+        keys (numpy.ndarray): Correct answers (students x questions).
+        points (numpy.ndarray): Points earned per question (students x questions).
+        marks (numpy.ndarray): Mark column per question (students x questions).
     """
 
-    def __init__(self, scoresheets):
+    chunk_size = 1024
+    """int: Number of rows buffered before they are converted to arrays."""
+
+    array_columns = ('earned_points', 'possible_points', 'percent_correct',
+                     'responses', 'keys', 'points', 'marks')
+    """tuple: Names of the NumPy array attributes."""
+
+    def __init__(self, schema):
         """
-        Constructor for a Report.
+        Constructor for a ScoreMatrix.
 
         Args:
-            scoresheets (list): A list of Scoresheets.
+            schema (Schema): Column layout of the CSV export.
         """
-        self.scoresheets = scoresheets
+        self.schema = schema
+        self.metadata = {attr: [] for attr, _ in schema.metadata_columns}
+        self.question_numbers = np.array(schema.question_numbers, dtype=np.int32)
+        self.num_questions = num_questions = schema.num_questions
+
+        self.num_rows = 0
+        self._pending = []
+        self._chunks = {name: [] for name in self.array_columns}
+        self._codes = None
+
+        shape = (0, num_questions)
+        self.earned_points = np.zeros(0)
+        self.possible_points = np.zeros(0)
+        self.percent_correct = np.zeros(0)
+        self.responses = np.zeros(shape, dtype='<U1')
+        self.keys = np.zeros(shape, dtype='<U1')
+        self.points = np.zeros(shape)
+        self.marks = np.zeros(shape, dtype='<U1')
+
+    def append(self, values):
+        """
+        Adds one student's data to the matrix.
 
-        sort_by = lambda k: k.last_name + " " + k.first_name
-        self.scoresheets = sorted(self.scoresheets, key=sort_by)
+        Rows are buffered and converted to arrays a chunk at a time, so trim()
+        must be called after the last row has been appended.
 
-    @property
-    def versions(self):
-        """list: List of all key versions for a quiz."""
+        Args:
+            values (list): Field values for a single CSV data row.
 
-        result = []
+        Returns:
+            Row index of the new student.
+        """
+        self._pending.append(values)
+        self.num_rows += 1
 
-        for s in self.scoresheets:
-            v = s.key_version
+        if len(self._pending) == self.chunk_size:
+            self._flush()
 
-            if v not in result:
-                result.append(v)
+        return self.num_rows - 1
 
-        result.sort()
-        return result
+    def _flush(self):
+        """Converts buffered rows to arrays."""
+        pending = self._pending
+        if len(pending) == 0:
+            return
 
-    @property
-    def classes(self):
-        """list: All classes for a quiz."""
-        result = []
+        start = self.num_rows - len(pending)
+        shape = (len(pending), self.num_questions)
+        count = shape[0] * shape[1]
+        chunks = self._chunks
 
-        for s in self.scoresheets:
-            v = s.class_name
+        schema = self.schema
 
-            if v not in result:
-                result.append(v)
+        for attr, column in zip(self.metadata, zip(*map(schema.get_metadata, pending))):
+            self.metadata[attr].extend(v.strip() for v in column)
 
-        result.sort()
-        return result
+        for name in ('earned_points', 'possible_points', 'percent_correct'):
+            values = self.metadata[name][start:]
+            chunks[name].append(np.fromiter(map(to_float, values), dtype=float, count=shape[0]))
 
-    @property
-    def raw_scores(self):
-        """list: Raw scores for all students."""
-        result = []
+        stu, key, points, mark = (list(itertools.chain.from_iterable(map(get, pending)))
+                                  for get in (schema.get_stu, schema.get_key,
+                                              schema.get_points, schema.get_mark))
+        text = '<U' + str(max(1, max(map(len, stu + key + mark), default=1)))
 
-        for s in self.scoresheets:
-            n = float(s.earned_points)
-            result.append(n)
+        chunks['responses'].append(np.fromiter(stu, dtype=text, count=count).reshape(shape))
+        chunks['keys'].append(np.fromiter(key, dtype=text, count=count).reshape(shape))
+        chunks['marks'].append(np.fromiter(mark, dtype=text, count=count).reshape(shape))
 
-        return result
+        try:
+            points = np.fromiter(map(float, points), dtype=float, count=count)
+        except ValueError:
+            points = np.fromiter(map(to_float, points), dtype=float, count=count)
+        chunks['points'].append(points.reshape(shape))
 
-    @property
-    def percentages(self):
-        """list: Percentages for all students."""
-        result = []
+        self._pending = []
 
-        for s in self.scoresheets:
-            n = float(s.percent_correct)
-            n = round(n)
-            result.append(n)
+    def trim(self):
+        """
+        Stores any buffered rows and joins the chunks into single arrays.
 
-        return result
+        More rows may be appended afterward, but trim() must be called again
+        before the arrays are used.
+        """
+        self._flush()
 
-    def get_sheets_by_class(self, class_name):
+        for name, chunks in self._chunks.items():
+            if len(chunks) > 1:
+                chunks[:] = [np.concatenate(chunks)]
+
+            if len(chunks) > 0:
+                setattr(self, name, chunks[0])
+
+        self._codes = None
+
+    def subset(self, rows):
         """
-        Gets a list of scoresheets filtered by class.
+        Makes a new ScoreMatrix containing only some of the students.
 
         Args:
-            class_name (str): Name of class to get scoresheets for.
+            rows (numpy.ndarray): Rows of the students to copy.
 
         Returns:
-            A filtered list of scoresheets.
+            ScoreMatrix with the same schema and only the given rows.
         """
+        self.trim()
+        rows = np.asarray(rows, dtype=np.intp)
 
-        result = []
-        for s in self.scoresheets:
-            if s.class_name == class_name:
-                result.append(s)
+        result = ScoreMatrix(self.schema)
+        result.num_rows = len(rows)
+
+        for attr, values in self.metadata.items():
+            result.metadata[attr] = [values[i] for i in rows.tolist()]
+
+        for name in self.array_columns:
+            array = getattr(self, name)[rows]
+            result._chunks[name] = [array]
+            setattr(result, name, array)
 
         return result
 
-    def get_sheets_by_version(self, key_version):
+    def encode(self):
         """
-        Gets a list of scoresheets filtered by key version.
+        Gets student answers and correct answers as integer answer codes.
 
-        Args:
-            key_version (str): Version to get scoresheets for.
+        Codes are computed the first time they are requested and cached until
+        trim() is called again. See encode_answers().
 
         Returns:
-            A filtered list of scoresheets.
+            Response codes, key codes, and a dict of labels for codes that are
+            not letter bitmasks.
+        """
+        if self._codes is None:
+            both = np.concatenate([self.responses, self.keys.astype(self.responses.dtype)
+                                   if self.keys.dtype.itemsize <= self.responses.dtype.itemsize
+                                   else self.keys])
+            codes, labels = encode_answers(both)
+            n = self.num_rows
+            self._codes = (codes[:n], codes[n:], labels)
+
+        return self._codes
+
+    def fingerprints(self):
+        """
+        Gets a fingerprint of each student's data.
+
+        A fingerprint is a hash of every field in the student's row and of the
+        question numbers, so it changes whenever anything on the student's
+        paper changes. Values are hashed as text, so fingerprints don't depend
+        on how wide the arrays happen to be.
+
+        Returns:
+            List of hex digests in row order.
         """
+        import hashlib
+
+        self.trim()
 
+        base = hashlib.blake2b(repr(self.question_numbers.tolist()).encode(), digest_size=16)
+        columns = [zip(*self.metadata.values())]
+        columns += [getattr(self, name).tolist() for name in ('responses', 'keys', 'points', 'marks')]
         result = []
-        for s in self.scoresheets:
-            if s.key_version == key_version:
-                result.append(s)
+
+        for values in zip(*columns):
+            h = base.copy()
+            for v in values:
+                h.update('\x1f'.join(map(str, v)).encode() + b'\x1e')
+            result.append(h.hexdigest())
 
         return result
 
-    def quartiles(self, num_list):
+    @property
+    def keyed(self):
+        """numpy.ndarray: Boolean mask of questions with a correct answer set."""
+        return self.keys != ''
+
+    @property
+    def correct(self):
+        """numpy.ndarray: Boolean mask of responses matching the correct answer."""
+        return self.responses == self.keys
+
+
+def read_csv(f):
+    """
+    Reads a ZipGrade CSV export one row at a time.
+
+    Rows are parsed with the csv module, so quoted values containing commas
+    (e.g. "Smith, Jr.") are handled correctly. Only the current row is held in
+    memory.
+
+    Args:
+        f (file): Open CSV file. Should be opened with newline=''.
+
+    Yields:
+        The header as a list of column names, followed by a list of field
+        values for each student.
+    """
+    reader = csv.reader(f)
+
+    for values in reader:
+        if len(values) > 0:
+            yield values
+
+
+def load_matrix(f, progress=None):
+    """
+    Streams a ZipGrade CSV export into a ScoreMatrix.
+
+    Args:
+        f (file): Open CSV file. Should be opened with newline=''.
+        progress (callable): Called with the number of rows read so far
+            after every ScoreMatrix.chunk_size rows. Reading stops if it
+            raises an exception.
+
+    Returns:
+        ScoreMatrix containing every student in the file.
+    """
+    rows = read_csv(f)
+    schema = compile_schema(next(rows))
+
+    matrix = ScoreMatrix(schema)
+
+    for i, values in enumerate(rows, 1):
+        matrix.append(values)
+
+        if progress is not None and i % matrix.chunk_size == 0:
+            progress(i)
+
+    return matrix
+
+
+def read_export(path, progress=None):
+    """
+    Reads a ZipGrade CSV export file into a ScoreMatrix.
+
+    Args:
+        path (str): Path to CSV file.
+        progress (callable): Called with the number of rows read so far. See
+            load_matrix().
+
+    Returns:
+        ScoreMatrix containing every student in the file, with its arrays
+        ready to use.
+    """
+    with open(path, newline='') as f:
+        matrix = load_matrix(f, progress)
+
+    matrix.trim()
+
+    return matrix
+
+
+def read_exports(paths, jobs=1, progress=None):
+    """
+    Reads one or more ZipGrade CSV exports of the same quiz.
+
+    Teachers often export each class separately. Several files are parsed
+    in parallel and combined with merge_matrices().
+
+    Args:
+        paths (list): Paths of CSV files, or the path of a single file.
+        jobs (int): Number of worker processes to parse files with.
+        progress (callable): Called as progress(done, total, message) as
+            files are read, where done and total count files. Files read in
+            this process also report the rows read so far. Reading stops if
+            it raises an exception.
+
+    Returns:
+        ScoreMatrix containing the students from every file.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    def report(done, message):
+        if progress is not None:
+            progress(done, len(paths), message)
+
+    def read(i, path):
+        name = os.path.basename(path)
+        rows = lambda n: report(i, 'Reading ' + name + ' (' + str(n) + ' students)')
+        matrix = read_export(path, rows if progress is not None else None)
+        report(i + 1, 'Read ' + name)
+
+        return matrix
+
+    if len(paths) == 1:
+        return read(0, paths[0])
+
+    if jobs > 1:
+        import concurrent.futures
+
+        matrices = []
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+            for path, matrix in zip(paths, executor.map(read_export, paths)):
+                matrices.append(matrix)
+                report(len(matrices), 'Read ' + os.path.basename(path))
+    else:
+        matrices = [read(i, path) for i, path in enumerate(paths)]
+
+    return merge_matrices(matrices)
+
+
+def merge_matrices(matrices):
+    """
+    Combines exports of the same quiz into one ScoreMatrix.
+
+    The exports may come from the phone app or the website, since their
+    columns have already been mapped by their schemas, but they must have
+    the same questions. A student scanned in more than one export (by
+    StudentID) is kept once, from the export with the latest DataExported
+    date and time; if those are the same, the later export in the list wins.
+    Students without a StudentID are all kept.
+
+    Args:
+        matrices (list): ScoreMatrix for each export, oldest first.
+
+    Returns:
+        ScoreMatrix with the schema of the first export.
+
+    Raises:
+        ValueError: If the exports have different questions.
+    """
+    first = matrices[0]
+
+    for m in matrices[1:]:
+        if not np.array_equal(m.question_numbers, first.question_numbers):
+            raise ValueError('Exports to merge must have the same questions.')
+
+    dates = {}
+    latest = {}
+
+    for i, m in enumerate(matrices):
+        m.trim()
+
+        for row, (zip_id, exported) in enumerate(zip(m.metadata['zip_id'], m.metadata['date_exported'])):
+            if zip_id == '':
+                continue
+
+            if exported not in dates:
+                try:
+                    dates[exported] = zipgrade_timestamp(exported)
+                except (IndexError, KeyError):
+                    dates[exported] = ''
+
+            rank = (dates[exported], i)
+
+            if zip_id not in latest or rank >= latest[zip_id][0]:
+                latest[zip_id] = (rank, row)
+
+    parts = []
+
+    for i, m in enumerate(matrices):
+        keep = [row for row, zip_id in enumerate(m.metadata['zip_id'])
+                if zip_id == '' or latest[zip_id] == ((dates[m.metadata['date_exported'][row]], i), row)]
+        parts.append(m.subset(keep))
+
+    result = ScoreMatrix(first.schema)
+    result.num_rows = sum(m.num_rows for m in parts)
+
+    for attr in result.metadata:
+        result.metadata[attr] = list(itertools.chain.from_iterable(m.metadata[attr] for m in parts))
+
+    for name in result.array_columns:
+        array = np.concatenate([getattr(m, name) for m in parts])
+        result._chunks[name] = [array]
+        setattr(result, name, array)
+
+    return result
+
+
+def gather(indexes):
+    """
+    Makes a function that picks several fields out of a CSV row at once.
+
+    Args:
+        indexes (list): Column indexes to pick. None picks an empty value.
+
+    Returns:
+        A function that takes a list of field values and returns a tuple.
+    """
+    if None in indexes:
+        return lambda values: tuple(values[i] if i is not None else '' for i in indexes)
+    elif len(indexes) == 1:
+        i = indexes[0]
+        return lambda values: (values[i],)
+    elif len(indexes) == 0:
+        return lambda values: ()
+    else:
+        return operator.itemgetter(*indexes)
+
+
+def to_float(s):
+    """
+    Converts a numeric CSV value to a float.
+
+    Args:
+        s (str): Value from the CSV data.
+
+    Returns:
+        The number, or NaN if the value is blank or not numeric.
+    """
+    try:
+        return float(s)
+    except ValueError:
+        return float('nan')
+
+
+letter_codes = 26
+"""int: Number of bits used by answer codes for the letters A-Z."""
+
+
+def encode_answers(answers):
+    """
+    Encodes an array of answers as integers.
+
+    Each answer is encoded as a bitmask of the letters marked, so 'A' is 1,
+    'B' is 2, and the multiple answer 'BD' is 10. Blank answers are 0. If any
+    answer contains something other than capital letters, all answers are
+    instead numbered in sorted order starting at 2 ** letter_codes.
+
+    Args:
+        answers (numpy.ndarray): Array of answer strings.
+
+    Returns:
+        An int64 array of codes the same shape as answers and a dict of labels
+        for codes that are not letter bitmasks.
+    """
+    answers = np.asarray(answers, dtype=str)
+    points = answers.view(np.uint32).reshape(answers.shape + (-1,))
+    letters = (points >= ord('A')) & (points <= ord('Z'))
+
+    if np.all(letters | (points == 0)):
+        bits = np.where(letters, np.left_shift(np.int64(1), (points - ord('A')).astype(np.int64) % 32), 0)
+        return np.bitwise_or.reduce(bits, axis=-1), {}
+
+    unique, inverse = np.unique(answers, return_inverse=True)
+    offset = 2 ** letter_codes
+    labels = {offset + i: str(a) for i, a in enumerate(unique)}
+
+    return inverse.reshape(answers.shape).astype(np.int64) + offset, labels
+
+
+def decode_answer(code, labels=None):
+    """
+    Converts an answer code back to the answer.
+
+    Args:
+        code (int): Code from encode_answers().
+        labels (dict): Labels returned by encode_answers().
+
+    Returns:
+        The answer as a string.
+    """
+    code = int(code)
+
+    if labels is not None and code in labels:
+        return labels[code]
+
+    return ''.join(chr(ord('A') + i) for i in range(letter_codes) if code & (1 << i))
+
+
+def _metadata_property(attr):
+    # Builds a read-only Scoresheet attribute backed by a ScoreMatrix column.
+    return property(lambda self: self.matrix.metadata[attr][self.row])
+
+
+class Scoresheet:
+    """
+    Quiz data for a single student.
+
+    Scoresheets are lightweight views into one row of a ScoreMatrix. They expose
+    all meta data for a quiz as well as student responses, correct answers, and
+    point values for each question.
+
+    Attributes:
+        matrix (ScoreMatrix): Matrix holding the data for all students
+        row (int): Row of this student in the matrix
+        quiz_name (str): Quiz name
+        class_name (str): Class name
+        first_name (str): Student's first name
+        last_name = (str): Student's first name
+        zip_id (str): Student's ZipGrade ID
+        external_id (str): Unused field in ZipGrade CSV data (Not sure what it's for)
+        earned_points (str): Total points earned
+        possible_points (str): Total points possible
+        percent_correct (str): Percent correct
+        date_created (str): Date quiz was created
+        date_exported (str): Date quiz data was exported
+        key_version (str): Answer key version
+        num_questions (str): Number of questions on quiz
+        responses = (list) Number of student responses
+    """
+
+    __slots__ = ('matrix', 'row')
+
+    def __init__(self, matrix, row):
         """
-        Gets quartiles for a set of values.
+        Constructor for a Scoresheet.
 
         Args:
-            num_list (list): List of numbers to calculate quartiles for.
-        Returns:
-            Lower and upper quartiles for a set of numbers.
+            matrix (ScoreMatrix): Matrix holding the data for all students.
+            row (int): Row of this student in the matrix.
         """
-        nums = num_list.copy()
-        nums.sort()
+        self.matrix = matrix
+        self.row = row
+
+    quiz_name = _metadata_property('quiz_name')
+    class_name = _metadata_property('class_name')
+    first_name = _metadata_property('first_name')
+    last_name = _metadata_property('last_name')
+    zip_id = _metadata_property('zip_id')
+    external_id = _metadata_property('external_id') # unused
+    earned_points = _metadata_property('earned_points')
+    possible_points = _metadata_property('possible_points')
+    percent_correct = _metadata_property('percent_correct')
+    date_created = _metadata_property('date_created')
+    date_exported = _metadata_property('date_exported')
+    key_version = _metadata_property('key_version')
+
+    @property
+    def num_questions(self):
+        """int: Number of questions on quiz."""
+        return self.matrix.num_questions
+
+    @property
+    def responses(self):
+        """list: Question number, student answer, and correct answer for each question."""
+        m = self.matrix
+        return [{'question': int(q), 'answer': str(a), 'correct': str(c)}
+                for q, a, c in zip(m.question_numbers, m.responses[self.row], m.keys[self.row])]
+
+
+def percent_text(value):
+    """
+    Formats a percentage without a trailing ".0", e.g. "100%" or "87.5%".
+
+    Args:
+        value (float): Percentage.
+
+    Returns:
+        The percentage as text.
+    """
+    if np.isfinite(value) and value == int(value):
+        value = int(value)
+
+    return str(value) + "%"
+
+
+class ScoreStatistics:
+    """
+    Summary statistics for a set of scores.
+
+    Raw scores and percentages are stacked into one array and sorted together,
+    so every statistic is computed in a single vectorized pass.
+
+    Attributes:
+        num_scores (int): Number of scores
+        mean_raw, mean_pct (float): Mean
+        median_raw, median_pct (float): Median
+        st_dev_raw, st_dev_pct (float): Sample standard deviation
+        min_raw, min_pct (float): Lowest score
+        max_raw, max_pct (float): Highest score
+        q1_raw, q1_pct (float): Lower quartile
+        q3_raw, q3_pct (float): Upper quartile
+
+    All values are rounded to two decimal places and are NaN when there are
+    too few scores to compute them.
+    """
+
+    def __init__(self, raw_scores, percentages):
+        """
+        Constructor for ScoreStatistics.
+
+        Args:
+            raw_scores (numpy.ndarray): Points earned by each student.
+            percentages (numpy.ndarray): Rounded percent correct for each student.
+        """
+        scores = np.vstack([raw_scores, percentages]).astype(float)
+        scores.sort(axis=1)
+        n = scores.shape[1]
+
+        self.num_scores = n
+
+        nan = np.full(2, np.nan)
+        mean = scores.mean(axis=1) if n > 0 else nan
+        st_dev = scores.std(axis=1, ddof=1) if n > 1 else nan
+        median = self.median(scores)
+        low = scores[:, 0] if n > 0 else nan
+        high = scores[:, -1] if n > 0 else nan
+        q1 = self.median(scores[:, :n // 2])
+        q3 = self.median(scores[:, (n + 1) // 2:])
+
+        self.mean_raw, self.mean_pct = np.round(mean, 2).tolist()
+        self.median_raw, self.median_pct = np.round(median, 2).tolist()
+        self.st_dev_raw, self.st_dev_pct = np.round(st_dev, 2).tolist()
+        self.min_raw, self.min_pct = np.round(low, 2).tolist()
+        self.max_raw, self.max_pct = np.round(high, 2).tolist()
+        self.q1_raw, self.q1_pct = np.round(q1, 2).tolist()
+        self.q3_raw, self.q3_pct = np.round(q3, 2).tolist()
+
+    @staticmethod
+    def median(sorted_scores):
+        """
+        Gets the median of each row of a sorted array.
+
+        Args:
+            sorted_scores (numpy.ndarray): 2-D array sorted along each row.
+
+        Returns:
+            Array of row medians.
+        """
+        n = sorted_scores.shape[1]
+        mid = n // 2
+
+        if n == 0:
+            return np.full(sorted_scores.shape[0], np.nan)
+        elif n % 2 == 1:
+            return sorted_scores[:, mid]
+        else:
+            return sorted_scores[:, mid - 1:mid + 1].mean(axis=1)
+
+
+class ItemAnalysis:
+    """
+    Item statistics for students who took the same key version.
+
+    All statistics are computed together from the (students x questions)
+    answer codes, so there are no per-student loops.
+
+    Attributes:
+        question_numbers (numpy.ndarray): Questions with a correct answer set
+        keys (list): Correct answer for each question
+        num_students (int): Number of students
+        misses (numpy.ndarray): Number of students who missed each question
+        p_values (numpy.ndarray): Proportion of students answering correctly
+        point_biserial (numpy.ndarray): Correlation between answering correctly and total points
+        discrimination (numpy.ndarray): Proportion correct in the upper group minus the lower group
+        options (list): Every answer given, in code order
+        option_counts (numpy.ndarray): Number of students giving each option (questions x options)
+    """
+
+    group_fraction = 0.27
+    """float: Fraction of students in each of the upper and lower scoring groups."""
+
+    def __init__(self, matrix, rows):
+        """
+        Constructor for ItemAnalysis.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+            rows (numpy.ndarray): Rows of the students to analyze.
+        """
+        response_codes, key_codes, labels = matrix.encode()
+        n = len(rows)
+
+        keyed = np.flatnonzero(matrix.keyed[rows].any(axis=0)) if n > 0 else np.zeros(0, dtype=np.intp)
+        answers = response_codes[np.ix_(rows, keyed)]
+        key = key_codes[np.ix_(rows, keyed)]
+        correct = (answers == key).astype(float)
+        totals = matrix.earned_points[rows]
+
+        self.question_numbers = matrix.question_numbers[keyed]
+        self.keys = [matrix.keys[rows[0], j] for j in keyed] if n > 0 else []
+        self.num_students = n
+        self.misses = n - correct.sum(axis=0).astype(int)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.p_values = correct.mean(axis=0) if n > 0 else np.full(len(keyed), np.nan)
+
+            item_dev = correct - self.p_values
+            total_dev = totals - totals.mean() if n > 0 else totals
+            covariance = item_dev.T @ total_dev
+            spread = np.sqrt((item_dev ** 2).sum(axis=0) * (total_dev ** 2).sum())
+            self.point_biserial = covariance / spread
+
+            if n > 0:
+                group = max(1, int(round(n * self.group_fraction)))
+                ranked = np.argsort(totals, kind='stable')
+                lower = correct[ranked[:group]].mean(axis=0)
+                upper = correct[ranked[-group:]].mean(axis=0)
+                self.discrimination = upper - lower
+            else:
+                self.discrimination = np.full(len(keyed), np.nan)
+
+        options, option_index = np.unique(answers, return_inverse=True)
+        option_index = option_index.reshape(answers.shape)
+        columns = np.arange(len(keyed)) * len(options)
+
+        self.options = [decode_answer(c, labels) for c in options]
+        counts = np.bincount((option_index + columns).ravel(), minlength=len(keyed) * len(options))
+        self.option_counts = counts.reshape(len(keyed), len(options))
+
+    @property
+    def percent_missed(self):
+        """numpy.ndarray: Percent of students who missed each question."""
+        return np.round(self.misses / max(self.num_students, 1) * 100, 1)
+
+    def distractors(self, item):
+        """
+        Gets the answers given for a single question.
+
+        Args:
+            item (int): Position of the question in question_numbers.
+
+        Returns:
+            List of (answer, count) pairs, most common first.
+        """
+        counts = self.option_counts[item]
+        order = np.argsort(-counts, kind='stable')
+
+        return [(self.options[i], int(counts[i])) for i in order if counts[i] > 0]
+
+
+class ScanCheck:
+    """
+    Possible scanning errors and suspicious papers for every student.
+
+    Every check runs on the whole (students x questions) matrix at once, so
+    papers can be flagged before, and without, rendering the individual
+    reports. Papers are flagged for:
+
+    - questions where the number of letters marked differs from the key,
+      i.e. blanks, extra marks, or missing marks;
+    - a long run of the same letter that isn't in the key;
+    - exactly the same answers as another paper, with several of them
+      wrong (often the same paper scanned twice);
+    - a score far from everyone else's.
+
+    Attributes:
+        question_numbers (numpy.ndarray): Question numbers present in the export.
+        mismatched (numpy.ndarray): Questions with a different number of
+            marks than the key (students x questions).
+        blanks (numpy.ndarray): Number of keyed questions left blank.
+        extra_marks (numpy.ndarray): Number of questions with more marks than the key.
+        missing_marks (numpy.ndarray): Number of questions with fewer marks
+            than the key, but not blank.
+        longest_run (numpy.ndarray): Longest run of the same answer.
+        key_run (numpy.ndarray): Longest run of the same answer in the key.
+        duplicate_group (numpy.ndarray): Group number shared by papers with
+            the same answers, or -1.
+        score_z (numpy.ndarray): Robust z-score of each percent (distance from
+            the median in median absolute deviations, scaled to match a
+            standard deviation), or NaN.
+    """
+
+    suspicious_run = 8
+    """int: Shortest run of the same answer that is flagged."""
+
+    duplicate_min_wrong = 3
+    """int: Fewest wrong answers two papers must share before being flagged as identical."""
+
+    outlier_z = 3.5
+    """float: Robust z-score beyond which a score is flagged."""
+
+    def __init__(self, matrix):
+        """
+        Constructor for ScanCheck.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+        """
+        response_codes, key_codes, labels = matrix.encode()
+        n = matrix.num_rows
+
+        answer_marks = np.char.str_len(matrix.responses)
+        key_marks = np.char.str_len(matrix.keys)
+        keyed = key_marks > 0
+
+        self.question_numbers = matrix.question_numbers
+        self.mismatched = keyed & (answer_marks != key_marks)
+        self.blanks = (self.mismatched & (answer_marks == 0)).sum(axis=1)
+        self.extra_marks = (self.mismatched & (answer_marks > key_marks)).sum(axis=1)
+        self.missing_marks = self.mismatched.sum(axis=1) - self.blanks - self.extra_marks
+
+        answered = keyed & (response_codes != 0)
+        self.longest_run = self.run_lengths(response_codes, answered)
+        self.key_run = self.run_lengths(key_codes, keyed)
+
+        # papers with the same answers, among those with enough wrong answers to be unlikely
+        self.duplicate_group = np.full(n, -1, dtype=np.intp)
+        wrong = (keyed & (response_codes != key_codes)).sum(axis=1)
+        candidates = np.flatnonzero(wrong >= self.duplicate_min_wrong)
+
+        if len(candidates) > 1:
+            codes = np.ascontiguousarray(response_codes[candidates])
+            rows = codes.view(np.dtype((np.void, codes.dtype.itemsize * codes.shape[1]))).ravel()
+            _, group, counts = np.unique(rows, return_inverse=True, return_counts=True)
+            group = group.ravel()
+            shared = counts[group] > 1
+            self.duplicate_group[candidates[shared]] = group[shared]
+
+        percents = matrix.percent_correct
+        self.score_z = np.full(n, np.nan)
+
+        if np.isfinite(percents).any():
+            median = np.nanmedian(percents)
+            spread = np.nanmedian(np.abs(percents - median))
+
+            if spread > 0:
+                self.score_z = 0.6745 * (percents - median) / spread
+
+    @staticmethod
+    def run_lengths(codes, mask):
+        """
+        Gets the longest run of the same code in each row.
+
+        Args:
+            codes (numpy.ndarray): Answer codes (students x questions).
+            mask (numpy.ndarray): Codes that count toward a run.
+
+        Returns:
+            Array with the length of the longest run in each row.
+        """
+        n, q = codes.shape
+        run = np.zeros(n, dtype=np.intp)
+        longest = np.zeros(n, dtype=np.intp)
+
+        for j in range(q):
+            same = mask[:, j] & (run > 0) & (codes[:, j] == codes[:, j - 1]) if j > 0 else mask[:, j]
+            run = np.where(same, run + 1, mask[:, j].astype(np.intp))
+            np.maximum(longest, run, out=longest)
+
+        return longest
+
+    @property
+    def flagged(self):
+        """numpy.ndarray: Boolean mask of flagged papers."""
+        with np.errstate(invalid='ignore'):
+            return (self.mismatched.any(axis=1) | self.suspicious_runs | (self.duplicate_group >= 0) |
+                    (np.abs(self.score_z) > self.outlier_z))
+
+    @property
+    def suspicious_runs(self):
+        """numpy.ndarray: Boolean mask of papers with a long run of the same answer."""
+        return (self.longest_run >= self.suspicious_run) & (self.longest_run > self.key_run)
+
+    def questions(self, row):
+        """
+        Gets the flagged questions on a paper.
+
+        Args:
+            row (int): Row of the student in the matrix.
+
+        Returns:
+            The question numbers, formatted as in the individual reports, or
+            "None".
+        """
+        questions = [str(q) for q in self.question_numbers[self.mismatched[row]].tolist()]
+
+        return str(questions)[1: -1] if len(questions) > 0 else "None"
+
+    def reasons(self, row, names):
+        """
+        Explains why a paper was flagged.
+
+        Args:
+            row (int): Row of the student in the matrix.
+            names (list): Name of the student in each row, for identical papers.
+
+        Returns:
+            List of reasons.
+        """
+        reasons = []
+
+        for count, what in ((self.blanks[row], 'blank'), (self.extra_marks[row], 'extra mark'),
+                            (self.missing_marks[row], 'missing mark')):
+            if count > 0:
+                reasons.append(str(count) + ' ' + what + ('s' if count > 1 else ''))
+
+        if self.suspicious_runs[row]:
+            reasons.append(str(self.longest_run[row]) + ' same answers in a row')
+
+        group = self.duplicate_group[row]
+        if group >= 0:
+            others = [names[i] for i in np.flatnonzero(self.duplicate_group == group).tolist() if i != row]
+            reasons.append('same answers as ' + ' and '.join(others))
+
+        z = self.score_z[row]
+        if abs(z) > self.outlier_z:
+            reasons.append('score far ' + ('below' if z < 0 else 'above') + ' the rest')
+
+        return reasons
+
+
+class AnswerSimilarity:
+    """
+    Pairs of students with improbably many of the same wrong answers.
+
+    Students working on their own seldom pick the same wrong answer to many
+    questions, so a pair that does may have copied. Each student is compared
+    with every other student in the same group (e.g. class and key version).
+
+    Wrong answers are one-hot encoded, one column for each wrong answer to
+    each question, so the matching wrong answers of every pair are a matrix
+    product. The product is computed a block of students at a time, which
+    keeps memory proportional to the group size rather than its square.
+
+    The number of matches expected by chance for a pair is the sum, over the
+    questions both students got wrong, of the chance that two wrong answers
+    to the question are the same, estimated from how often each wrong answer
+    was picked in the group. The chance of at least the observed number of
+    matches is taken from a binomial distribution with the same mean, which
+    never understates it, and multiplied by the number of pairs compared, so
+    large groups don't flag more pairs just by having more of them.
+
+    The answer codes and wrong answers are worked out once for the whole
+    quiz, and each group only takes its own rows of them.
+
+    Attributes:
+        codes (numpy.ndarray): Response code of each answer (students x questions).
+        wrong (numpy.ndarray): Boolean mask of wrong answers, not counting
+            blanks or unkeyed questions.
+    """
+
+    min_shared = 5
+    """int: Fewest matching wrong answers for a pair to be flagged."""
+
+    max_chance = 0.01
+    """float: Highest chance of the matches, after correcting for the number of pairs, that is flagged."""
+
+    block_size = 1024
+    """int: Number of students compared with the rest of their group at once."""
+
+    def __init__(self, matrix):
+        """
+        Constructor for AnswerSimilarity.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+        """
+        response_codes, key_codes, labels = matrix.encode()
+        keyed = np.char.str_len(matrix.keys) > 0
+
+        self.codes = response_codes
+        self.wrong = keyed & (response_codes != 0) & (response_codes != key_codes)
+
+    def pairs(self, groups):
+        """
+        Finds the flagged pairs in groups of students.
+
+        Args:
+            groups (list): Array of rows for each group of students to compare.
+
+        Returns:
+            List of the row of each student, matching wrong answers, questions
+            both got wrong, expected matching wrong answers, and chance, for
+            each flagged pair, most unlikely first.
+        """
+        pairs = []
+
+        for rows in groups:
+            if len(rows) > 1:
+                pairs += self.compare(rows)
+
+        return sorted(pairs, key=operator.itemgetter(5))
+
+    def compare(self, rows):
+        """
+        Finds the flagged pairs in a group of students.
+
+        Args:
+            rows (numpy.ndarray): Rows of the students in the matrix.
+
+        Returns:
+            List of flagged pairs, as in pairs().
+        """
+        codes = self.codes[rows]
+        wrong = self.wrong[rows]
+        n, q = codes.shape
+        student, question = np.nonzero(wrong)
+
+        if len(student) == 0:
+            return []
+
+        # one column for each wrong answer to each question
+        answer = question.astype(np.int64) * (int(codes.max()) + 1) + codes[student, question]
+        answers, column, counts = np.unique(answer, return_inverse=True, return_counts=True)
+        column = column.ravel()
+
+        onehot = np.zeros((n, len(answers)), dtype=np.float32)
+        onehot[student, column] = 1
+
+        # chance that two wrong answers to each question, picked without replacement, are the same
+        column_question = question[np.unique(column, return_index=True)[1]]
+        num_wrong = wrong.sum(axis=0)
+        same = np.bincount(column_question, counts * (counts - 1.0), minlength=q)
+        pairs_wrong = num_wrong * (num_wrong - 1.0)
+        match_chance = np.divide(same, pairs_wrong, out=np.zeros(q), where=pairs_wrong > 0)
+
+        first, second, shared = [], [], []
+
+        for start in range(0, n, self.block_size):
+            block = onehot[start:start + self.block_size]
+            matches = block @ onehot[start:].T
+
+            # only pairs with a later student, so each pair is counted once
+            candidate = np.triu(matches >= self.min_shared, k=1)
+            i, j = np.nonzero(candidate)
+            first.append(i + start)
+            second.append(j + start)
+            shared.append(matches[i, j].astype(np.intp))
+
+        first, second, shared = np.concatenate(first), np.concatenate(second), np.concatenate(shared)
+
+        if len(first) == 0:
+            return []
+
+        both = (wrong[first] & wrong[second]).sum(axis=1)
+        expected = (wrong[first] * match_chance * wrong[second]).sum(axis=1)
+        chance = np.minimum(self.binomial_tail(shared, both, expected / both) * (n * (n - 1) / 2), 1)
+
+        flagged = chance <= self.max_chance
+
+        return list(zip(rows[first[flagged]].tolist(), rows[second[flagged]].tolist(), shared[flagged].tolist(),
+                        both[flagged].tolist(), expected[flagged].tolist(), chance[flagged].tolist()))
+
+    @staticmethod
+    def binomial_tail(counts, trials, probabilities):
+        """
+        Gets the chance of at least counts successes from binomial distributions.
+
+        Args:
+            counts (numpy.ndarray): Observed number of successes.
+            trials (numpy.ndarray): Number of trials.
+            probabilities (numpy.ndarray): Chance of success on each trial.
+
+        Returns:
+            Array of chances.
+        """
+        x = counts[:, None] + np.arange(int((trials - counts).max()) + 1)
+        n = trials[:, None]
+        p = probabilities[:, None]
+        log_factorial = np.array([math.lgamma(k + 1) for k in range(int(trials.max()) + 1)])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_terms = (log_factorial[n] - log_factorial[np.minimum(x, n)] - log_factorial[np.maximum(n - x, 0)] +
+                         x * np.log(p) + np.where(x < n, (n - x) * np.log1p(-p), 0))
+
+        return np.where(x <= n, np.exp(log_terms), 0).sum(axis=1)
+
+
+class Report:
+    """
+    Processes multiple ZipGrade scoresheets to create score report.
+
+    A report uses the scoresheets to calculate summary statistics and
+    gathers the content of the report into a ReportModel, which renderers
+    turn into Word, PDF, HTML, or JSON files.
+
+    Attributes:
+        matrix (ScoreMatrix): Columnar data for all students.
+        order (numpy.ndarray): Matrix rows sorted by student name.
+        scoresheets (list): List of all scoresheets for a quiz.
+    """
+
+    def __init__(self, matrix):
+        """
+        Constructor for a Report.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+        """
+        matrix.trim()
+        self.matrix = matrix
+
+        last_names = matrix.metadata['last_name']
+        first_names = matrix.metadata['first_name']
+        sort_by = lambda i: last_names[i] + " " + first_names[i]
+        self.order = np.array(sorted(range(matrix.num_rows), key=sort_by), dtype=np.intp)
+
+        self.scoresheets = [Scoresheet(matrix, i) for i in self.order]
+        self._statistics = {}
+        self._item_analysis = {}
+        self._scan_check = None
+        self._answer_similarity = None
+        self._names = None
+        self._models = {}
+
+        self.build_index()
+
+    def build_index(self):
+        """
+        Groups matrix rows by class, by key version, and by both.
+
+        Rows within each group stay in alphabetical order by student name. The
+        index is built once so that filtering scoresheets is a dictionary lookup.
+        """
+        class_names = self.matrix.metadata['class_name']
+        key_versions = self.matrix.metadata['key_version']
+
+        index = {}
+
+        for i in self.order.tolist():
+            c = class_names[i]
+            v = key_versions[i]
+
+            index.setdefault((c, None), []).append(i)
+            index.setdefault((None, v), []).append(i)
+            index.setdefault((c, v), []).append(i)
+
+        self.index = {k: np.array(rows, dtype=np.intp) for k, rows in index.items()}
+        self.index[(None, None)] = self.order
+
+        self._classes = sorted(c for c, v in index if v is None)
+        self._versions = sorted(v for c, v in index if c is None)
+
+    @property
+    def versions(self):
+        """list: List of all key versions for a quiz."""
+        return list(self._versions)
+
+    @property
+    def classes(self):
+        """list: All classes for a quiz."""
+        return list(self._classes)
+
+    @property
+    def raw_scores(self):
+        """numpy.ndarray: Raw scores for all students."""
+        return self.matrix.earned_points[self.order]
+
+    @property
+    def percentages(self):
+        """numpy.ndarray: Percentages for all students."""
+        return np.round(self.matrix.percent_correct[self.order]).astype(int)
+
+    def get_rows(self, class_name=None, key_version=None):
+        """
+        Gets matrix rows filtered by class and/or key version.
+
+        Args:
+            class_name (str): Name of class to get rows for, or None for all classes.
+            key_version (str): Version to get rows for, or None for all versions.
+
+        Returns:
+            Array of row indexes in alphabetical order by student name.
+        """
+        rows = self.index.get((class_name, key_version))
+
+        if rows is None:
+            rows = np.zeros(0, dtype=np.intp)
+
+        return rows
+
+    def get_sheets(self, class_name=None, key_version=None):
+        """
+        Gets a list of scoresheets filtered by class and/or key version.
+
+        Args:
+            class_name (str): Name of class to get scoresheets for, or None for all classes.
+            key_version (str): Version to get scoresheets for, or None for all versions.
+
+        Returns:
+            A filtered list of scoresheets.
+        """
+        return [Scoresheet(self.matrix, i) for i in self.get_rows(class_name, key_version).tolist()]
+
+    def get_sheets_by_class(self, class_name):
+        """
+        Gets a list of scoresheets filtered by class.
+
+        Args:
+            class_name (str): Name of class to get scoresheets for.
+
+        Returns:
+            A filtered list of scoresheets.
+        """
+        return self.get_sheets(class_name=class_name)
+
+    def get_sheets_by_version(self, key_version):
+        """
+        Gets a list of scoresheets filtered by key version.
+
+        Args:
+            key_version (str): Version to get scoresheets for.
+
+        Returns:
+            A filtered list of scoresheets.
+        """
+        return self.get_sheets(key_version=key_version)
+
+    def quartiles(self, num_list):
+        """
+        Gets quartiles for a set of values.
+
+        Args:
+            num_list (list): List of numbers to calculate quartiles for.
+        Returns:
+            Lower and upper quartiles for a set of numbers.
+        """
+        nums = np.sort(np.asarray(num_list, dtype=float))[np.newaxis]
+        n = nums.shape[1]
+
+        q1 = round(float(ScoreStatistics.median(nums[:, :n // 2])[0]), 2)
+        q3 = round(float(ScoreStatistics.median(nums[:, (n + 1) // 2:])[0]), 2)
+
+        return q1, q3
+
+    def get_statistics(self, class_name=None, key_version=None):
+        """
+        Gets summary statistics for the quiz or for a group of students.
+
+        Statistics are computed the first time they are requested and cached.
+
+        Args:
+            class_name (str): Name of class to get statistics for, or None for all classes.
+            key_version (str): Version to get statistics for, or None for all versions.
+
+        Returns:
+            ScoreStatistics for the students.
+        """
+        key = (class_name, key_version)
+
+        if key not in self._statistics:
+            rows = self.get_rows(class_name, key_version)
+
+            m = self.matrix
+            raw_scores = m.earned_points[rows]
+            percentages = np.round(m.percent_correct[rows])
+            self._statistics[key] = ScoreStatistics(raw_scores, percentages)
+
+        return self._statistics[key]
+
+    def get_item_analysis(self, key_version):
+        """
+        Gets item statistics for a key version.
+
+        Item analysis is computed the first time it is requested and cached.
+
+        Args:
+            key_version (str): Version to analyze.
+
+        Returns:
+            ItemAnalysis for the students who took the version.
+        """
+        if key_version not in self._item_analysis:
+            rows = self.get_rows(key_version=key_version)
+            self._item_analysis[key_version] = ItemAnalysis(self.matrix, rows)
+
+        return self._item_analysis[key_version]
+
+    def get_scan_check(self):
+        """
+        Gets possible scanning errors for every student.
+
+        The check is run the first time it is requested and cached.
+
+        Returns:
+            ScanCheck for the quiz.
+        """
+        if self._scan_check is None:
+            self._scan_check = ScanCheck(self.matrix)
+
+        return self._scan_check
+
+    def get_names(self):
+        """
+        Gets each student's name, last name first, in matrix row order.
+
+        The names are built the first time they are requested and cached.
+
+        Returns:
+            List of names.
+        """
+        if self._names is None:
+            metadata = self.matrix.metadata
+            self._names = [last + ", " + first for last, first in zip(metadata['last_name'],
+                                                                      metadata['first_name'])]
+
+        return self._names
+
+    def get_answer_similarity(self):
+        """
+        Gets the answer similarity engine for the quiz.
+
+        It is made the first time it is requested and cached, so its arrays
+        are computed once for every class.
+
+        Returns:
+            AnswerSimilarity for the quiz.
+        """
+        if self._answer_similarity is None:
+            self._answer_similarity = AnswerSimilarity(self.matrix)
+
+        return self._answer_similarity
+
+    def get_flagged(self, class_name):
+        """
+        Gets the flagged reports list rows for a class.
+
+        Args:
+            class_name (str): Name of class.
+
+        Returns:
+            List of class name, student name, flagged questions, and reasons
+            for each flagged student, in alphabetical order.
+        """
+        check = self.get_scan_check()
+        names = self.get_names()
+        rows = self.get_rows(class_name)
+
+        return [[class_name, names[row], check.questions(row), '; '.join(check.reasons(row, names))]
+                for row in rows[check.flagged[rows]].tolist()]
+
+    def get_similar_pairs(self, class_name):
+        """
+        Gets the similar answers list rows for a class.
+
+        Students are only compared with others who took the same key version.
+
+        Args:
+            class_name (str): Name of class.
+
+        Returns:
+            List of class name, both student names, matching wrong answers,
+            expected matches, and chance for each flagged pair, most
+            unlikely first.
+        """
+        names = self.get_names()
+        groups = [self.get_rows(class_name, version) for version in self.versions]
+
+        result = []
+
+        for first, second, shared, both, expected, chance in self.get_answer_similarity().pairs(groups):
+            odds = '1 in {:,.0f}'.format(1 / chance) if chance >= 1e-9 else 'under 1 in 1,000,000,000'
+            result.append([class_name, names[first], names[second], '{} of {}'.format(shared, both),
+                           '{:.1f}'.format(expected), odds])
+
+        return result
+
+    def get_cover_info(self):
+        """
+        Gets basic quiz information for the cover page.
+
+        Returns:
+            Groups of (label, value) pairs.
+        """
+        sheet_1 = self.scoresheets[0]
+
+        return [[("Quiz Name: ", sheet_1.quiz_name),
+                 ("Date Created: ", sheet_1.date_created),
+                 ("Date Exported: ", sheet_1.date_exported)]]
+
+    def get_class_list(self):
+        """
+        Gets a line for each class with its number of scores and mean.
+
+        Returns:
+            List of lines for the cover page.
+        """
+        lines = []
+
+        for class_name in self.classes:
+            stats = self.get_statistics(class_name)
+            lines.append(class_name + " (" + str(stats.num_scores) + " scores, mean " +
+                         percent_text(stats.mean_pct) + ")")
+
+        return lines
+
+    def get_summary_statistics(self):
+        """
+        Gets summary statistics for all students.
+
+        Statistics that need more scores than there are, such as the standard
+        deviation of a single score, are shown as a dash.
+
+        Returns:
+            Groups of (label, value) pairs.
+        """
+        sheet_1 = self.scoresheets[0]
+        possible_points = sheet_1.possible_points
+        stats = self.get_statistics()
+
+        both = lambda raw, pct: str(raw) + " / " + percent_text(pct) if np.isfinite(raw) else "\u2014"
+
+        return [[("Number of Scores: ", str(stats.num_scores)),
+                 ("Points Possible: ", str(possible_points))],
+                [("Mean (raw/percent): ", both(stats.mean_raw, stats.mean_pct)),
+                 ("Standard Deviation (raw/percent): ", both(stats.st_dev_raw, stats.st_dev_pct))],
+                [("Max (raw/percent): ", both(stats.max_raw, stats.max_pct)),
+                 ("Q3 (raw/percent): ", both(stats.q3_raw, stats.q3_pct)),
+                 ("Median (raw/percent): ", both(stats.median_raw, stats.median_pct)),
+                 ("Q1 (raw/percent): ", both(stats.q1_raw, stats.q1_pct)),
+                 ("Min (raw/percent): ", both(stats.min_raw, stats.min_pct))]]
+
+    def get_grade_counts(self, class_name=None):
+        """
+        Counts students in each grade range.
+
+        Args:
+            class_name (str): Name of class to count, or None for all classes.
+
+        Returns:
+            Tuple of the number of students in each of grade_ranges.
+        """
+        percentages = np.round(self.matrix.percent_correct[self.get_rows(class_name)]).astype(int)
+        indexes = np.clip(percentages // 5, 0, len(grade_ranges) - 1)
+
+        return tuple(np.bincount(indexes, minlength=len(grade_ranges)).tolist())
+
+    def get_difficulty(self, version):
+        """
+        Gets the most difficult and easiest questions for a key version.
+
+        With more than ten questions, the five most missed and three least
+        missed are listed (more if there are ties). Otherwise every question
+        is listed.
+
+        Args:
+            version (str): Key version to analyze.
+
+        Returns:
+            List of (title, lines) pairs. The title is empty when every
+            question is listed.
+        """
+        items = self.get_item_analysis(version)
+        percent_missed = items.percent_missed
+
+        difficulty = []
+        for j, k in enumerate(items.question_numbers.tolist()):
+            v = int(items.misses[j])
+            p = float(percent_missed[j])
+            difficulty.append((k, v, p))
+
+        sort_by = lambda k: k[1]
+        difficulty = sorted(difficulty, key=sort_by , reverse=True)
+
+        line = lambda d: "q=" + str(d[0]) + ", n=" + str(d[1]) + ", %=" + str(d[2])
+
+        if len(difficulty) > 10:
+            hard_threshold = difficulty[4][2]
+            easy_threshold = difficulty[-3][2]
+
+            return [("Most difficult Questions (at least " + str(hard_threshold) + "% missed)",
+                     [line(d) for d in difficulty if d[2] >= hard_threshold]),
+                    ("Easiest Questions (no more than " + str(easy_threshold) + "% missed)",
+                     [line(d) for d in difficulty if d[2] <= easy_threshold])]
+        else:
+            return [("", [line(d) for d in difficulty])]
+
+    def get_item_rows(self, items):
+        """
+        Gets the rows of an item statistics table.
+
+        Args:
+            items (ItemAnalysis): Item statistics to show.
+
+        Returns:
+            List of question, key, P, r, D, and responses text for each
+            question.
+        """
+        fmt = lambda x: 'n/a' if np.isnan(x) else format(x, '.2f')
+
+        rows = []
+
+        for j, q in enumerate(items.question_numbers.tolist()):
+            key = items.keys[j]
+            responses = []
+
+            for answer, count in items.distractors(j):
+                label = answer if len(answer) > 0 else 'blank'
+                if answer == key:
+                    label += '*'
+                responses.append(label + ': ' + str(count))
+
+            rows.append([str(q), key, fmt(items.p_values[j]), fmt(items.point_biserial[j]),
+                         fmt(items.discrimination[j]), ', '.join(responses)])
+
+        return rows
+
+    def get_class_rows(self, sheets):
+        """
+        Gets the rows of a class summary table.
+
+        Args:
+            sheets (list): Scoresheets for the class, in alphabetical order.
+
+        Returns:
+            List of name, raw score, possible points, and percent text for
+            each student.
+        """
+        rows = []
+
+        for s in sheets:
+            rounded_percent = round(float(s.percent_correct))
+            rows.append([s.last_name + ", " + s.first_name, s.earned_points,
+                         s.possible_points, str(rounded_percent) + "%"])
+
+        return rows
+
+    def get_student_report(self, sheet):
+        """
+        Gets the content of an individual score report.
+
+        The flagged questions come from the ScanCheck for the whole quiz.
+
+        Args:
+            sheet (Scoresheet): Scoresheet to report on.
+
+        Returns:
+            StudentReport for the scoresheet.
+        """
+        name = sheet.last_name + ", " + sheet.first_name
+        title = name + " (ID: " + sheet.zip_id + ")"
+
+        test_name = sheet.quiz_name
+        if len(sheet.key_version) > 0:
+            test_name += " (Key: " + sheet.key_version + ")"
+
+        lines = ["Class: " + sheet.class_name,
+                 "Test: " + test_name,
+                 "Score: " + sheet.percent_correct + "% " +
+                 "(" + sheet.earned_points + "/" + sheet.possible_points + ")",
+                 "Response Summary: Your Answer (Correct)"]
+
+        items = []
+
+        for r in sheet.responses:
+            q = str(r['question'])
+            a = str(r['answer'])
+            c = str(r['correct'])
+
+            if len(c) > 0:
+                item = q + ". " + a
+                if a != c:
+                    item += " (" + c + ")"
+
+                items.append(item)
+
+        flagged = self.get_scan_check().questions(sheet.row)
+
+        return StudentReport(name, sheet.zip_id, title, lines, items, flagged)
+
+    def get_model(self, sections=report_sections, cache=None, progress=None):
+        """
+        Gets the content of the report.
+
+        The model is computed the first time it is requested and cached.
+
+        Args:
+            sections (list): Names of the sections to include, from
+                report_sections.
+            cache (ReportCache): Results of the last run for this quiz. If
+                given, only students whose rows changed are recomputed.
+            progress (callable): Called while the model is computed. See
+                ReportModel.
+
+        Returns:
+            ReportModel for the report.
+        """
+        key = tuple(name for name in report_sections if name in sections)
+
+        if key not in self._models:
+            if cache is not None:
+                self._models[key] = cache.get_model(self, key, progress)
+            else:
+                self._models[key] = ReportModel(self, key, progress=progress)
+
+        return self._models[key]
+
+    def generate(self, jobs=1, progress=None, class_graphs=False, sections=report_sections, cache=None):
+        """
+        Creates a ZipGrade report as a Word document.
+
+        The report contains a cover page with basic quiz information and
+        summary statistics. Subsiquent pages include difficlty analysis, class
+        summaries, and individual score reports.
+
+        Args:
+            jobs (int): Number of worker processes to render classes with. With
+                more than one job, each class's summary and individual reports
+                are rendered in parallel and then merged into the report.
+            progress (callable): Called as progress(done, total, message) while
+                the content is computed (see ReportModel), and then after each
+                section and each individual report is rendered. Generation
+                stops if it raises an exception.
+            class_graphs (bool): Whether to put a grade distribution graph
+                after each class's scores.
+            sections (list): Names of the sections to include, from
+                report_sections. Other sections are not computed.
+            cache (ReportCache): Results of the last run for this quiz. If
+                given, only students whose rows changed are recomputed and
+                re-rendered, and the cache is saved for next time.
+
+        Returns:
+            The completed report.
+        """
+        model = self.get_model(sections, cache, progress)
+        fragments = cache.fragments if cache is not None else None
+        document = DocxRenderer(model, class_graphs, jobs, progress, fragments).document()
+
+        if cache is not None:
+            cache.save(model)
+
+        return document
+
+    def generate_class_documents(self, jobs=1):
+        """
+        Creates a separate Word document for each class.
+
+        Each document contains the class summary followed by the individual
+        reports for the class.
+
+        Args:
+            jobs (int): Number of worker processes to render classes with.
+
+        Returns:
+            Dictionary of class name to document.
+        """
+        return DocxRenderer(self.get_model(), jobs=jobs).class_documents()
+
+    def generate_student_pdfs(self, export_dir, jobs=1):
+        """
+        Saves a PDF score report for each student, for handing out.
+
+        Args:
+            export_dir (str): Directory to make the class folders in.
+            jobs (int): Number of worker processes.
+
+        Returns:
+            List of saved file paths.
+        """
+        return save_student_pdfs(self.get_model(), export_dir, jobs)
+
+
+flagged_help = ("Check that the student responses on flagged questions were scanned correctly. " +
+                "Possible reasons include answers not scanned due light marking, stray marks " +
+                "considered responses due to poor erasing, and marks not read due to glare or " +
+                "poor lighting during scanning. Questions inadvertently left blank by students " +
+                "will also be flagged.",
+                "Papers are also flagged for answers that are unlikely on a real paper: a long run " +
+                "of the same letter, exactly the same answers as another paper (which may be the " +
+                "same paper scanned twice), or a score far from everyone else's.",
+                "From within the ZipGrade app, you can 'Review Papers' and 'Edit Answers' to make " +
+                "corrections. Then redownload the CSV file and generate this report again.")
+"""tuple: Paragraphs explaining the flagged reports list."""
+
+no_flagged_message = "No quizzes have been flagged. It appears that all answers were scanned correctly."
+"""str: Shown in place of the flagged reports list when nothing is flagged."""
+
+similarity_help = ("These pairs of students in the same class, who took the same key version, gave " +
+                   "the same wrong answer to more questions than students working on their own would " +
+                   "be expected to. 'Same Wrong Answers' counts matching wrong answers out of the " +
+                   "questions both students got wrong, and 'Expected' is how many of those would match " +
+                   "by chance, based on how often each wrong answer was picked by the students in the " +
+                   "class with that key version. 'Chance' is how likely it is that any pair of those " +
+                   "students matched this closely by chance.",
+                   "Similar answers are not proof of copying. Students who studied together, sat " +
+                   "together when a question was explained, or share a misconception can also match. " +
+                   "Check seating plans and the papers themselves before drawing conclusions.")
+"""tuple: Paragraphs explaining the similar answers list."""
+
+no_similar_message = "No pairs of students have unusually similar answers."
+"""str: Shown in place of the similar answers list when no pairs are found."""
+
+similarity_columns = ['Class', 'Student', 'Student', 'Same Wrong Answers', 'Expected', 'Chance']
+"""list: Column headers of the similar answers list."""
+
+grade_ranges = [str(low) + '-' + str(low + 4) for low in range(0, 100, 5)] + ['100']
+"""list: Labels for the bars of the grade distribution graph."""
+
+graph_cache_size = 64
+"""int: Maximum number of rendered graphs to keep in memory."""
+
+_graph_cache = {}
+
+
+def grade_distribution_images(count_sets, image_format='png'):
+    """
+    Renders grade distribution bar graphs.
+
+    Graphs are cached by their counts, so identical distributions are only
+    rendered once. Graphs that aren't cached are all drawn on one figure,
+    which is released afterwards. The pyplot interface is not used, so no
+    figures are left open.
+
+    Args:
+        count_sets (list): Tuples of the number of students in each of
+            grade_ranges, one per graph.
+        image_format (str): Image format, such as 'png', or 'svg' or 'pdf'
+            for vector output.
+
+    Returns:
+        List of image file contents, one per set of counts.
+    """
+    missing = [counts for counts in dict.fromkeys(count_sets) if (counts, image_format) not in _graph_cache]
+
+    if missing:
+        import matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        y_pos = np.arange(len(grade_ranges))
+
+        with matplotlib.rc_context(matplotlib.rcParamsDefault):
+            figure = Figure()
+            FigureCanvasAgg(figure)
+
+            try:
+                for counts in missing:
+                    figure.clear()
+                    ax = figure.add_subplot()
+
+                    ax.bar(y_pos, counts, align='center', alpha=0.5)
+                    ax.set_xticks(y_pos)
+                    ax.set_xticklabels(grade_ranges, rotation='vertical')
+                    ax.set_xlabel('Percent correct', labelpad=12)
+                    ax.set_ylabel('Number of students')
+                    figure.tight_layout()
+
+                    stream = io.BytesIO()
+                    figure.savefig(stream, format=image_format)
+
+                    while len(_graph_cache) >= graph_cache_size:
+                        del _graph_cache[next(iter(_graph_cache))]
+                    _graph_cache[(counts, image_format)] = stream.getvalue()
+            finally:
+                figure.clear()
+
+    return [_graph_cache[(counts, image_format)] for counts in count_sets]
+
+
+StudentReport = collections.namedtuple('StudentReport', ['name', 'student_id', 'title', 'lines', 'items', 'flagged'])
+StudentReport.__doc__ = """
+Content of an individual score report.
+
+Attributes:
+    name (str): Student name, last name first.
+    student_id (str): ZipGrade student ID.
+    title (str): Student name and ID.
+    lines (list): Header lines with the class, test, and score.
+    items (list): A "question. answer (correct)" item for each keyed question.
+    flagged (str): Flagged questions, or "None".
+"""
+
+
+class ReportModel:
+    """
+    Content of a score report, computed once for all renderers.
+
+    The model holds only text and numbers, so it can be rendered in any
+    format, saved as JSON, or sent to worker processes. Only the selected
+    sections are computed; the attributes for other sections are empty.
+
+    Attributes:
+        sections (tuple): Names of the sections in the report, from
+            report_sections.
+        timings (dict): Seconds spent computing each section.
+        quiz_name (str): Name of the quiz.
+        cover_info (list): Groups of (label, value) pairs for the cover page.
+        class_list (list): Cover page line for each class.
+        summary_statistics (list): Groups of (label, value) pairs.
+        grade_counts (tuple): Number of students in each of grade_ranges.
+        versions (list): All key versions for the quiz.
+        difficulty (dict): List of (title, lines) pairs for each key version.
+        item_rows (dict): Item statistics table rows for each key version.
+        classes (list): All classes for the quiz.
+        class_rows (dict): Class summary table rows for each class.
+        class_grade_counts (dict): Grade counts for each class.
+        students (dict): List of StudentReport for each class.
+        fingerprints (dict): Row fingerprint of each student in students, if
+            the model was made with a ReportCache.
+        flagged (list): Class name, student name, flagged questions, and
+            reasons for each flagged report.
+        similar (list): Class name, student names, matching wrong answers,
+            expected matches, and chance for each pair of students with
+            similar answers.
+    """
+
+    def __init__(self, report, sections=report_sections, cache=None, progress=None):
+        """
+        Constructor for a ReportModel.
+
+        Args:
+            report (Report): Report to get the content of.
+            sections (list): Names of the sections to compute.
+            cache (ReportCache): Cache to reuse unchanged students from.
+            progress (callable): Called as progress(done, total, message)
+                after each section, and after each class in the sections
+                with a part for each class. Computing stops if it raises an
+                exception.
+        """
+        self.sections = tuple(name for name in report_sections if name in sections)
+        self.timings = {}
+
+        self.quiz_name = report.scoresheets[0].quiz_name
+        self.versions = report.versions
+        self.classes = report.classes
+
+        per_class = ('classes', 'individual', 'flagged', 'similarity')
+        total = sum(len(self.classes) if name in per_class else 1 for name in self.sections)
+        done = itertools.count(1)
+        step = (lambda message: progress(next(done), total, message)) if progress else (lambda message: None)
+
+        self.cover_info = []
+        self.class_list = []
+        self.summary_statistics = []
+        self.grade_counts = ()
+        self.difficulty = {}
+        self.item_rows = {}
+        self.class_rows = {}
+        self.class_grade_counts = {}
+        self.students = {}
+        self.fingerprints = {}
+        self.flagged = []
+        self.similar = []
+
+        start = time.perf_counter()
+
+        if 'cover' in self.sections:
+            self.cover_info = report.get_cover_info()
+            self.class_list = report.get_class_list()
+            start = self.lap('cover', start)
+            step('Cover page')
+
+        if 'statistics' in self.sections:
+            self.summary_statistics = report.get_summary_statistics()
+            start = self.lap('statistics', start)
+            step('Summary statistics')
+
+        if 'graph' in self.sections:
+            self.grade_counts = report.get_grade_counts()
+            start = self.lap('graph', start)
+            step('Grade distribution')
+
+        if 'difficulty' in self.sections:
+            for version in self.versions:
+                self.difficulty[version] = report.get_difficulty(version)
+                self.item_rows[version] = report.get_item_rows(report.get_item_analysis(version))
+            start = self.lap('difficulty', start)
+            step('Difficulty analysis')
+
+        if 'classes' in self.sections:
+            for class_name in self.classes:
+                sheets = report.get_sheets_by_class(class_name)
+                self.class_rows[class_name] = report.get_class_rows(sheets)
+                self.class_grade_counts[class_name] = report.get_grade_counts(class_name)
+                step('Class scores for ' + class_name)
+            start = self.lap('classes', start)
+
+        if 'individual' in self.sections:
+            for class_name in self.classes:
+                sheets = report.get_sheets_by_class(class_name)
+
+                if cache is None:
+                    self.students[class_name] = [report.get_student_report(s) for s in sheets]
+                else:
+                    self.fingerprints[class_name] = [cache.fingerprints[s.row] for s in sheets]
+                    self.students[class_name] = [cache.student_report(report, s) for s in sheets]
+                step('Individual reports for ' + class_name)
+            start = self.lap('individual', start)
+
+        if 'flagged' in self.sections:
+            for class_name in self.classes:
+                self.flagged += report.get_flagged(class_name)
+                step('Flagged reports for ' + class_name)
+            start = self.lap('flagged', start)
+
+        if 'similarity' in self.sections:
+            for class_name in self.classes:
+                self.similar += report.get_similar_pairs(class_name)
+                step('Similar answers for ' + class_name)
+            self.lap('similarity', start)
+
+    def lap(self, section, start):
+        """
+        Records the time spent computing a section.
+
+        Args:
+            section (str): Name of the section.
+            start (float): time.perf_counter() when the section was started.
+
+        Returns:
+            time.perf_counter() now, to start the next section.
+        """
+        now = time.perf_counter()
+        self.timings[section] = self.timings.get(section, 0) + now - start
+
+        return now
+
+    @property
+    def num_students(self):
+        """int: Number of individual reports."""
+        return sum(len(students) for students in self.students.values())
+
+    def for_class(self, class_name):
+        """
+        Gets a copy of the model with only one class's scores and reports.
+
+        The quiz-wide sections are shared with this model. This keeps the
+        data sent to a worker process small.
+
+        Args:
+            class_name (str): Name of the class.
+
+        Returns:
+            ReportModel for the class.
+        """
+        model = copy.copy(self)
+        model.classes = [class_name]
+        model.class_rows = {class_name: self.class_rows.get(class_name, [])}
+        model.class_grade_counts = {class_name: self.class_grade_counts.get(class_name, ())}
+        model.students = {class_name: self.students.get(class_name, [])}
+        model.fingerprints = {c: f for c, f in self.fingerprints.items() if c == class_name}
+        model.flagged = [f for f in self.flagged if f[0] == class_name]
+        model.similar = [p for p in self.similar if p[0] == class_name]
+
+        return model
+
+    def to_dict(self):
+        """
+        Gets the model as plain lists and dictionaries, for saving as JSON.
+
+        Returns:
+            Dictionary of the model's attributes.
+        """
+        result = dict(vars(self))
+        del result['timings']
+        del result['fingerprints']
+        result['grade_ranges'] = grade_ranges
+
+        if 'individual' in self.sections:
+            result['students'] = {c: [s._asdict() for s in students] for c, students in self.students.items()}
+        else:
+            # only computed for the flagged list
+            result['students'] = {}
+
+        return result
+
+
+class ReportCache:
+    """
+    Results of the last report for a quiz, kept on disk so that a re-exported
+    CSV file is only partly recomputed.
+
+    Each student's row is identified by its fingerprint (see
+    ScoreMatrix.fingerprints()). Individual reports and their rendered
+    WordprocessingML are reused for rows whose fingerprint is unchanged. If
+    no row changed at all, the whole model is reused.
+
+    Attributes:
+        path (str): File the cache is kept in, or None if there is nowhere
+            to keep it.
+        fingerprints (list): Fingerprint of each row of the matrix.
+        digest (str): Fingerprint of the whole matrix.
+        students (dict): StudentReport for each row fingerprint.
+        fragments (dict): Individual report XML for each row fingerprint.
+            Renderers add to it as they render.
+        hits (int): Number of individual reports reused.
+        misses (int): Number of individual reports recomputed.
+    """
+
+    def __init__(self, matrix, path=None):
+        """
+        Constructor for a ReportCache. The previous results are loaded if
+        there are any.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+            path (str): File to keep the cache in. Defaults to a file for the
+                quiz in the cache directory.
+        """
+        import hashlib
+
+        self.fingerprints = matrix.fingerprints()
+        self.digest = hashlib.blake2b(''.join(self.fingerprints).encode(), digest_size=16).hexdigest()
+
+        if path is None and matrix.num_rows > 0:
+            quiz = matrix.metadata['quiz_name'][0] + '\x1f' + matrix.metadata['date_created'][0]
+            name = hashlib.blake2b(quiz.encode(), digest_size=16).hexdigest() + '.pickle'
+
+            try:
+                path = os.path.join(get_cache_dir(), 'reports', name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            except OSError:
+                path = None
+
+        self.path = path
+        self.students = {}
+        self.fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+        self._last_digest = None
+        self._last_model = None
+
+        self.load()
+
+    def load(self):
+        """
+        Loads the results of the last run. A missing or unreadable cache is
+        treated as empty.
+        """
+        import pickle
+
+        if self.path is None:
+            return
+
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+
+            if data['format'] != report_cache_format:
+                return
+
+            students = {fp: StudentReport(*s) for fp, s in data['students'].items()}
+            fragments = data['fragments']
+            last_digest, last_model = data['digest'], data['model']
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, KeyError, TypeError, AttributeError):
+            return
+
+        self.students = students
+        self.fragments = fragments
+        self._last_digest = last_digest
+        self._last_model = last_model
+
+    def get_model(self, report, sections, progress=None):
+        """
+        Gets the content of the report, reusing as much of the last run as
+        possible.
+
+        Args:
+            report (Report): Report for the matrix the cache was made with.
+            sections (tuple): Names of the sections to compute.
+            progress (callable): Progress callback. See ReportModel.
+
+        Returns:
+            ReportModel for the report.
+        """
+        state = self._last_model
+
+        if self._last_digest == self.digest and state is not None and state['sections'] == sections:
+            model = ReportModel.__new__(ReportModel)
+            model.__dict__.update(state)
+            model.timings = {}
+            model.students = {c: [self.students[fp] for fp in fingerprints]
+                              for c, fingerprints in model.fingerprints.items()}
+            self.hits += model.num_students
+
+            return model
+
+        return ReportModel(report, sections, self, progress)
+
+    def student_report(self, report, sheet):
+        """
+        Gets the content of an individual score report, from the cache if the
+        student's row hasn't changed.
+
+        Args:
+            report (Report): Report for the matrix the cache was made with.
+            sheet (Scoresheet): Scoresheet to report on.
+
+        Returns:
+            StudentReport for the scoresheet.
+        """
+        fingerprint = self.fingerprints[sheet.row]
+        student = self.students.get(fingerprint)
+
+        if student is None:
+            student = self.students[fingerprint] = report.get_student_report(sheet)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return student
+
+    def save(self, model):
+        """
+        Saves the model and the current students' reports for next time.
+
+        Reports for students that are no longer in the export are dropped.
+        Failing to save the cache is not an error.
+
+        Args:
+            model (ReportModel): Model made with this cache.
+        """
+        import pickle
+
+        if self.path is None:
+            return
+
+        students = {}
+
+        for class_name, fingerprints in model.fingerprints.items():
+            for fingerprint, student in zip(fingerprints, model.students[class_name]):
+                students[fingerprint] = tuple(student)
+
+        state = dict(vars(model))
+        del state['students']
+        state['timings'] = {}
+
+        data = {'format': report_cache_format,
+                'digest': self.digest,
+                'model': state,
+                'students': students,
+                'fragments': {fp: x for fp, x in self.fragments.items() if fp in students}}
+
+        try:
+            save_file(self.path, functools.partial(pickle.dump, data, protocol=pickle.HIGHEST_PROTOCOL))
+            prune_cache_files(os.path.dirname(self.path), report_cache_max_files)
+        except OSError:
+            pass
+
+
+def prune_cache_files(directory, max_files):
+    """
+    Deletes the least recently used files in a cache directory.
+
+    Args:
+        directory (str): Directory to prune.
+        max_files (int): Number of files to keep.
+    """
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    for path in paths[max_files:]:
+        os.remove(path)
+
+
+class ResultStore:
+    """
+    Scores from many quizzes kept in a SQLite database.
+
+    Each quiz export is stored once when it is added, so results can be
+    looked up across a whole semester without reading the CSV files again.
+    Scoresheets are indexed by student ID, class, and quiz. A quiz is
+    identified by its name and creation date (see quiz_identity()). Adding it again replaces the
+    old scores of the classes in the new export, e.g. after papers were
+    corrected and re-exported, and keeps the other classes, so a quiz can be
+    added one class export at a time.
+
+    Attributes:
+        path (str): Path to the database file.
+        connection (sqlite3.Connection): Open connection to the database.
+    """
+
+    tables = """
+        CREATE TABLE IF NOT EXISTS quizzes (
+            id INTEGER PRIMARY KEY,
+            quiz_name TEXT NOT NULL,
+            date_created TEXT NOT NULL,
+            date_exported TEXT NOT NULL,
+            quiz_date TEXT NOT NULL,
+            header TEXT NOT NULL,
+            source TEXT NOT NULL,
+            UNIQUE (quiz_name, date_created)
+        );
+        CREATE TABLE IF NOT EXISTS sheets (
+            quiz_id INTEGER NOT NULL REFERENCES quizzes (id) ON DELETE CASCADE,
+            zip_id TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            external_id TEXT NOT NULL,
+            key_version TEXT NOT NULL,
+            earned_points REAL,
+            possible_points REAL,
+            percent_correct REAL,
+            metadata TEXT NOT NULL,
+            responses TEXT NOT NULL,
+            keys TEXT NOT NULL,
+            points TEXT NOT NULL,
+            marks TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sheets_zip_id ON sheets (zip_id);
+        CREATE INDEX IF NOT EXISTS sheets_class_name ON sheets (class_name, quiz_id);
+        CREATE INDEX IF NOT EXISTS sheets_quiz_id ON sheets (quiz_id);
+        CREATE INDEX IF NOT EXISTS quizzes_quiz_date ON quizzes (quiz_date);
+    """
+    """str: SQL that creates the tables and indexes."""
+
+    separator = '\x1f'
+    """str: Joins the per-question values of a scoresheet into one column."""
+
+    def __init__(self, path):
+        """
+        Constructor for a ResultStore. The database is created if it doesn't
+        exist.
+
+        Args:
+            path (str): Path to the database file.
+        """
+        import sqlite3
+
+        self.path = path
+
+        # reports for several files may be adding to the store at once
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(self.tables)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the database."""
+        self.connection.close()
+
+    def add_matrix(self, matrix, source=''):
+        """
+        Adds every scoresheet of a quiz to the store.
+
+        Scoresheets already stored for the same quiz and one of the classes
+        in the matrix are replaced. Other classes of the quiz are kept.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+            source (str): Where the data came from, e.g. the CSV file path.
+
+        Returns:
+            ID of the quiz in the store.
+        """
+        matrix.trim()
+
+        if matrix.num_rows == 0:
+            raise ValueError('No student data to store.')
+
+        metadata = matrix.metadata
+        sep = self.separator
+        quiz = quiz_identity(metadata['quiz_name'][0], metadata['date_created'][0])
+
+        columns = [metadata[attr] for attr in ('zip_id', 'class_name', 'first_name', 'last_name',
+                                               'external_id', 'key_version')]
+        columns += [matrix.earned_points.tolist(), matrix.possible_points.tolist(),
+                    matrix.percent_correct.tolist()]
+        columns.append([sep.join(values) for values in zip(*metadata.values())])
+        columns += [[sep.join(row) for row in getattr(matrix, name).tolist()] for name in ('responses', 'keys')]
+        columns.append([sep.join(map(repr, row)) for row in matrix.points.tolist()])
+        columns.append([sep.join(row) for row in matrix.marks.tolist()])
+
+        details = (metadata['date_exported'][0], zipgrade_date(metadata['date_created'][0]),
+                   json.dumps(matrix.schema.source_fields), source)
+        classes = sorted(set(metadata['class_name']))
+
+        with self.connection:
+            found = self.connection.execute('SELECT id FROM quizzes WHERE quiz_name = ? AND date_created = ?',
+                                            quiz).fetchone()
+
+            if found is None:
+                cursor = self.connection.execute(
+                    'INSERT INTO quizzes (quiz_name, date_created, date_exported, quiz_date, header, source) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', quiz + details)
+                quiz_id = cursor.lastrowid
+            else:
+                quiz_id = found['id']
+                self.connection.execute(
+                    'UPDATE quizzes SET date_exported = ?, quiz_date = ?, header = ?, source = ? WHERE id = ?',
+                    details + (quiz_id,))
+                self.connection.execute(
+                    'DELETE FROM sheets WHERE quiz_id = ? AND class_name IN (' + ', '.join(['?'] * len(classes)) + ')',
+                    [quiz_id] + classes)
+
+            self.connection.executemany(
+                'INSERT INTO sheets VALUES (' + ', '.join(['?'] * (len(columns) + 1)) + ')',
+                ((quiz_id,) + row for row in zip(*columns)))
+
+        return quiz_id
+
+    def quizzes(self):
+        """
+        Gets the quizzes in the store.
+
+        Returns:
+            List of rows with the id, quiz_name, date_created (as YYYY-MM-DD
+            HH:MM, see quiz_identity()), date_exported, quiz_date, and source
+            of each quiz, oldest first.
+        """
+        return self.connection.execute(
+            'SELECT id, quiz_name, date_created, date_exported, quiz_date, source FROM quizzes '
+            'ORDER BY quiz_date, id').fetchall()
+
+    def matrix(self, quiz_id):
+        """
+        Gets the data for a quiz without reading its CSV file.
+
+        Args:
+            quiz_id (int): ID of the quiz in the store.
+
+        Returns:
+            ScoreMatrix with every student in the quiz, ready to make a Report.
+
+        Raises:
+            KeyError: If there is no such quiz.
+        """
+        quiz = self.connection.execute('SELECT header FROM quizzes WHERE id = ?', (quiz_id,)).fetchone()
+
+        if quiz is None:
+            raise KeyError(quiz_id)
+
+        rows = self.connection.execute(
+            'SELECT metadata, responses, keys, points, marks FROM sheets WHERE quiz_id = ? ORDER BY rowid',
+            (quiz_id,)).fetchall()
+
+        sep = self.separator
+        result = ScoreMatrix(compile_schema(json.loads(quiz['header'])))
+        result.num_rows = len(rows)
+        shape = (len(rows), result.num_questions)
+
+        for attr, values in zip(result.metadata, zip(*(r['metadata'].split(sep) for r in rows))):
+            result.metadata[attr] = list(values)
+
+        arrays = {name: np.array([r[name].split(sep) if result.num_questions > 0 else [] for r in rows],
+                                 dtype=float if name == 'points' else str).reshape(shape)
+                  for name in ('responses', 'keys', 'points', 'marks')}
+        for name in ('earned_points', 'possible_points', 'percent_correct'):
+            arrays[name] = np.fromiter(map(to_float, result.metadata[name]), dtype=float, count=len(rows))
+
+        for name, array in arrays.items():
+            result._chunks[name] = [array]
+            setattr(result, name, array)
+
+        return result
+
+    def student_history(self, zip_id):
+        """
+        Gets one student's results on every quiz in the store.
+
+        Args:
+            zip_id (str): Student's ZipGrade ID.
+
+        Returns:
+            List of rows with the quiz_id, quiz_name, quiz_date, class_name,
+            first_name, last_name, earned_points, possible_points, and
+            percent_correct for each quiz, oldest first.
+        """
+        return self.connection.execute(
+            'SELECT q.id AS quiz_id, q.quiz_name, q.quiz_date, s.class_name, s.first_name, s.last_name, '
+            's.earned_points, s.possible_points, s.percent_correct '
+            'FROM sheets s JOIN quizzes q ON q.id = s.quiz_id '
+            'WHERE s.zip_id = ? ORDER BY q.quiz_date, q.id', (zip_id,)).fetchall()
+
+    def class_trends(self, class_name=None):
+        """
+        Gets each class's average, lowest, and highest percent on every quiz.
+
+        Args:
+            class_name (str): Class to get trends for, or None for all classes.
+
+        Returns:
+            List of rows with the class_name, quiz_id, quiz_name, quiz_date,
+            students, average, lowest, and highest for each class and quiz,
+            in class order and then oldest first.
+        """
+        where = 'WHERE s.class_name = ? ' if class_name is not None else ''
+        params = (class_name,) if class_name is not None else ()
+
+        return self.connection.execute(
+            'SELECT s.class_name, q.id AS quiz_id, q.quiz_name, q.quiz_date, COUNT(*) AS students, '
+            'AVG(s.percent_correct) AS average, MIN(s.percent_correct) AS lowest, '
+            'MAX(s.percent_correct) AS highest '
+            'FROM sheets s JOIN quizzes q ON q.id = s.quiz_id ' + where +
+            'GROUP BY s.class_name, q.id ORDER BY s.class_name, q.quiz_date, q.id', params).fetchall()
+
+
+class ProgressReport:
+    """
+    Each student's results across many quizzes.
+
+    Exports are added one at a time, and only what the report needs is kept:
+    each student's score on the quiz, and which of its questions they were
+    asked and missed, in compact arrays. A whole year of exports can be
+    added without holding more than one of them in memory.
+
+    Students are matched by ZipGrade ID; rows without one are skipped. A
+    quiz is identified by its name and creation date (see quiz_identity()),
+    so a quiz that was re-exported, from the phone app or the website, or
+    exported one class at a time, counts once; a student found in more than
+    one export of it is taken from the export with the latest DataExported
+    date and time. Questions are matched by quiz name
+    and number, so a question counts as missed more than once only when a
+    quiz with the same name was given again, e.g. as a retake. The name and
+    class shown for a student are from the most recently added export.
+
+    Attributes:
+        quizzes (list): Date (YYYY-MM-DD) and name of each quiz.
+        quiz_numbers (dict): Quiz number for each quiz_identity().
+        items (dict): Item number for each quiz name and question number.
+        item_names (list): Quiz name and question number of each item.
+        student_ids (dict): Student number for each ZipGrade ID.
+        zip_ids (list): ZipGrade ID of each student.
+        names (list): Name of each student.
+        class_names (list): Class of each student.
+    """
+
+    def __init__(self):
+        """
+        Constructor for a ProgressReport.
+        """
+        self.quizzes = []
+        self.quiz_numbers = {}
+        self.items = {}
+        self.item_names = []
+        self.student_ids = {}
+        self.zip_ids = []
+        self.names = []
+        self.class_names = []
+
+        # quiz number, export timestamp, students, scores, items, asked, and missed of each export added
+        self._exports = []
+
+    @property
+    def num_students(self):
+        """int: Number of students seen so far."""
+        return len(self.names)
+
+    def add_file(self, path):
+        """
+        Streams a ZipGrade CSV export into the report.
+
+        Args:
+            path (str): Path to CSV file.
+        """
+        with open(path, newline='') as f:
+            self.add_matrix(load_matrix(f))
+
+    def add_matrix(self, matrix):
+        """
+        Adds one quiz's results to the report.
+
+        Args:
+            matrix (ScoreMatrix): Quiz data for all students.
+        """
+        matrix.trim()
+
+        metadata = matrix.metadata
+        rows = [i for i, zip_id in enumerate(metadata['zip_id']) if zip_id != '']
+
+        if len(rows) == 0:
+            return
+
+        students = np.empty(len(rows), dtype=np.intp)
+
+        for n, i in enumerate(rows):
+            zip_id = metadata['zip_id'][i]
+            name = metadata['last_name'][i] + ", " + metadata['first_name'][i]
+            student = self.student_ids.get(zip_id)
+
+            if student is None:
+                student = self.student_ids[zip_id] = len(self.names)
+                self.zip_ids.append(zip_id)
+                self.names.append(name)
+                self.class_names.append(metadata['class_name'][i])
+            else:
+                self.names[student] = name
+                self.class_names[student] = metadata['class_name'][i]
+
+            students[n] = student
+
+        quiz_name = metadata['quiz_name'][0]
+        quiz_key = quiz_identity(quiz_name, metadata['date_created'][0])
+        quiz = self.quiz_numbers.get(quiz_key)
+
+        if quiz is None:
+            quiz = self.quiz_numbers[quiz_key] = len(self.quizzes)
+            self.quizzes.append((zipgrade_date(metadata['date_created'][0]), quiz_name))
+
+        items = np.empty(matrix.num_questions, dtype=np.intp)
+
+        for n, number in enumerate(matrix.question_numbers.tolist()):
+            item = self.items.get((quiz_name, number))
+
+            if item is None:
+                item = self.items[(quiz_name, number)] = len(self.item_names)
+                self.item_names.append((quiz_name, number))
+
+            items[n] = item
+
+        try:
+            exported = zipgrade_timestamp(metadata['date_exported'][0])
+        except (IndexError, KeyError):
+            exported = ''
+
+        rows = np.array(rows, dtype=np.intp)
+        keyed = matrix.keyed[rows]
+        scores = np.stack([matrix.percent_correct[rows], matrix.earned_points[rows],
+                           matrix.possible_points[rows]], axis=1).astype(np.float32)
+
+        self._exports.append((quiz, exported, students, scores, items, keyed, keyed & ~matrix.correct[rows]))
+
+    def get_results(self):
+        """
+        Picks the result to report for each student on each quiz.
+
+        A student found in more than one export of a quiz is taken from the
+        export with the latest DataExported date and time, or from the one
+        added last if those are the same.
+
+        Returns:
+            Arrays of the quiz number and student number of each result, and
+            its row in all the exports' rows put together, in the order the
+            exports were added.
+        """
+        exports = self._exports
+        counts = [len(e[2]) for e in exports]
+
+        export_order = sorted(range(len(exports)), key=lambda e: (exports[e][1], e))
+        rank = np.empty(len(exports), dtype=np.intp)
+        rank[export_order] = np.arange(len(exports))
+
+        export = np.repeat(np.arange(len(exports)), counts)
+        quizzes = np.repeat(np.array([e[0] for e in exports], dtype=np.intp), counts)
+        students = np.concatenate([e[2] for e in exports])
+
+        key = quizzes * self.num_students + students
+        order = np.lexsort((rank[export], key))
+        latest = order[np.r_[key[order][1:] != key[order][:-1], True]]
+
+        return quizzes[latest], students[latest], latest
+
+    def get_scores(self):
+        """
+        Gets every student's scores, grouped by student and in date order.
+
+        Returns:
+            Array of student numbers, an array of (quiz number, percent,
+            earned points, possible points) rows for all of them, and the
+            row where each student's scores start.
+        """
+        quiz_order = sorted(range(len(self.quizzes)), key=lambda q: (self.quizzes[q][0], q))
+        rank = np.empty(len(quiz_order), dtype=np.intp)
+        rank[quiz_order] = np.arange(len(quiz_order))
+
+        quizzes, students, rows = self.get_results()
+        scores = np.concatenate([e[3] for e in self._exports])[rows]
+
+        order = np.lexsort((rank[quizzes], students))
+        students = students[order]
+        table = np.column_stack([quizzes[order], scores[order]])
+
+        starts = np.flatnonzero(np.r_[True, students[1:] != students[:-1]])
+
+        return students[starts], table, starts
+
+    def get_trends(self, table, starts):
+        """
+        Gets each student's average percent and its trend.
+
+        The trend is the slope of the least squares line through a student's
+        percents, i.e. the average change from one quiz to the next, so one
+        bad day doesn't hide steady progress. Both are computed for all
+        students at once from running sums.
+
+        Args:
+            table (numpy.ndarray): Score rows from get_scores().
+            starts (numpy.ndarray): Row where each student's scores start.
+
+        Returns:
+            Arrays of each student's average and trend. The trend is NaN for
+            students with fewer than two quizzes.
+        """
+        counts = np.diff(np.r_[starts, len(table)])
+        group = np.repeat(np.arange(len(starts)), counts)
+
+        percents = table[:, 1].astype(float)
+        scored = ~np.isnan(percents)
+        percents = np.where(scored, percents, 0)
+        x = (np.arange(len(table)) - starts[group]) * scored
+
+        def total(values):
+            return np.bincount(group, values, minlength=len(starts))
+
+        n, sx, sp, sxx, sxp = [total(v) for v in (scored, x, percents, x * x, x * percents)]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = sp / n
+            trend = np.where(n >= 2, (n * sxp - sx * sp) / (n * sxx - sx * sx), np.nan)
+
+        return average, trend
+
+    def get_recurring(self):
+        """
+        Gets the questions each student missed on at least
+        recurring_miss_count quizzes with the same name.
+
+        Each (student, item) pair is coded as one number, so the times each
+        was asked and missed are counted with np.unique.
+
+        Returns:
+            Dictionary of student number to a list of (item number, times
+            missed, times asked), most often missed first.
+        """
+        quizzes, students, rows = self.get_results()
+        keep = np.zeros(sum(len(e[2]) for e in self._exports), dtype=bool)
+        keep[rows] = True
+
+        num_items = max(len(self.item_names), 1)
+        asked = [np.zeros(0, dtype=np.intp)]
+        missed = [np.zeros(0, dtype=np.intp)]
+        start = 0
+
+        for quiz, exported, export_students, scores, items, keyed, wrong in self._exports:
+            kept = keep[start:start + len(export_students)]
+            start += len(export_students)
+
+            codes = export_students[kept, None] * num_items + items
+            asked.append(codes[keyed[kept]])
+            missed.append(codes[wrong[kept]])
+
+        asked, asked_counts = np.unique(np.concatenate(asked), return_counts=True)
+        missed, missed_counts = np.unique(np.concatenate(missed), return_counts=True)
+
+        recurring = missed_counts >= recurring_miss_count
+        missed = missed[recurring]
+        missed_counts = missed_counts[recurring]
+        asked_counts = asked_counts[np.searchsorted(asked, missed)]
+
+        students, items = np.divmod(missed, num_items)
+        result = {}
+
+        for i in np.lexsort((items, -missed_counts, students)).tolist():
+            result.setdefault(int(students[i]), []).append((int(items[i]), int(missed_counts[i]),
+                                                            int(asked_counts[i])))
+
+        return result
+
+    def get_student_report(self, student, scores, average, trend, recurring):
+        """
+        Gets the content of one student's progress report.
+
+        Args:
+            student (int): Student number.
+            scores (list): The student's rows from get_scores().
+            average (float): The student's average percent.
+            trend (float): The student's trend, or NaN.
+            recurring (list): Item number, times missed, and times asked of
+                each question the student missed more than once.
+
+        Returns:
+            StudentReport with a line for each quiz and an item for each
+            question missed more than once.
+        """
+        zip_id = self.zip_ids[student]
+        name = self.names[student]
+
+        summary = "Quizzes: " + str(len(scores)) + "   Average: " + str(round(average, 1)) + "%"
+        if not np.isnan(trend):
+            summary += "   Trend: " + format(trend, '+.1f') + " points per quiz"
+
+        lines = ["Class: " + self.class_names[student], summary]
+
+        for quiz, percent, earned, possible in scores:
+            date, quiz_name = self.quizzes[int(quiz)]
+            lines.append(date + "  " + quiz_name + ": " + format(percent, 'g') + "% " +
+                         "(" + format(earned, 'g') + "/" + format(possible, 'g') + ")")
+
+        items = []
+
+        for item, missed, asked in recurring:
+            quiz_name, number = self.item_names[item]
+            items.append(quiz_name + " #" + str(number) + ". " + str(missed) + "/" + str(asked))
+
+        if len(items) > 0:
+            lines.append("Questions Missed More Than Once: Quiz #Question. Missed/Asked")
+        else:
+            lines.append("No question was missed more than once.")
+
+        return StudentReport(name, zip_id, name + " (ID: " + zip_id + ")", lines, items, "None")
+
+    def get_students(self):
+        """
+        Gets the content of every student's progress report.
+
+        Returns:
+            Dictionary of class name to a list of StudentReport, with classes
+            and students in alphabetical order.
+        """
+        if len(self.quizzes) == 0:
+            return {}
+
+        students, table, starts = self.get_scores()
+        average, trend = self.get_trends(table, starts)
+        recurring = self.get_recurring()
+
+        rows = np.split(table, starts[1:])
+        result = {}
+
+        for i in sorted(range(len(students)), key=lambda i: (self.class_names[students[i]], self.names[students[i]])):
+            student = int(students[i])
+            report = self.get_student_report(student, rows[i].tolist(), float(average[i]), float(trend[i]),
+                                             recurring.get(student, []))
+            result.setdefault(self.class_names[student], []).append(report)
+
+        return result
+
+    def generate(self):
+        """
+        Creates the progress report as a Word document.
+
+        The report starts with the list of quizzes, followed by each
+        class's students.
+
+        Returns:
+            The completed report.
+        """
+        from docx.shared import Inches
+
+        document = load_document(template_bytes())
+        document.add_heading('ZipGrade Progress Report', 0)
+
+        table = document.add_table(rows=1, cols=3)
+        table.style = 'Medium Shading 1'
+        table.cell(0, 1).width = Inches(4.0)
+
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'Date'
+        hdr_cells[1].text = 'Quiz'
+        hdr_cells[2].text = 'Students'
+
+        widths = cell_widths(table)
+        counts = np.bincount(self.get_results()[0], minlength=len(self.quizzes)).tolist()
+        rows = sorted((date, name, str(count)) for (date, name), count in zip(self.quizzes, counts))
+        append_xml(table._tbl, [table_row_xml(values, widths) for values in rows])
+
+        for class_name, students in self.get_students().items():
+            document.add_page_break()
+            document.add_heading('Progress for ' + (class_name or 'students without a class'), 1)
+            append_xml(document.element.body, [individual_report_xml(s) for s in students])
+
+        return document
+
+
+class DocxRenderer:
+    """
+    Renders a report model as an MS Word document.
+
+    Attributes:
+        model (ReportModel): Content of the report.
+        class_graphs (bool): Whether to put a grade distribution graph after
+            each class's scores.
+        jobs (int): Number of worker processes to render classes with.
+        progress (callable): Called as progress(done, total, message) while
+            the report is rendered. May raise to stop rendering.
+        fragments (dict): Individual report XML for each row fingerprint,
+            reused and added to while rendering, or None.
+        streams (list): What each placeholder in the document being built
+            by render() stands for, or None when the whole document is built.
+        timings (dict): Seconds spent rendering each section.
+        counters (dict): Number of paragraphs, runs, and tables in the last
+            document rendered by render().
+    """
+
+    extension = '.docx'
+
+    def __init__(self, model, class_graphs=False, jobs=1, progress=None, fragments=None):
+        """
+        Constructor for a DocxRenderer.
+
+        Args:
+            model (ReportModel): Content of the report.
+            class_graphs (bool): Whether to add a graph for each class.
+            jobs (int): Number of worker processes to render classes with.
+            progress (callable): Progress callback.
+            fragments (dict): Previously rendered individual reports. Only
+                used if the model has fingerprints.
+        """
+        self.model = model
+        self.class_graphs = class_graphs
+        self.jobs = jobs
+        self.progress = progress
+        self.fragments = fragments
+        self.streams = None
+
+        self.timings = {}
+        self.counters = {}
+
+        steps = {'classes': len(model.classes), 'individual': model.num_students}
+        self.progress_done = 0
+        self.progress_total = sum(steps.get(name, 1) for name in model.sections)
+        self.page_break_pending = False
+
+    def step(self, message, count=1):
+        """
+        Reports progress to the progress callback, if there is one.
+
+        Args:
+            message (str): Description of the work just completed.
+            count (int): Number of steps completed.
+        """
+        self.progress_done += count
+
+        if self.progress is not None:
+            self.progress(self.progress_done, self.progress_total, message)
+
+    def new_document(self):
+        """
+        Creates a blank document with the report's styling.
+
+        Returns:
+            A new docx.Document, copied from the template document.
+        """
+        return load_document(template_bytes())
+
+    def add_cover_page(self, document):
+        """
+        Puts cover page on the report.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        
+        document.add_heading('ZipGrade Score Report', 0)
+
+        for group in self.model.cover_info:
+            p = document.add_paragraph()
+            for i, (label, value) in enumerate(group):
+                p.add_run(label)
+                p.add_run(value + ("\n" if i + 1 < len(group) else ""))
+
+        p = document.add_paragraph()
+        p.add_run("Classes: " + "\n")
+        for line in self.model.class_list:
+            p.add_run("  - " + line + "\n")
+
+    def add_summary_statistics(self, document):
+        """
+        Puts summary statistics on document.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        document.add_heading('Summary Statistics', 1)
+
+        for group in self.model.summary_statistics:
+            p = document.add_paragraph()
+            for i, (label, value) in enumerate(group):
+                p.add_run(label)
+                p.add_run(value + ("\n" if i + 1 < len(group) else ""))
+
+    def add_grade_distribution_graph(self, document, class_name=None):
+        """
+        Puts bar graph of grade distribution on document.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+            class_name (str): Name of class to graph, or None for all classes.
+        """
+        if class_name is None:
+            counts = self.model.grade_counts
+        else:
+            counts = self.model.class_grade_counts[class_name]
+
+        image = grade_distribution_images([counts])[0]
+
+        if class_name is None:
+            document.add_heading('Grade Distribution', 1)
+        else:
+            document.add_heading('Grade distribution for ' + class_name, 2)
+
+        document.add_picture(io.BytesIO(image))
+
+    def add_difficulty_analysis(self, document, version):
+        """
+        Puts difficulty analysis on document.
+
+        The most difficult and easiest questions are listed first, followed by
+        a table of item statistics for every question.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+            version (str): Key version to show.
+        """
+        document.add_heading('Key version: ' + version, 2)
+
+        for title, lines in self.model.difficulty[version]:
+            paragraph = document.add_paragraph(title + "\n" if title else "")
+            for line in lines:
+                paragraph.add_run("\t" + line + "\n")
+
+        self.add_item_table(document, version)
+
+    def add_item_table(self, document, version):
+        """
+        Puts a table of item statistics on document.
+
+        For each question the table shows the correct answer, the proportion
+        answering correctly (P), the point-biserial correlation (r), the
+        upper/lower group discrimination index (D), and how many students gave
+        each answer. The correct answer is marked with an asterisk.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+            version (str): Key version to show.
+        """
+        table = document.add_table(rows=1, cols=6)
+        table.style = 'Medium Shading 1'
+
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'Q'
+        hdr_cells[1].text = 'Key'
+        hdr_cells[2].text = 'P'
+        hdr_cells[3].text = 'r'
+        hdr_cells[4].text = 'D'
+        hdr_cells[5].text = 'Responses'
+
+        for values in self.model.item_rows[version]:
+            row_cells = table.add_row().cells
+            for cell, value in zip(row_cells, values):
+                cell.text = value
+
+    def add_class_summary(self, document, class_name):
+        """
+        Generates class and puts it on document.
+
+        Class summary is an alphabetized list of students with raw scores and
+        percentages.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+            class_name (str): Name of class to show.
+        """
+        from docx.shared import Inches
+
+        if class_name != '':
+            document.add_heading('Class scores for ' + class_name, 1)
+        else:
+            document.add_heading('Class scores', 1)
+
+        table = document.add_table(rows=1, cols=4)
+        table.style = 'Medium Shading 1'
+        table.cell(0,0).width = Inches(3.0)
+
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'Name'
+        hdr_cells[1].text = 'Raw'
+        hdr_cells[2].text = 'Possible'
+        hdr_cells[3].text = 'Percent'
+
+        self.add_table_rows(table, self.model.class_rows[class_name])
+
+    def add_table_rows(self, table, rows):
+        """
+        Adds rows of text to a table, with the cell widths of its header row.
+
+        While render() builds the document, the rows are left out and a
+        placeholder is put in their place, so that they are streamed into
+        the saved document instead of being added to the document tree.
+
+        Args:
+            table (docx.table.Table): Table with a header row.
+            rows (list): Text of each cell of each row.
+        """
+        widths = cell_widths(table)
+
+        if self.streams is None:
+            append_xml(table._tbl, [table_row_xml(values, widths) for values in rows])
+        else:
+            self.add_placeholder(table._tbl, ('rows', rows, widths))
+
+    def add_placeholder(self, parent, stream):
+        """
+        Puts a placeholder paragraph on the document being built by render().
+
+        Args:
+            parent (lxml.etree._Element): Element to add the placeholder to.
+            stream (tuple): What to stream in its place, ('individual', class
+                name) or ('rows', rows, cell widths). See write_document_xml().
+        """
+        append_xml(parent, [stream_placeholder.format(len(self.streams))])
+        self.streams.append(stream)
+
+    def add_individual_report_separator(self, document, class_name):
+        """
+        Generates separator page to put before individual class reports.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        paragraph = document.add_paragraph()
+        paragraph.add_run('\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n')
+        heading = document.add_heading('Individual student reports for\n' + class_name, 1)
+        heading.alignment = 1
+
+    def add_individual_reports(self, document, class_name):
+        """
+        Generates the separator page and individual reports for a class.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+            class_name (str): Name of class to create reports for.
+        """
+        fragments = []
+        cached = self.fragments
+        fingerprints = self.model.fingerprints.get(class_name) if cached is not None else None
+
+        self.add_individual_report_separator(document, class_name)
+        document.add_page_break()
+
+        for i, s in enumerate(self.model.students[class_name]):
+            if fingerprints is None:
+                fragments.append(individual_report_xml(s))
+            else:
+                xml = cached.get(fingerprints[i])
+                if xml is None:
+                    xml = cached[fingerprints[i]] = individual_report_xml(s)
+                fragments.append(xml)
+
+            self.step('Individual report for ' + s.name)
+
+        append_xml(document.element.body, fragments)
+
+    def add_flagged_report_list(self, document):
+        """
+        Puts the list of flagged reports on document.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        flagged_quizzes = self.model.flagged
+
+        document.add_heading('Flagged Reports', 1)
+
+        if len(flagged_quizzes) > 0:
+            paragraph = document.add_paragraph()
+
+            for i, text in enumerate(flagged_help):
+                if i > 0:
+                    paragraph.add_run("\n\n")
+                paragraph.add_run(text)
+
+            paragraph.add_run("\n")
+            
+            table = document.add_table(rows=1, cols=4)
+            table.style = 'Medium Shading 1'
+
+            hdr_cells = table.rows[0].cells
+            hdr_cells[0].text = 'Class'
+            hdr_cells[1].text = 'Name'
+            hdr_cells[2].text = 'Flagged Questions'
+            hdr_cells[3].text = 'Reasons'
+
+            self.add_table_rows(table, flagged_quizzes)
+        else:
+            paragraph = document.add_paragraph()
+            paragraph.add_run(no_flagged_message)
+            paragraph.add_run("\n")
+
+    def add_similarity_list(self, document):
+        """
+        Puts the list of students with similar answers on document.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        similar = self.model.similar
+
+        document.add_heading('Similar Answers', 1)
+        paragraph = document.add_paragraph()
+
+        if len(similar) > 0:
+            for i, text in enumerate(similarity_help):
+                if i > 0:
+                    paragraph.add_run("\n\n")
+                paragraph.add_run(text)
+
+            paragraph.add_run("\n")
+
+            table = document.add_table(rows=1, cols=len(similarity_columns))
+            table.style = 'Medium Shading 1'
+
+            for cell, text in zip(table.rows[0].cells, similarity_columns):
+                cell.text = text
+
+            self.add_table_rows(table, similar)
+        else:
+            paragraph.add_run(no_similar_message)
+            paragraph.add_run("\n")
+
+    def render_classes(self, individual=True):
+        """
+        Renders class summaries and individual reports in worker processes.
+
+        Each class is rendered into its own pair of documents by render_class().
+
+        Args:
+            individual (bool): Whether to render the individual reports. If
+                not, only the class summaries are rendered.
+
+        Returns:
+            List of (class name, summary document, individual reports document)
+            in class order.
+        """
+        import concurrent.futures
+
+        results = []
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = []
+
+            for class_name in self.model.classes:
+                fragments = None
+
+                if self.fragments is not None:
+                    fingerprints = self.model.fingerprints.get(class_name, [])
+                    fragments = {fp: self.fragments[fp] for fp in fingerprints if fp in self.fragments}
+
+                futures.append(executor.submit(render_class, self.model.for_class(class_name), class_name,
+                                               fragments, individual))
+
+            try:
+                for class_name, future in zip(self.model.classes, futures):
+                    summary, reports, fragments = future.result()
+
+                    if fragments is not None:
+                        self.fragments.update(fragments)
+
+                    summary, reports = [d and load_document(d) for d in (summary, reports)]
+                    results.append((class_name, summary, reports))
+
+                    steps = ('classes' in self.model.sections) + \
+                        (len(self.model.students.get(class_name, [])) if reports else 0)
+                    self.step('Class reports for ' + class_name, steps)
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        return results
+
+    def class_documents(self):
+        """
+        Creates a separate Word document for each class.
+
+        Each document contains the class summary followed by the individual
+        reports for the class, so the model must include both sections.
+
+        Returns:
+            Dictionary of class name to document.
+        """
+        result = {}
+
+        if self.jobs > 1:
+            for class_name, summary, reports in self.render_classes():
+                summary.add_page_break()
+                append_document(summary, reports)
+                result[class_name] = summary
+        else:
+            for class_name in self.model.classes:
+                document = self.new_document()
+                self.add_class_summary(document, class_name)
+                document.add_page_break()
+                self.add_individual_reports(document, class_name)
+                result[class_name] = document
+
+        return result
+
+    def start_section(self, document):
+        """
+        Starts a new page if the last section ended one.
+
+        Args:
+            document (docx.Document): Document for which content is being added.
+        """
+        if self.page_break_pending:
+            document.add_page_break()
+            self.page_break_pending = False
+
+    def lap(self, name, start):
+        """
+        Records the time spent rendering a section.
+
+        Args:
+            name (str): Name of the section.
+            start (float): time.perf_counter() when the section was started.
+
+        Returns:
+            time.perf_counter() now, to start the next section.
+        """
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0) + now - start
+
+        return now
+
+    def end_section(self, name, start):
+        """
+        Records the time spent rendering a section. The next section starts
+        on a new page.
+
+        Args:
+            name (str): Name of the section.
+            start (float): time.perf_counter() when the section was started.
+
+        Returns:
+            time.perf_counter() now, to start the next section.
+        """
+        self.page_break_pending = True
+
+        return self.lap(name, start)
+
+    def document(self, placeholders=False):
+        """
+        Creates the report as a Word document.
+
+        Only the sections in the model are included. With more than one job,
+        each class's summary and individual reports are rendered in parallel
+        and then merged into the report, unless placeholders are used; then
+        render() renders the individual reports in parallel instead.
+
+        Args:
+            placeholders (bool): Whether to leave out the individual reports
+                and the rows of the large tables, putting a placeholder
+                paragraph in their place for render() to stream them into
+                (see add_placeholder()).
+
+        Returns:
+            The completed report.
+        """
+        sections = self.model.sections
+        classes = self.model.classes
+        document = self.new_document()
+        self.page_break_pending = False
+        self.streams = [] if placeholders else None
+
+        start = time.perf_counter()
+
+        # cover page
+        if 'cover' in sections:
+            self.add_cover_page(document)
+            self.step('Cover page')
+            start = self.end_section('cover', start)
+
+        # summary statistics
+        if 'statistics' in sections:
+            self.start_section(document)
+            self.add_summary_statistics(document)
+            self.step('Summary statistics')
+            start = self.end_section('statistics', start)
+
+            # the graph goes on the same page
+            self.page_break_pending = False
+
+        if 'graph' in sections:
+            self.start_section(document)
+            self.add_grade_distribution_graph(document)
+            self.step('Grade distribution')
+            start = self.end_section('graph', start)
+
+        if 'statistics' in sections:
+            self.page_break_pending = True
+
+        # difficulty analysis
+        if 'difficulty' in sections:
+            self.start_section(document)
+            document.add_heading('Difficulty Analysis', 1)
+            for version in self.model.versions:
+                self.add_difficulty_analysis(document, version)
+            self.step('Difficulty analysis')
+            start = self.end_section('difficulty', start)
+
+        if self.jobs > 1 and len(classes) > 1 and not placeholders:
+            rendered = self.render_classes()
+            start = self.lap('classes' if 'classes' in sections else 'individual', start)
+        else:
+            rendered = None
+
+        # class reports
+        if 'classes' in sections:
+            if self.class_graphs:
+                # render every class's graph in one batch
+                grade_distribution_images([self.model.class_grade_counts[c] for c in classes])
+
+            for i, class_name in enumerate(classes):
+                self.start_section(document)
+
+                if rendered:
+                    append_document(document, rendered[i][1])
+                else:
+                    self.add_class_summary(document, class_name)
+                    self.step('Class scores for ' + class_name)
+
+                if self.class_graphs:
+                    self.add_grade_distribution_graph(document, class_name)
+                self.page_break_pending = True
+            start = self.end_section('classes', start)
+
+        # individual reports
+        if 'individual' in sections:
+            for i, class_name in enumerate(classes):
+                self.start_section(document)
+
+                if placeholders:
+                    self.add_individual_report_separator(document, class_name)
+                    document.add_page_break()
+                    self.add_placeholder(document.element.body, ('individual', class_name))
+                elif rendered:
+                    append_document(document, rendered[i][2])
+                else:
+                    self.add_individual_reports(document, class_name)
+                self.page_break_pending = True
+            start = self.end_section('individual', start)
+
+        # flagged reports
+        if 'flagged' in sections:
+            self.start_section(document)
+            self.add_flagged_report_list(document)
+            self.step('Flagged reports')
+            start = self.end_section('flagged', start)
+
+        # students with similar answers
+        if 'similarity' in sections:
+            self.start_section(document)
+            self.add_similarity_list(document)
+            self.step('Similar answers')
+            self.end_section('similarity', start)
+
+        # all done
+        return document
+
+    def render(self, f):
+        """
+        Saves the report as a Word document.
+
+        The individual reports and the rows of the class score, flagged, and
+        similarity tables, which are most of a large report, are never added
+        to the document tree. The rest of the report is built with
+        placeholders and saved first, and the package is then rewritten with
+        them streamed into word/document.xml one at a time, so memory doesn't
+        grow with the number of students. With more
+        than one job, the individual reports are rendered in worker
+        processes (see individual_reports()).
+
+        Args:
+            f: Path or binary file object to save to.
+        """
+        import zipfile
+
+        document = self.document(placeholders=True)
+        body = document.element.body
+
+        for name, tag in (('paragraphs', 'w:p'), ('runs', 'w:r'), ('tables', 'w:tbl')):
+            self.counters[name] = int(body.xpath('count(.//' + tag + ')'))
+
+        for stream in self.streams:
+            # a placeholder becomes one paragraph of two runs per student, or a paragraph and run per cell
+            if stream[0] == 'individual':
+                paragraphs = len(self.model.students[stream[1]])
+                runs = 2 * paragraphs
+            else:
+                paragraphs = runs = sum(len(values) for values in stream[1])
+
+            self.counters['paragraphs'] += paragraphs - 1
+            self.counters['runs'] += runs
+
+        start = time.perf_counter()
+        skeleton = document_bytes(document)
+        del document, body
+
+        with zipfile.ZipFile(io.BytesIO(skeleton)) as source, \
+                zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as package:
+            for info in source.infolist():
+                if info.filename == 'word/document.xml':
+                    with package.open(info.filename, 'w') as part:
+                        self.write_document_xml(part, source.read(info).decode('utf8'))
+                else:
+                    package.writestr(info, source.read(info))
+
+        self.streams = None
+        self.lap('save', start)
+
+    def write_document_xml(self, part, xml):
+        """
+        Writes the document part, replacing each placeholder with the
+        individual reports or table rows it stands for.
+
+        Args:
+            part (file): Binary file object to write to.
+            xml (str): Document part with placeholders, from document().
+        """
+        pieces = stream_placeholder_pattern.split(xml)
+        part.write(pieces[0].encode('utf8'))
+
+        # pieces alternate between a placeholder's number and the XML after it
+        streams = [self.streams[int(n)] for n in pieces[1::2]]
+        reports = self.individual_reports([stream[1] for stream in streams if stream[0] == 'individual'])
+
+        for stream, after in zip(streams, pieces[2::2]):
+            if stream[0] == 'individual':
+                for s in self.model.students[stream[1]]:
+                    part.write(next(reports).encode('utf8'))
+                    self.step('Individual report for ' + s.name)
+            else:
+                widths = stream[2]
+                for values in stream[1]:
+                    part.write(table_row_xml(values, widths).encode('utf8'))
+
+            part.write(after.encode('utf8'))
+
+    def individual_reports(self, class_names):
+        """
+        Generates the individual report XML of every student in some classes.
+
+        Students are taken in chunks of individual_chunk_size. Reports found
+        in the fragments cache are reused, and the rest of each chunk is
+        rendered by individual_reports_xml(), in worker processes if there is
+        more than one job and more than one chunk. Only a few chunks are
+        rendered ahead of the one being written, so finished reports don't
+        pile up in memory.
+
+        Args:
+            class_names (list): Names of the classes, in the order to render them.
+
+        Yields:
+            The XML of each student's report, in class order.
+        """
+        import concurrent.futures
+
+        cached = self.fragments
+        chunks = []
+
+        for class_name in class_names:
+            students = self.model.students[class_name]
+            fingerprints = self.model.fingerprints.get(class_name) if cached is not None else None
+
+            for i in range(0, len(students), individual_chunk_size):
+                prints = fingerprints[i:i + individual_chunk_size] if fingerprints is not None else None
+                chunks.append((students[i:i + individual_chunk_size], prints))
+
+        def split(chunk):
+            # the chunk's cached reports, with None for each one still to render
+            students, prints = chunk
+            if prints is None:
+                return [None] * len(students), students
+            found = [cached.get(fp) for fp in prints]
+            return found, [s for s, fragment in zip(students, found) if fragment is None]
+
+        def merge(chunk, found, rendered):
+            rendered = iter(rendered)
+            for j, fragment in enumerate(found):
+                if fragment is None:
+                    fragment = next(rendered)
+                    if chunk[1] is not None:
+                        cached[chunk[1][j]] = fragment
+                yield fragment
+
+        if self.jobs <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                found, missing = split(chunk)
+                yield from merge(chunk, found, individual_reports_xml(missing))
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            pending = collections.deque()
+
+            try:
+                for chunk in chunks:
+                    found, missing = split(chunk)
+                    pending.append((chunk, found, executor.submit(individual_reports_xml, missing)))
+
+                    if len(pending) > 2 * self.jobs:
+                        chunk, found, future = pending.popleft()
+                        yield from merge(chunk, found, future.result())
+
+                while pending:
+                    chunk, found, future = pending.popleft()
+                    yield from merge(chunk, found, future.result())
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+
+def individual_reports_xml(students):
+    """
+    Generates the individual report XML of each of a list of students. This
+    can run in a worker process.
+
+    Args:
+        students (list): StudentReport for each student.
+
+    Returns:
+        List of the XML of each student's report.
+    """
+    return [individual_report_xml(s) for s in students]
+
+
+def render_class(model, class_name, fragments=None, individual=True):
+    """
+    Renders the class summary and individual reports for one class.
+
+    This runs in a worker process, so the documents are returned as bytes.
+
+    Args:
+        model (ReportModel): Content of the report.
+        class_name (str): Name of the class.
+        fragments (dict): Previously rendered individual reports for the
+            class, or None.
+        individual (bool): Whether to render the individual reports.
+
+    Returns:
+        Summary document and individual reports document, or None for
+        sections that aren't in the model, and the class's rendered
+        individual reports if fragments was given.
+    """
+    renderer = DocxRenderer(model, fragments=fragments)
+    summary = None
+    reports = None
+
+    if 'classes' in model.sections:
+        document = renderer.new_document()
+        renderer.add_class_summary(document, class_name)
+        summary = document_bytes(document)
+
+    if individual and 'individual' in model.sections:
+        document = renderer.new_document()
+        renderer.add_individual_reports(document, class_name)
+        reports = document_bytes(document)
+
+    return summary, reports, renderer.fragments
+
+
+def document_bytes(document):
+    """
+    Saves a document to memory.
+
+    Args:
+        document (docx.Document): Document to save.
+
+    Returns:
+        The .docx file contents.
+    """
+    stream = io.BytesIO()
+    document.save(stream)
+
+    return stream.getvalue()
+
+
+def load_document(data):
+    """
+    Opens a document saved with document_bytes().
+
+    Args:
+        data (bytes): The .docx file contents.
+
+    Returns:
+        The docx.Document.
+    """
+    import docx
+
+    return docx.Document(io.BytesIO(data))
+
+
+def append_document(document, other):
+    """
+    Moves the body content of one document to the end of another.
+
+    Both documents should come from Report.new_document() so they share
+    styles. Pictures are not supported.
+
+    Args:
+        document (docx.Document): Document to add content to.
+        other (docx.Document): Document whose content is moved.
+    """
+    from docx.oxml.ns import qn
+
+    body = document.element.body
+    end = body.sectPr
+
+    for element in list(other.element.body):
+        if element.tag == qn('w:sectPr'):
+            continue
+
+        if end is not None:
+            end.addprevious(element)
+        else:
+            body.append(element)
+
+
+w_namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+"""str: WordprocessingML namespace used by the XML fragments below."""
+
+student_report_style = 'StudentReport'
+"""str: Paragraph style for individual reports, defined in the template document."""
+
+response_tab_stops = (0.2, 0.9, 1.6, 2.3, 3.0, 3.7, 4.4, 5.1, 5.9, 6.6)
+"""tuple: Positions of the response columns in individual reports, in inches, for Word and PDF."""
+
+stream_placeholder = '<w:p><w:pPr><w:pStyle w:val="StreamedContent{}"/></w:pPr></w:p>'
+"""str: Paragraph marking where individual reports or table rows are streamed in, formatted with its number."""
+
+stream_placeholder_pattern = re.compile(r'<w:p><w:pPr><w:pStyle w:val="StreamedContent(\d+)"/></w:pPr></w:p>')
+"""re.Pattern: Finds the placeholders in a saved document part, capturing their numbers."""
+
+individual_chunk_size = 500
+"""int: Number of students whose individual reports are rendered by each worker task."""
+
+individual_report_start = ('<w:p><w:pPr><w:pStyle w:val="' + student_report_style + '"/></w:pPr>'
+                           '<w:r><w:rPr><w:b/><w:sz w:val="22"/></w:rPr>')
+"""str: Start of an individual report paragraph, up to the 11pt bold name run."""
+
+
+@functools.lru_cache(maxsize=1)
+def template_bytes():
+    """
+    Creates the template every report document is copied from.
+
+    The template has the report's fonts and margins, and the StudentReport
+    paragraph style (9pt, kept on one page, with tab stops for ten responses
+    per line). It is built once per process.
+
+    Returns:
+        The template's .docx file contents.
+    """
+    import docx
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.shared import Inches
+    from docx.shared import Pt
+
+    document = docx.Document()
+
+    # styling
+    style = document.styles['Normal']
+    font = style.font
+    font.size = Pt(11)
+
+    sections = document.sections
+    for section in sections:
+        section.top_margin = Inches(0.6)
+        section.bottom_margin = Inches(0.6)
+        section.left_margin = Inches(0.6)
+        section.right_margin = Inches(0.6)
+
+    style = document.styles.add_style(student_report_style, WD_STYLE_TYPE.PARAGRAPH)
+    style.base_style = document.styles['Normal']
+    style.font.size = Pt(9)
+    style.paragraph_format.keep_together = True
+
+    tab_stops = style.paragraph_format.tab_stops
+    for position in response_tab_stops:
+        tab_stops.add_tab_stop(Inches(position))
+
+    return document_bytes(document)
+
+
+@functools.lru_cache(maxsize=1)
+def student_docx_template():
+    """
+    Splits the template into the parts shared by every student's Word file
+    and the document part, for render_student_files().
+
+    Only word/document.xml differs between students. The other parts,
+    mostly the large style definitions, are compressed once here, and each
+    student's file is the shared parts with its own document part appended.
+    The document part is split where a student's report goes, before the
+    section properties. Built once per process.
+
+    Returns:
+        The template's .docx file contents without word/document.xml, and
+        the document part's XML before and after the body content.
+    """
+    import zipfile
+
+    shared = io.BytesIO()
+
+    with zipfile.ZipFile(io.BytesIO(template_bytes())) as template, \
+            zipfile.ZipFile(shared, 'w', zipfile.ZIP_DEFLATED) as package:
+        for info in template.infolist():
+            if info.filename == 'word/document.xml':
+                document_xml = template.read(info).decode('utf8')
+            else:
+                package.writestr(info, template.read(info))
+
+    body_end = document_xml.rindex('<w:sectPr')
+
+    return shared.getvalue(), document_xml[:body_end], document_xml[body_end:]
+
+
+def text_xml(text):
+    """
+    Creates a w:t element for a fragment of WordprocessingML.
+
+    Args:
+        text (str): Text of the element.
+
+    Returns:
+        The element's XML.
+    """
+    return '<w:t xml:space="preserve">' + html.escape(text, quote=False) + '</w:t>'
+
+
+def cell_widths(table):
+    """
+    Gets the width of each column of a table, from its header row, for
+    table_row_xml().
+
+    Args:
+        table (docx.table.Table): Table with a header row.
+
+    Returns:
+        List of the width of each cell in twentieths of a point.
+    """
+    return [(cell.width or column.width).twips for cell, column in zip(table.rows[0].cells, table.columns)]
+
+
+def table_row_xml(values, widths):
+    """
+    Creates a table row for a fragment of WordprocessingML.
+
+    Args:
+        values (list): Text of each cell.
+        widths (list): Width of each cell in twentieths of a point, e.g.
+            from cell_widths().
+
+    Returns:
+        The row's XML.
+    """
+    cell = '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{}"/></w:tcPr><w:p><w:r>'
+
+    return '<w:tr>' + ''.join(cell.format(w) + text_xml(v) + '</w:r></w:p></w:tc>'
+                              for v, w in zip(values, widths)) + '</w:tr>'
+
+
+def individual_report_xml(student):
+    """
+    Generates the WordprocessingML for an individual score report.
+
+    Writing the paragraph as text is much faster than building it with
+    python-docx, which matters when there are thousands of students. The
+    paragraph uses the template's StudentReport style, and the header
+    lines and responses share one run.
+
+    Args:
+        student (StudentReport): Content of the report.
+
+    Returns:
+        Paragraph XML.
+    """
+    parts = [individual_report_start, text_xml(student.title), '<w:br/></w:r><w:r>']
+
+    for line in student.lines:
+        parts += [text_xml(line), '<w:br/>']
+
+    for i, item in enumerate(student.items):
+        parts.append('<w:tab/>' + text_xml(item))
+
+        if (i + 1) % 10 == 0:
+            parts.append('<w:br/>')
+
+    parts.append('</w:r></w:p>')
+
+    return ''.join(parts)
+
+
+def append_xml(parent, fragments):
+    """
+    Parses WordprocessingML fragments and adds them to an element.
+
+    All fragments are parsed together, so appending many at once is much
+    faster than one at a time. Content added to a document body is kept
+    before its section properties.
+
+    Args:
+        parent (lxml.etree._Element): Element to add content to, such as a
+            document body or a table.
+        fragments (list): XML strings for the elements to add.
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import qn
+
+    container = parse_xml('<w:body xmlns:w="' + w_namespace + '">' + ''.join(fragments) + '</w:body>')
+    end = parent.find(qn('w:sectPr'))
+
+    for element in list(container):
+        if end is not None:
+            end.addprevious(element)
+        else:
+            parent.append(element)
+
+
+def save_document(document, path):
+    """
+    Saves a document without leaving a partial file behind.
+
+    Args:
+        document (docx.Document): Document to save.
+        path (str): Where to save it.
+    """
+    save_file(path, document.save)
+
+
+def save_file(path, write):
+    """
+    Saves a file without leaving a partial file behind.
+
+    The file is written to a temporary file in the same directory and then
+    renamed, so path is either the complete file or untouched. The file gets
+    the permissions of the file it replaces, or the usual permissions for a
+    new file, rather than the private ones of a temporary file.
+
+    Args:
+        path (str): Where to save it.
+        write (callable): Called with a binary file object to write to.
+    """
+    import tempfile
+
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~get_umask()
+
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def get_umask():
+    """
+    Gets the process's file mode creation mask.
+
+    The mask can only be read by setting it, so it is read once and cached.
+
+    Returns:
+        The umask, e.g. 0o022.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return umask
+
+
+def student_report_height(items):
+    """
+    Gets the height of an individual report drawn by draw_student_report().
+
+    Args:
+        items (list): Response items in the report.
+
+    Returns:
+        Height in points.
+    """
+    return 14 + 11 * (4 + (len(items) + 9) // 10) + 10
+
+
+def draw_student_report(canvas, x, y, title, lines, items):
+    """
+    Draws an individual score report on a reportlab canvas.
+
+    Reports are drawn directly rather than laid out with platypus, which is
+    much faster when there are thousands of them.
+
+    Args:
+        canvas (reportlab.pdfgen.canvas.Canvas): Canvas to draw on.
+        x (float): Left edge of the report.
+        y (float): Top edge of the report.
+        title (str): Student name and ID.
+        lines (list): Header lines.
+        items (list): Response items, ten per line.
+    """
+    from reportlab.lib.units import inch
+
+    text = canvas.beginText()
+
+    y -= 11
+    text.setFont('Helvetica-Bold', 11)
+    text.setTextOrigin(x, y)
+    text.textOut(title)
+    y -= 3
+
+    text.setFont('Helvetica', 9)
+    for line in lines:
+        y -= 11
+        text.setTextOrigin(x, y)
+        text.textOut(line)
+
+    for i, item in enumerate(items):
+        if i % 10 == 0:
+            y -= 11
+        text.setTextOrigin(x + response_tab_stops[i % 10] * inch, y)
+        text.textOut(item)
+
+    canvas.drawText(text)
+
+
+student_chunk_size = 100
+"""int: Number of students whose files are rendered by each worker task."""
+
+
+def save_student_files(model, export_dir, formats=('pdf',), jobs=1, zip_path=None):
+    """
+    Saves a score report file for each student, for handing out or
+    uploading.
+
+    Files are saved in a folder for each class and named after the student
+    and their ZipGrade ID (see student_file_names()). Students are rendered in chunks of
+    student_chunk_size, in parallel worker processes if there is more than
+    one job, and the files are written by a StudentFileWriter so that
+    rendering isn't held up by the disk.
+
+    Args:
+        model (ReportModel): Content of the report.
+        export_dir (str): Directory to make the class folders in.
+        formats (list): File formats to save for each student, 'pdf' and/or
+            'docx'.
+        jobs (int): Number of worker processes.
+        zip_path (str): Path to also save every file in one zip file, or None.
+
+    Returns:
+        List of saved file paths, not including the zip file.
+    """
+    import concurrent.futures
+
+    names = student_file_names(model)
+    chunks = [(model.quiz_name, names[class_name][i:i + student_chunk_size], students[i:i + student_chunk_size],
+               formats)
+              for class_name, students in model.students.items()
+              for i in range(0, len(students), student_chunk_size)]
+
+    with StudentFileWriter(export_dir, zip_path) as writer:
+        if jobs > 1 and len(chunks) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                # a few chunks ahead of the writer, so finished files don't pile up in memory
+                pending = collections.deque()
+
+                for chunk in chunks:
+                    pending.append(executor.submit(render_student_files, *chunk))
+
+                    if len(pending) > 2 * jobs:
+                        writer.put_all(pending.popleft().result())
+
+                while pending:
+                    writer.put_all(pending.popleft().result())
+        else:
+            for chunk in chunks:
+                writer.put_all(render_student_files(*chunk))
+
+    return writer.paths
+
+
+def save_student_pdfs(model, export_dir, jobs=1):
+    """
+    Saves a PDF score report for each student, for handing out.
+
+    Args:
+        model (ReportModel): Content of the report.
+        export_dir (str): Directory to make the class folders in.
+        jobs (int): Number of worker processes.
+
+    Returns:
+        List of saved file paths.
+    """
+    return save_student_files(model, export_dir, ('pdf',), jobs)
+
+
+def student_file_names(model):
+    """
+    Names the file of each student's score report.
+
+    A file is named after the student and their ZipGrade ID, in a folder for
+    their class. A name that is already taken, e.g. by a student with the
+    same name and no ID, or by one that only differs in case, gets the
+    student's number in their class added, so no file is overwritten.
+
+    Args:
+        model (ReportModel): Content of the report.
+
+    Returns:
+        Dictionary of class name to the file name of each student, in the
+        same order as model.students. File names have no extension and are
+        relative to the export directory.
+    """
+    used = set()
+    result = {}
+
+    for class_name, students in model.students.items():
+        class_dir = safe_filename(class_name) or 'Class'
+        names = result[class_name] = []
+
+        for number, s in enumerate(students, 1):
+            name = class_dir + '/' + safe_filename(s.name + "_" + s.student_id)
+            candidates = itertools.chain([name, name + "_" + str(number)],
+                                         (name + "_" + str(number) + "_" + str(n) for n in itertools.count(2)))
+            name = next(c for c in candidates if c.lower() not in used)
+
+            used.add(name.lower())
+            names.append(name)
+
+    return result
+
+
+def render_student_files(quiz_name, names, students, formats):
+    """
+    Renders a score report file for each of a list of students.
+
+    The Word files are put together from the parts of the template shared by
+    every student (see student_docx_template()), so only each student's
+    document part is written and compressed. This can run in a worker
+    process.
+
+    Args:
+        quiz_name (str): Name of the quiz.
+        names (list): File name of each student, from student_file_names().
+        students (list): StudentReport for each student.
+        formats (list): File formats to render, 'pdf' and/or 'docx'.
+
+    Returns:
+        List of (file name, file contents) pairs. Each file name is relative
+        to the export directory and starts with the class folder.
+    """
+    files = []
+
+    if 'pdf' in formats:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.pdfgen.canvas import Canvas
+
+        for name, s in zip(names, students):
+            f = io.BytesIO()
+
+            canvas = Canvas(f, pagesize=letter, pageCompression=1)
+            canvas.setTitle(quiz_name + " - " + s.name)
+            draw_student_report(canvas, 0.6 * inch, letter[1] - 0.6 * inch, s.title, s.lines, s.items)
+            canvas.save()
+
+            files.append((name + '.pdf', f.getvalue()))
+
+    if 'docx' in formats:
+        import zipfile
+
+        shared, document_start, document_end = student_docx_template()
+
+        for name, s in zip(names, students):
+            f = io.BytesIO(shared)
+
+            with zipfile.ZipFile(f, 'a', zipfile.ZIP_DEFLATED) as package:
+                package.writestr('word/document.xml', document_start + individual_report_xml(s) + document_end)
+
+            files.append((name + '.docx', f.getvalue()))
+
+    return files
+
+
+class StudentFileWriter:
+    """
+    Writes files from a background thread, optionally also adding them to a
+    zip file.
+
+    Files are handed over through a bounded queue: put() returns as soon as
+    the file is queued, so rendering carries on while earlier files are
+    written, and only waits when max_pending files are already queued. This
+    keeps thousands of small writes from stalling rendering, without letting
+    rendered files pile up in memory when the disk is slow.
+
+    The zip file is written under a temporary name and renamed when the
+    writer is closed, like save_file().
+
+    Attributes:
+        export_dir (str): Directory files are saved in.
+        zip_path (str): Path of the zip file, or None.
+        paths (list): Saved file paths, in the order they were written.
+    """
+
+    max_pending = 256
+    """int: Most files waiting to be written before put() blocks."""
+
+    def __init__(self, export_dir, zip_path=None):
+        """
+        Constructor for a StudentFileWriter. Starts the writer thread.
+
+        Args:
+            export_dir (str): Directory to save files in.
+            zip_path (str): Path to also save every file in one zip file, or None.
+        """
+        import zipfile
+
+        self.export_dir = export_dir
+        self.zip_path = zip_path
+        self.paths = []
+
+        self._queue = queue.Queue(self.max_pending)
+        self._error = None
+        self._zip = None
+
+        if zip_path is not None:
+            # the files are already compressed, so they are stored as is
+            self._zip = zipfile.ZipFile(zip_path + '.tmp', 'w', zipfile.ZIP_STORED)
+
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(exc_type is None)
+
+    def put(self, name, data):
+        """
+        Queues a file to be written.
+
+        Args:
+            name (str): File name relative to export_dir, with '/' between folders.
+            data (bytes): File contents.
+
+        Raises:
+            OSError: If writing an earlier file failed.
+        """
+        if self._error is not None:
+            raise self._error
+
+        self._queue.put((name, data))
+
+    def put_all(self, files):
+        """
+        Queues several files to be written.
+
+        Args:
+            files (list): (name, data) pairs, as for put().
+        """
+        for name, data in files:
+            self.put(name, data)
+
+    def run(self):
+        """Writes queued files until close() is called."""
+        folders = set()
+
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            if self._error is not None:
+                # keep emptying the queue so put() never blocks forever
+                continue
+
+            name, data = item
+            path = os.path.join(self.export_dir, *name.split('/'))
+
+            try:
+                folder = os.path.dirname(path)
+                if folder not in folders:
+                    os.makedirs(folder, exist_ok=True)
+                    folders.add(folder)
+
+                with open(path, 'wb') as f:
+                    f.write(data)
+
+                if self._zip is not None:
+                    self._zip.writestr(name, data)
+            except OSError as e:
+                self._error = e
+            else:
+                self.paths.append(path)
+
+    def close(self, keep_zip=True):
+        """
+        Waits for every queued file to be written and finishes the zip file.
+
+        Args:
+            keep_zip (bool): Whether to keep the zip file, or to delete it,
+                e.g. because rendering failed.
+
+        Raises:
+            OSError: If writing a file failed.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+        if self._zip is not None:
+            self._zip.close()
+
+            if keep_zip and self._error is None:
+                os.replace(self.zip_path + '.tmp', self.zip_path)
+            else:
+                os.remove(self.zip_path + '.tmp')
+
+        if self._error is not None:
+            raise self._error
+
+
+class PdfRenderer:
+    """
+    Renders a report model as a PDF with reportlab.
+
+    The PDF has the same sections as the Word report, laid out with
+    reportlab's platypus, so neither Word nor LibreOffice is needed.
+
+    Attributes:
+        model (ReportModel): Content of the report.
+        class_graphs (bool): Whether to put a grade distribution graph after
+            each class's scores.
+        styles (reportlab.lib.styles.StyleSheet1): Paragraph styles.
+    """
+
+    extension = '.pdf'
+
+    def __init__(self, model, class_graphs=False):
+        """
+        Constructor for a PdfRenderer.
+
+        Args:
+            model (ReportModel): Content of the report.
+            class_graphs (bool): Whether to add a graph for each class.
+        """
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+        self.model = model
+        self.class_graphs = class_graphs
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle('Separator', parent=self.styles['Heading1'], alignment=1))
+        self.styles.add(ParagraphStyle('Indented', parent=self.styles['Normal'], leftIndent=18))
+
+    def paragraph(self, text, style='Normal'):
+        """
+        Creates a paragraph of plain text.
+
+        Args:
+            text (str): Text of the paragraph. Newlines start new lines.
+            style (str): Name of the paragraph style.
+
+        Returns:
+            A reportlab Paragraph.
+        """
+        from reportlab.platypus import Paragraph
+        from xml.sax.saxutils import escape
+
+        return Paragraph(escape(text).replace('\n', '<br/>'), self.styles[style])
+
+    def table(self, header, rows, col_widths=None):
+        """
+        Creates a table with a shaded header row.
+
+        Args:
+            header (list): Column headings.
+            rows (list): Text of each row.
+            col_widths (list): Column widths in points, or None for automatic
+                widths.
+
+        Returns:
+            A reportlab Table.
+        """
+        from reportlab.lib import colors
+        from reportlab.platypus import Table, TableStyle
+
+        table = Table([header] + rows, colWidths=col_widths, repeatRows=1, hAlign='LEFT')
+        table.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                                   ('FONTSIZE', (0, 0), (-1, -1), 9),
+                                   ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                                   ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F81BD')),
+                                   ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#7BA0CD')),
+                                   ('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+        return table
+
+    def grouped_paragraphs(self, groups):
+        """
+        Creates a paragraph for each group of (label, value) pairs.
+
+        Args:
+            groups (list): Groups of (label, value) pairs.
+
+        Returns:
+            List of reportlab Paragraphs.
+        """
+        return [self.paragraph('\n'.join(label + value for label, value in group)) for group in groups]
+
+    def story(self):
+        """
+        Lays out every section of the report.
+
+        Returns:
+            List of reportlab flowables.
+        """
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Image, PageBreak, Spacer
+
+        m = self.model
+        story = []
+
+        def new_page():
+            if story:
+                story.append(PageBreak())
+
+        # cover page
+        if 'cover' in m.sections:
+            story.append(self.paragraph('ZipGrade Score Report', 'Title'))
+            story += self.grouped_paragraphs(m.cover_info)
+            story.append(Spacer(1, 6))
+            story.append(self.paragraph('Classes:'))
+            story.append(self.paragraph('\n'.join('- ' + line for line in m.class_list), 'Indented'))
+
+        # summary statistics
+        if 'statistics' in m.sections or 'graph' in m.sections:
+            new_page()
+
+        if 'statistics' in m.sections:
+            story.append(self.paragraph('Summary Statistics', 'Heading1'))
+            for p in self.grouped_paragraphs(m.summary_statistics):
+                story += [p, Spacer(1, 6)]
+
+        if 'graph' in m.sections:
+            story.append(self.paragraph('Grade Distribution', 'Heading1'))
+            image = grade_distribution_images([m.grade_counts])[0]
+            story.append(Image(io.BytesIO(image), width=6 * inch, height=4.5 * inch))
+
+        # difficulty analysis
+        if 'difficulty' in m.sections:
+            new_page()
+            story.append(self.paragraph('Difficulty Analysis', 'Heading1'))
+
+            for version in m.versions:
+                story.append(self.paragraph('Key version: ' + version, 'Heading2'))
+
+                for title, lines in m.difficulty[version]:
+                    if title:
+                        story.append(self.paragraph(title))
+                    story.append(self.paragraph('\n'.join(lines), 'Indented'))
+                    story.append(Spacer(1, 6))
+
+                story.append(self.table(['Q', 'Key', 'P', 'r', 'D', 'Responses'], m.item_rows[version],
+                                        [0.4 * inch, 0.6 * inch, 0.5 * inch, 0.5 * inch, 0.5 * inch, 4.6 * inch]))
+
+        # class reports
+        if 'classes' in m.sections:
+            for class_name in m.classes:
+                new_page()
+                story.append(self.paragraph('Class scores for ' + class_name, 'Heading1'))
+                story.append(self.table(['Name', 'Raw', 'Possible', 'Percent'], m.class_rows[class_name],
+                                        [3.0 * inch, 1.3 * inch, 1.3 * inch, 1.3 * inch]))
+
+                if self.class_graphs:
+                    story.append(self.paragraph('Grade distribution for ' + class_name, 'Heading2'))
+                    image = grade_distribution_images([m.class_grade_counts[class_name]])[0]
+                    story.append(Image(io.BytesIO(image), width=6 * inch, height=4.5 * inch))
+
+        # individual reports
+        if 'individual' in m.sections:
+            StudentReportFlowable = student_report_flowable()
+
+            for class_name in m.classes:
+                new_page()
+                story.append(Spacer(1, 3 * inch))
+                story.append(self.paragraph('Individual student reports for\n' + class_name, 'Separator'))
+                story.append(PageBreak())
+
+                for s in m.students[class_name]:
+                    story.append(StudentReportFlowable(s.title, s.lines, s.items))
+
+        # flagged reports
+        if 'flagged' in m.sections:
+            new_page()
+            story.append(self.paragraph('Flagged Reports', 'Heading1'))
+
+            if len(m.flagged) > 0:
+                story.append(self.paragraph('\n\n'.join(flagged_help)))
+                story.append(Spacer(1, 6))
+                story.append(self.table(['Class', 'Name', 'Flagged Questions', 'Reasons'], m.flagged,
+                                        [1.2 * inch, 1.8 * inch, 2.0 * inch, 2.3 * inch]))
+            else:
+                story.append(self.paragraph(no_flagged_message))
+
+        # students with similar answers
+        if 'similarity' in m.sections:
+            new_page()
+            story.append(self.paragraph('Similar Answers', 'Heading1'))
+
+            if len(m.similar) > 0:
+                story.append(self.paragraph('\n\n'.join(similarity_help)))
+                story.append(Spacer(1, 6))
+                story.append(self.table(similarity_columns, m.similar,
+                                        [1.0 * inch, 1.6 * inch, 1.6 * inch, 1.1 * inch, 0.8 * inch, 1.2 * inch]))
+            else:
+                story.append(self.paragraph(no_similar_message))
+
+        return story
+
+    def render(self, f):
+        """
+        Saves the report as a PDF.
+
+        Args:
+            f: Path or binary file object to save to.
+        """
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate
+
+        template = SimpleDocTemplate(f, pagesize=letter, title=self.model.quiz_name,
+                                     leftMargin=0.6 * inch, rightMargin=0.6 * inch,
+                                     topMargin=0.6 * inch, bottomMargin=0.6 * inch)
+        template.build(self.story())
+
+
+@functools.lru_cache(maxsize=None)
+def student_report_flowable():
+    """
+    Defines a reportlab flowable for individual score reports.
+
+    The class is defined here so that reportlab is only imported when a PDF
+    is made.
+
+    Returns:
+        The StudentReportFlowable class.
+    """
+    from reportlab.platypus import Flowable
+
+    class StudentReportFlowable(Flowable):
+        """
+        An individual score report in a PDF, drawn by draw_student_report().
+        """
+
+        def __init__(self, title, lines, items):
+            Flowable.__init__(self)
+            self.title = title
+            self.lines = lines
+            self.items = items
+
+        def wrap(self, available_width, available_height):
+            return available_width, student_report_height(self.items)
+
+        def draw(self):
+            draw_student_report(self.canv, 0, student_report_height(self.items), self.title,
+                                self.lines, self.items)
+
+    return StudentReportFlowable
+
+
+html_style = """
+body { font-family: Calibri, Arial, sans-serif; font-size: 11pt; max-width: 7.3in; margin: 0.6in auto; }
+h1, h2 { color: #365F91; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+th { background: #4F81BD; color: white; text-align: left; }
+th, td { padding: 2px 8px; border-bottom: 1px solid #7BA0CD; font-size: 9pt; }
+.page { page-break-after: always; }
+.student { page-break-inside: avoid; font-size: 9pt; margin-bottom: 1em; }
+.student b { font-size: 11pt; }
+.student table td { border: none; padding: 0 0 0 0.2in; }
+"""
+"""str: Style sheet for HTML reports."""
+
+
+class HtmlRenderer:
+    """
+    Renders a report model as a single HTML page.
+
+    The graphs are embedded in the page, so it can be opened in any browser
+    or printed without other files.
+
+    Attributes:
+        model (ReportModel): Content of the report.
+        class_graphs (bool): Whether to put a grade distribution graph after
+            each class's scores.
+    """
+
+    extension = '.html'
+
+    def __init__(self, model, class_graphs=False):
+        """
+        Constructor for an HtmlRenderer.
+
+        Args:
+            model (ReportModel): Content of the report.
+            class_graphs (bool): Whether to add a graph for each class.
+        """
+        self.model = model
+        self.class_graphs = class_graphs
+
+    def table(self, header, rows):
+        """
+        Creates an HTML table.
+
+        Args:
+            header (list): Column headings.
+            rows (list): Text of each row.
+
+        Returns:
+            The table's HTML.
+        """
+        cells = lambda tag, values: ''.join('<' + tag + '>' + html.escape(v) + '</' + tag + '>' for v in values)
+
+        return ('<table><tr>' + cells('th', header) + '</tr>' +
+                ''.join('<tr>' + cells('td', row) + '</tr>' for row in rows) + '</table>')
+
+    def grouped_paragraphs(self, groups):
+        """
+        Creates a paragraph for each group of (label, value) pairs.
+
+        Args:
+            groups (list): Groups of (label, value) pairs.
+
+        Returns:
+            The paragraphs' HTML.
+        """
+        return ''.join('<p>' + '<br>'.join(html.escape(label + value) for label, value in group) + '</p>'
+                       for group in groups)
+
+    def graph(self, counts):
+        """
+        Creates an image of a grade distribution graph.
+
+        Args:
+            counts (tuple): Number of students in each of grade_ranges.
+
+        Returns:
+            An img element with the graph embedded as SVG.
+        """
+        import base64
+
+        image = grade_distribution_images([counts], 'svg')[0]
+
+        return ('<img alt="Grade distribution" src="data:image/svg+xml;base64,' +
+                base64.b64encode(image).decode('ascii') + '">')
+
+    def student_report(self, student):
+        """
+        Creates an individual score report.
+
+        Args:
+            student (StudentReport): Content of the report.
+
+        Returns:
+            The report's HTML.
+        """
+        items = student.items
+        rows = [items[i:i + 10] for i in range(0, len(items), 10)]
+
+        return ('<div class="student"><b>' + html.escape(student.title) + '</b><br>' +
+                '<br>'.join(html.escape(line) for line in student.lines) +
+                '<table>' + ''.join('<tr>' + ''.join('<td>' + html.escape(item) + '</td>' for item in row) +
+                                    '</tr>' for row in rows) + '</table></div>')
+
+    def page(self):
+        """
+        Lays out every section of the report.
+
+        Returns:
+            The page's HTML.
+        """
+        m = self.model
+        h = lambda level, text: '<h' + str(level) + '>' + html.escape(text) + '</h' + str(level) + '>'
+
+        parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>', html.escape(m.quiz_name),
+                 '</title><style>', html_style, '</style></head><body>']
+
+        # cover page
+        if 'cover' in m.sections:
+            parts += ['<div class="page">', h(1, 'ZipGrade Score Report'), self.grouped_paragraphs(m.cover_info),
+                      '<p>Classes:</p><ul>', ''.join('<li>' + html.escape(line) + '</li>' for line in m.class_list),
+                      '</ul></div>']
+
+        # summary statistics
+        if 'statistics' in m.sections or 'graph' in m.sections:
+            parts.append('<div class="page">')
+
+            if 'statistics' in m.sections:
+                parts += [h(1, 'Summary Statistics'), self.grouped_paragraphs(m.summary_statistics)]
+
+            if 'graph' in m.sections:
+                parts += [h(1, 'Grade Distribution'), self.graph(m.grade_counts)]
+
+            parts.append('</div>')
+
+        # difficulty analysis
+        if 'difficulty' in m.sections:
+            parts += ['<div class="page">', h(1, 'Difficulty Analysis')]
+
+            for version in m.versions:
+                parts.append(h(2, 'Key version: ' + version))
+
+                for title, lines in m.difficulty[version]:
+                    if title:
+                        parts.append('<p>' + html.escape(title) + '</p>')
+                    parts.append('<ul>' + ''.join('<li>' + html.escape(line) + '</li>' for line in lines) + '</ul>')
+
+                parts.append(self.table(['Q', 'Key', 'P', 'r', 'D', 'Responses'], m.item_rows[version]))
+            parts.append('</div>')
+
+        # class reports
+        if 'classes' in m.sections:
+            for class_name in m.classes:
+                parts += ['<div class="page">', h(1, 'Class scores for ' + class_name),
+                          self.table(['Name', 'Raw', 'Possible', 'Percent'], m.class_rows[class_name])]
+
+                if self.class_graphs:
+                    parts += [h(2, 'Grade distribution for ' + class_name),
+                              self.graph(m.class_grade_counts[class_name])]
+                parts.append('</div>')
+
+        # individual reports
+        if 'individual' in m.sections:
+            for class_name in m.classes:
+                parts += ['<div class="page">', h(1, 'Individual student reports for ' + class_name)]
+                parts += [self.student_report(s) for s in m.students[class_name]]
+                parts.append('</div>')
+
+        # flagged reports
+        if 'flagged' in m.sections:
+            parts.append(h(1, 'Flagged Reports'))
+
+            if len(m.flagged) > 0:
+                parts += ['<p>' + html.escape(p) + '</p>' for p in flagged_help]
+                parts.append(self.table(['Class', 'Name', 'Flagged Questions', 'Reasons'], m.flagged))
+            else:
+                parts.append('<p>' + html.escape(no_flagged_message) + '</p>')
+
+        # students with similar answers
+        if 'similarity' in m.sections:
+            parts.append(h(1, 'Similar Answers'))
+
+            if len(m.similar) > 0:
+                parts += ['<p>' + html.escape(p) + '</p>' for p in similarity_help]
+                parts.append(self.table(similarity_columns, m.similar))
+            else:
+                parts.append('<p>' + html.escape(no_similar_message) + '</p>')
+
+        parts.append('</body></html>')
+
+        return ''.join(parts)
+
+    def render(self, f):
+        """
+        Saves the report as an HTML page.
+
+        Args:
+            f: Binary file object to save to.
+        """
+        f.write(self.page().encode('utf-8'))
+
+
+class JsonRenderer:
+    """
+    Saves a report model as JSON, for use by other programs.
+
+    Attributes:
+        model (ReportModel): Content of the report.
+    """
+
+    extension = '.json'
+
+    def __init__(self, model, class_graphs=False):
+        """
+        Constructor for a JsonRenderer.
+
+        Args:
+            model (ReportModel): Content of the report.
+            class_graphs (bool): Not used. Grade counts for every class are
+                always included.
+        """
+        self.model = model
+
+    def render(self, f):
+        """
+        Saves the report as JSON.
+
+        Args:
+            f: Binary file object to save to.
+        """
+        f.write(json.dumps(self.model.to_dict(), indent=2).encode('utf-8'))
+
+
+renderers = {'docx': DocxRenderer, 'pdf': PdfRenderer, 'html': HtmlRenderer, 'json': JsonRenderer}
+"""dict: Renderer class for each report format."""
+
+
+def get_export_filename(sheet, extension='.docx'):
+    """
+    Gets path to save report.
+
+    The report file name is simply the quiz name and the export date. If no
+    quiz name exists, then the name will default to grade_report
+
+    Note:
+        ZipGrade date format: May 02 2018 02:14 PM (phone)
+                              2019-09-18 00:00:00       (web)
+
+
+    Args:
+        sheet (Scoresheet): Single scoresheet to extract quiz data from.
+        extension (str): File name extension for the report's format.
+
+    Returns:
+        File name for the report.
+    """
+
+    title = sheet.quiz_name.strip()
+    if len(title) == 0:
+        title = "ZipGradeReport"
+
+    yyyy, mm, dd = zipgrade_date(sheet.date_exported).split("-")
+
+    return safe_filename(title + "_" + "_" + yyyy + mm + dd) + extension
+
+
+def zipgrade_date(text):
+    """
+    Converts a ZipGrade date to YYYY-MM-DD, so that dates sort correctly.
+
+    Note:
+        ZipGrade date format: May 02 2018 02:14 PM (phone)
+                              2019-09-18 00:00:00       (web)
+
+    Args:
+        text (str): Date from the ZipGrade CSV data.
+
+    Returns:
+        The date as YYYY-MM-DD.
+    """
+    months = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04",
+              "May": "05", "Jun": "06", "Jul": "07", "Aug": "08",
+              "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
+
+    if "-" in text:
+        date = text.split("-")
+        yyyy = date[0]
+        mm = date[1]
+        dd = date[2][:2]
+    elif "/" in text:
+        date = text.split("/")
+        yyyy = date[2].split(" ")[0]
+        mm = date[0]
+        dd = date[1]
+    else:
+        date = text.split(" ")
+        yyyy = date[2]
+        mm = months[date[0]]
+        dd = date[1]
+
+    return yyyy + "-" + mm.zfill(2) + "-" + dd.zfill(2)
+
+
+zipgrade_time_pattern = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?')
+"""re.Pattern: Finds the time of day in a ZipGrade date."""
+
+
+def zipgrade_timestamp(text):
+    """
+    Converts a ZipGrade date and time to YYYY-MM-DD HH:MM:SS, so that
+    timestamps sort correctly. The time is 00:00:00 if the text has none.
+
+    Args:
+        text (str): Date and time from the ZipGrade CSV data, in any format
+            zipgrade_date() reads.
+
+    Returns:
+        The date and time as YYYY-MM-DD HH:MM:SS, on a 24-hour clock.
+    """
+    match = zipgrade_time_pattern.search(text)
+    hh, mi, ss = 0, 0, 0
+
+    if match:
+        hh, mi, ss = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+        meridiem = (match.group(4) or '').upper()
+
+        if meridiem == 'AM' and hh == 12:
+            hh = 0
+        elif meridiem == 'PM' and hh < 12:
+            hh += 12
+
+    return zipgrade_date(text) + " " + "{:02d}:{:02d}:{:02d}".format(hh, mi, ss)
+
+
+def quiz_identity(quiz_name, date_created):
+    """
+    Identifies a quiz by its name and creation date.
+
+    The phone app and the website write the creation date differently, and
+    the phone app leaves out the seconds, so the date is compared as
+    YYYY-MM-DD HH:MM. Exports of the same quiz from either one match.
+
+    Args:
+        quiz_name (str): Name of the quiz.
+        date_created (str): QuizCreated date from the ZipGrade CSV data.
+
+    Returns:
+        Tuple of the quiz name and the creation date as YYYY-MM-DD HH:MM, or
+        as it is if it can't be read.
+    """
+    try:
+        return quiz_name, zipgrade_timestamp(date_created)[:16]
+    except (IndexError, KeyError):
+        return quiz_name, date_created
+
+
+def safe_filename(text):
+    """
+    Makes text safe to use as a file name.
+
+    Letters and digits are kept, and each run of anything else becomes a
+    single underscore.
+
+    Args:
+        text (str): Text to make a file name from.
+
+    Returns:
+        The file name.
+    """
+    filename = ""
+    underscore = True
+
+    for c in text:
+        if c.isalnum():
+            filename += c
+            underscore = False
+        elif c == "_" and underscore == False:
+            filename += c
+            underscore = True
+        elif underscore == False:
+            filename += "_"
+            underscore = True
+
+    return filename
+
+
+class Instrumentation:
+    """
+    Timings and counters for generating a report.
+
+    Stages are timed with stage(), or copied from the timings that models
+    and renderers keep for each section. Counters record how much work was
+    done, so that a slow run can be told apart from a big one.
+
+    Attributes:
+        timings (dict): For each stage, a dict of seconds spent on each part
+            of it. A stage timed as a whole is its 'total' part.
+        counters (dict): Number of each thing counted, e.g. rows parsed or
+            bytes written.
+    """
+
+    def __init__(self):
+        """
+        Constructor for an Instrumentation.
+        """
+        self.timings = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def stage(self, stage, part='total'):
+        """
+        Times a block of code.
+
+        Args:
+            stage (str): Name of the stage, e.g. 'read'.
+            part (str): Part of the stage being timed.
+        """
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            parts = self.timings.setdefault(stage, {})
+            parts[part] = parts.get(part, 0) + time.perf_counter() - start
+
+    def add_timings(self, stage, timings):
+        """
+        Adds timings recorded elsewhere, e.g. a model's section timings.
+
+        Args:
+            stage (str): Name of the stage.
+            timings (dict): Seconds spent on each part of the stage.
+        """
+        parts = self.timings.setdefault(stage, {})
+
+        for part, seconds in timings.items():
+            parts[part] = parts.get(part, 0) + seconds
+
+    def count(self, name, n=1):
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): Name of the counter.
+            n (int): Amount to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def lines(self):
+        """
+        Formats the timings and counters for printing.
+
+        Returns:
+            List of lines.
+        """
+        lines = []
+
+        for stage, parts in self.timings.items():
+            names = [name for name in report_sections if name in parts] + \
+                    [name for name in parts if name not in report_sections]
+
+            for name in names:
+                title = section_titles.get(name, name.capitalize())
+                lines.append('  {:<12} {:<22} {:>10.3f} s'.format(stage, title, parts[name]))
+
+        for name, n in self.counters.items():
+            lines.append('  {:<35} {:>10}'.format(name.replace('_', ' '), n))
+
+        return lines
+
+    def to_dict(self):
+        """
+        Gets the timings and counters for saving as JSON.
+
+        Returns:
+            Dictionary with the software version, timings, and counters.
+        """
+        return {'version': software_version, 'timings': self.timings, 'counters': self.counters}
+
+    def save(self, path):
+        """
+        Saves the timings and counters as JSON.
+
+        Args:
+            path (str): Where to save them.
+        """
+        data = json.dumps(self.to_dict(), indent=2).encode('utf8')
+        save_file(path, lambda f: f.write(data))
+
+
+def default_jobs(num_students):
+    """
+    Picks the number of worker processes to render a report with when none
+    was given.
+
+    Starting worker processes and sending them the students takes longer
+    than rendering a small report on its own, so only reports with at least
+    parallel_min_students students use every CPU.
+
+    Args:
+        num_students (int): Number of students in the report.
+
+    Returns:
+        Number of worker processes.
+    """
+    if num_students < parallel_min_students:
+        return 1
+
+    return os.cpu_count() or 1
+
+
+def generate_report(import_path, export_dir=None, jobs=1, class_graphs=False, formats=('docx',),
+                    student_files=(), sections=report_sections, incremental=False, store=None,
+                    timing_summary=False, profile=False):
+    """
+    Reads a ZipGrade CSV file and saves a report for it.
+
+    The report's content is computed once and then saved in each format.
+
+    Args:
+        import_path (str): Path to CSV file, or a list of paths of exports of
+            the same quiz to merge into one report. See read_exports().
+        export_dir (str): Directory to save the report in. Defaults to the
+            directory containing the (first) CSV file.
+        jobs (int): Number of worker processes to parse files and render
+            classes with, or None to use every CPU to parse several files and
+            to pick the number to render with by the size of the report (see
+            default_jobs()).
+        class_graphs (bool): Whether to add a grade distribution graph for
+            each class.
+        formats (list): Formats to save the report in. See renderers.
+        student_files (list): Formats to also save a file in for each
+            student, 'pdf' and/or 'docx'. The files are saved in a folder next
+            to the report, and bundled in a zip file. See save_student_files().
+        sections (list): Names of the report sections to include. See
+            report_sections.
+        incremental (bool): Whether to reuse the students that haven't
+            changed since the last report for the same quiz. See ReportCache.
+        store (str): Path to a ResultStore database to also add the scores
+            to, or None.
+        timing_summary (bool): Whether to save the timings and counters as
+            JSON next to the report, with the extension .timings.json.
+        profile (bool): Whether to profile generating the report with
+            cProfile and save the stats next to the report, with the
+            extension .prof. Worker processes are not profiled.
+
+    Returns:
+        Paths of the saved reports, and the Instrumentation for the run.
+    """
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        result = profiler.runcall(generate_report, import_path, export_dir, jobs, class_graphs, formats,
+                                  student_files, sections, incremental, store, timing_summary)
+        profiler.dump_stats(os.path.splitext(result[0][0])[0] + '.prof')
+
+        return result
+
+    instruments = Instrumentation()
+    paths = [import_path] if isinstance(import_path, str) else list(import_path)
+
+    with instruments.stage('read'):
+        matrix = read_exports(paths, (os.cpu_count() or 1) if jobs is None else jobs)
+
+    instruments.count('files_read', len(paths))
+    instruments.count('rows_kept', matrix.num_rows)
+    instruments.count('bytes_read', sum(os.path.getsize(path) for path in paths))
+
+    if matrix.num_rows == 0:
+        raise ValueError('No student data in file.')
+
+    with instruments.stage('index'):
+        r = Report(matrix)
+
+    if jobs is None:
+        jobs = default_jobs(matrix.num_rows)
+
+    if export_dir is None:
+        export_dir = os.path.dirname(os.path.abspath(paths[0]))
+
+    base = os.path.join(export_dir, os.path.splitext(get_export_filename(r.scoresheets[0]))[0])
 
-        mid1 = len(nums) // 2
-        mid2 = mid1
+    if store is not None:
+        with instruments.stage('store'), ResultStore(store) as result_store:
+            result_store.add_matrix(matrix, os.pathsep.join(os.path.abspath(path) for path in paths))
 
-        if len(nums) % 2 == 1:
-            mid2 += 1
+    cache = None
 
-        q1 = round(statistics.median(nums[:mid1]), 2)
-        q3 = round(statistics.median(nums[mid2:]), 2)
+    if incremental:
+        with instruments.stage('cache', 'load'):
+            cache = ReportCache(matrix)
 
-        return q1, q3
+    model = r.get_model(sections, cache)
+    save_paths = []
 
-    def add_cover_page(self, document):
-        """
-        Puts cover page on the report.
+    instruments.add_timings('compute', model.timings)
+    instruments.count('classes', len(model.classes))
+    instruments.count('student_reports', model.num_students)
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        
-        sheet_1 = self.scoresheets[0]
-        
-        document.add_heading('ZipGrade Score Report', 0)
-  
-        p = document.add_paragraph()
-        p.add_run("Quiz Name: ")
-        p.add_run(sheet_1.quiz_name + "\n")
-        p.add_run("Date Created: ")
-        p.add_run(sheet_1.date_created + "\n")
-        p.add_run("Date Exported: ")
-        p.add_run(sheet_1.date_exported)
+    for output_format in formats:
+        if output_format == 'docx':
+            fragments = cache.fragments if cache is not None else None
+            renderer = DocxRenderer(model, class_graphs, jobs, fragments=fragments)
+        else:
+            renderer = renderers[output_format](model, class_graphs)
 
-        p = document.add_paragraph()
-        p.add_run("Classes: " + "\n")
-        for class_name in self.classes:
-            p.add_run("  - " + class_name + "\n")
+        save_path = base + renderer.extension
 
-    def add_summary_statistics(self, document):
-        """
-        Generates summary statistics and puts them on document.
+        with instruments.stage(output_format):
+            save_file(save_path, renderer.render)
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        sheet_1 = self.scoresheets[0]
-        possible_points = sheet_1.possible_points
-        num_scores = len(self.scoresheets)
+        save_paths.append(save_path)
 
-        mean_raw = round(statistics.mean(self.raw_scores), 2)
-        mean_pct = round(statistics.mean(self.percentages), 2)
+        instruments.add_timings(output_format, getattr(renderer, 'timings', {}))
+        for name, n in getattr(renderer, 'counters', {}).items():
+            instruments.count(output_format + '_' + name, n)
+        instruments.count(output_format + '_bytes_written', os.path.getsize(save_path))
 
-        median_raw = round(statistics.median(self.percentages), 2)
-        median_pct = round(statistics.median(self.percentages), 2)
+    if student_files:
+        with instruments.stage('student_files'):
+            paths = save_student_files(model, base + '_students', student_files, jobs, base + '_students.zip')
 
-        st_dev_raw = round(statistics.stdev(self.raw_scores), 2)
-        st_dev_pct = round(statistics.stdev(self.percentages), 2)
+        instruments.count('student_files_written', len(paths))
+        instruments.count('student_bytes_written', sum(os.path.getsize(path) for path in paths))
 
-        min_raw = round(min(self.raw_scores), 2)
-        max_raw = round(max(self.raw_scores), 2)
-        min_pct = round(min(self.percentages), 2)
-        max_pct =  round(max(self.percentages), 2)
+    if cache is not None:
+        with instruments.stage('cache', 'save'):
+            cache.save(model)
 
-        q1_raw, q3_raw = self.quartiles(self.raw_scores)
-        q1_pct, q3_pct = self.quartiles(self.percentages)
+        instruments.count('cached_reports_reused', cache.hits)
+        instruments.count('cached_reports_recomputed', cache.misses)
 
-        document.add_heading('Summary Statistics', 1)
+    if timing_summary:
+        instruments.save(base + '.timings.json')
 
-        p = document.add_paragraph()
-        p.add_run("Number of Scores: ")
-        p.add_run(str(num_scores) + "\n")
-        p.add_run("Points Possible: ")
-        p.add_run(str(possible_points))
+    return save_paths, instruments
 
-        p = document.add_paragraph()
-        p.add_run("Mean (raw/percent): ")
-        p.add_run(str(mean_raw) + " / " + str(mean_pct) + "%\n")
-        p.add_run("Standard Deviation (raw/percent): ")
-        p.add_run(str(st_dev_raw) + " / " + str(st_dev_pct) + "%")
 
-        p = document.add_paragraph()
-        p.add_run("Max (raw/percent): ")
-        p.add_run(str(max_raw) + " / " + str(max_pct) + "%\n")
-        p.add_run("Q3 (raw/percent): ")
-        p.add_run(str(q3_raw) + " / " + str(q3_pct) + "%\n")
-        p.add_run("Median (raw/percent): ")
-        p.add_run(str(median_raw) + " / " + str(median_pct) + "%\n")
-        p.add_run("Q1 (raw/percent): ")
-        p.add_run(str(q1_raw) + " / " + str(q1_pct) + "%\n")
-        p.add_run("Min (raw/percent): ")
-        p.add_run(str(min_raw) + " / " + str(min_pct) + "%")
-
-    def add_grade_distribution_graph(self, document):
-        """
-        Puts bar graph of grade distribution on document.
+def find_csv_files(paths):
+    """
+    Expands command line arguments into a list of CSV files.
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        ranges = []
+    Args:
+        paths (list): Files, directories, or glob patterns. Directories are
+            searched for .csv files (not recursively).
 
-        for low in range(0, 100, 5):
-            rng = str(low) + '-' + str(low + 4)
-            ranges.append(rng)
-        ranges.append(100)
+    Returns:
+        List of file paths with duplicates removed, and a list of arguments
+        that matched nothing.
+    """
+    found = []
+    unmatched = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(os.path.join(glob.escape(path), '*.csv')) +
+                             glob.glob(os.path.join(glob.escape(path), '*.CSV')))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path))
 
-        counts = [0] * len(ranges)
+        if len(matches) == 0:
+            unmatched.append(path)
 
-        for s in self.scoresheets:
-            percent = round(float(s.percent_correct))
-            index = min(percent // 5, 20)
-            counts[index] += 1
+        for m in matches:
+            if m not in found:
+                found.append(m)
 
-        y_pos = np.arange(len(ranges))
+    return found, unmatched
 
-        plt.bar(y_pos, counts, align='center', alpha=0.5)
-        plt.xticks(y_pos, ranges, rotation='vertical')
-        plt.xlabel('Percent correct', labelpad=12)
-        plt.ylabel('Number of students')
-        plt.tight_layout()
-        
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            plt.savefig(tmpdirname + '/graph.png')
-            document.add_heading('Grade Distribution', 1)
-            document.add_picture(tmpdirname + '/graph.png')
-        
-        
-    def add_difficulty_analysis(self, document, sheets, version):
-        """
-        Generates difficulty analysis and puts it on document.
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        document.add_heading('Key version: ' + version, 2)
+def main(argv=None):
+    """
+    Command line entry point.
 
-        misses = {}
-        num_questions = sheets[0].num_questions
+    With no arguments, the GUI is started. Otherwise each CSV file named on
+    the command line is processed without the GUI, and the exit status is 1
+    if any report could not be generated.
 
-        for s in sheets:
-            for r in s.responses:
-                q = int(r['question'])
-                a = r['answer']
-                c = r['correct']
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv[1:].
 
-                if len(c) > 0:
-                    if q not in misses:
-                        misses[q] = 0
+    Returns:
+        Exit status.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if len(argv) == 0:
+        run_gui()
+        return 0
+
+    import argparse
+    import concurrent.futures
+
+    parser = argparse.ArgumentParser(prog='zipgrade_reporter',
+                                     description='Generate ZipGrade score reports from CSV exports.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='CSV file, directory of CSV files, or glob pattern')
+    parser.add_argument('-o', '--output', metavar='DIR',
+                        help='directory to save reports in (default: next to each CSV file)')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='number of worker processes (default: number of CPUs for several files; for one '
+                             'file, number of CPUs if it has at least ' + str(parallel_min_students) +
+                             ' students, otherwise 1)')
+    parser.add_argument('-f', '--format', choices=sorted(renderers), action='append', dest='formats',
+                        help='report format; repeat for more than one (default: docx)')
+    parser.add_argument('--class-graphs', action='store_true',
+                        help='add a grade distribution graph for each class')
+    parser.add_argument('--student-files', choices=('docx', 'pdf'), action='append', default=[], metavar='FORMAT',
+                        help='also save a file for each student (docx or pdf), in a folder and a zip file next '
+                             'to the report; repeat for more than one')
+    parser.add_argument('--student-pdfs', action='append_const', const='pdf', dest='student_files',
+                        help='same as --student-files pdf')
+    parser.add_argument('--only', choices=report_sections, action='append', metavar='SECTION',
+                        help='include only this report section; repeat for more than one (sections: ' +
+                             ', '.join(report_sections) + ')')
+    parser.add_argument('--skip', choices=report_sections, action='append', default=[], metavar='SECTION',
+                        help='leave this report section out; repeat for more than one')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reuse the students that have not changed since the last report for the same quiz')
+    parser.add_argument('--store', metavar='DB',
+                        help='also keep the scores in this SQLite database, for reports across quizzes')
+    parser.add_argument('--merge', action='store_true',
+                        help='combine all the files into one report, e.g. one export for each class '
+                             '(students in more than one file are kept from the latest export)')
+    parser.add_argument('--progress', metavar='FILE',
+                        help="instead of a report for each file, save one report of each student's "
+                             "progress across all of them")
+    parser.add_argument('--timings', action='store_true',
+                        help='print the time spent on each stage and section, and save it next to the report '
+                             'as JSON')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile each report with cProfile and save the stats next to it')
+    parser.add_argument('--version', action='version', version=software_version)
+    args = parser.parse_args(argv)
+
+    if args.formats is None:
+        args.formats = ['docx']
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    sections = [name for name in args.only or report_sections if name not in args.skip]
+
+    if len(sections) == 0:
+        parser.error('no report sections selected')
+
+    if args.output is not None and not os.path.isdir(args.output):
+        parser.error('output directory does not exist: ' + args.output)
+
+    files, unmatched = find_csv_files(args.paths)
+    failures = [(path, 'No such file or directory') for path in unmatched]
+
+    if args.progress is not None:
+        return save_progress_report(files, args.progress, failures)
+
+    if args.merge and len(files) > 1:
+        files = [files]
+
+    succeeded = 0
+    generate = functools.partial(generate_report, export_dir=args.output, class_graphs=args.class_graphs,
+                                 formats=args.formats, student_files=args.student_files, sections=sections,
+                                 incremental=args.incremental, store=args.store,
+                                 timing_summary=args.timings, profile=args.profile)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        if len(files) == 1:
+            # only one file, so use the workers for its classes instead
+            results = [(files[0], functools.partial(generate, files[0], jobs=args.jobs))]
+        else:
+            futures = {executor.submit(generate, f, jobs=1): f for f in files}
+            results = ((futures[f], f.result) for f in concurrent.futures.as_completed(futures))
 
-                    if a != c:
-                        misses[q] += 1
+        for path, result in results:
+            if not isinstance(path, str):
+                path = ' + '.join(path)
 
-        difficulty = []
-        for k, v in misses.items():
-            p = round(v / num_questions * 100, 1)
-            difficulty.append((k, v, p))
+            try:
+                save_paths, instruments = result()
+                succeeded += 1
+                print(path + ' -> ' + ', '.join(save_paths))
 
-        sort_by = lambda k: k[1]
-        difficulty = sorted(difficulty, key=sort_by , reverse=True)
+                if args.timings:
+                    print('\n'.join(instruments.lines()))
+            except Exception as e:
+                failures.append((path, str(e) or type(e).__name__))
 
-        if len(difficulty) > 10:
-            hard_threshold = difficulty[4][2]
-            easy_threshold = difficulty[-3][2]
+    print()
+    print(str(succeeded) + ' report(s) generated, ' + str(len(failures)) + ' failed.')
 
-            paragraph = document.add_paragraph("Most difficult Questions (at least " + str(hard_threshold) + "% missed)\n")
-            for d in difficulty:
-                if (d[2] >= hard_threshold):
-                    q = str(d[0])
-                    n = str(d[1])
-                    p = str(d[2])
-                    paragraph.add_run("\tq=" + q + ", n=" + n + ", %=" + p + "\n")
-
-            paragraph = document.add_paragraph("Easiest Questions (no more than " + str(easy_threshold) + "% missed)\n")
-            for d in difficulty:
-                if (d[2] <= easy_threshold):
-                    q = str(d[0])
-                    n = str(d[1])
-                    p = str(d[2])
-                    paragraph.add_run("\tq=" + q + ", n=" + n + ", %=" + p + "\n")
-        else:
-            for d in difficulty:
-                q = str(d[0])
-                n = str(d[1])
-                p = str(d[2])
-                paragraph.add_run("\tq=" + q + ", n=" + n + ", %=" + p + "\n")
+    for path, error in failures:
+        print('  ' + path + ': ' + error, file=sys.stderr)
 
-    def add_class_summary(self, document, sheets, summary_title=''):
-        """
-        Generates class and puts it on document.
+    return 1 if len(failures) > 0 else 0
 
-        Class summary is an alphabetized list of students with raw scores and
-        percentages.
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        if summary_title != '':
-            document.add_heading('Class scores for ' + summary_title, 1)
-        else:
-            document.add_heading('Class scores', 1)
+def save_progress_report(files, save_path, failures):
+    """
+    Saves a progress report across many CSV files for the command line.
 
-        table = document.add_table(rows=1, cols=4)
-        table.style = 'Medium Shading 1'
-        table.cell(0,0).width = Inches(3.0)
+    Each file is read once, one at a time.
 
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Name'
-        hdr_cells[1].text = 'Raw'
-        hdr_cells[2].text = 'Possible'
-        hdr_cells[3].text = 'Percent'
+    Args:
+        files (list): Paths of CSV files.
+        save_path (str): Where to save the report.
+        failures (list): (path, error) pairs for files already known to be
+            missing.
 
-        for s in sheets:
-            row_cells = table.add_row().cells
-            row_cells[0].text = s.last_name + ", " + s.first_name
-            row_cells[1].text = s.earned_points
-            row_cells[2].text = s.possible_points
+    Returns:
+        Exit status.
+    """
+    progress = ProgressReport()
 
-            rounded_percent = round(float(s.percent_correct))
-            row_cells[3].text = str(rounded_percent) + "%"
+    for path in files:
+        try:
+            progress.add_file(path)
+        except Exception as e:
+            failures.append((path, str(e) or type(e).__name__))
 
-    def add_individual_report_separator(self, document, class_name):
-        """
-        Generates separator page to put before individual class reports.
+    if progress.num_students > 0:
+        save_document(progress.generate(), save_path)
+        print(str(len(progress.quizzes)) + ' quiz(zes), ' + str(progress.num_students) + ' student(s) -> ' +
+              save_path)
+    else:
+        print('No student data found.')
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        paragraph = document.add_paragraph()
-        paragraph.add_run('\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n\n')
-        heading = document.add_heading('Individual student reports for\n' + class_name, 1)
-        heading.alignment = 1
+    for path, error in failures:
+        print('  ' + path + ': ' + error, file=sys.stderr)
 
-    def add_individual_report(self, document, sheet):
-        """
-        Generates individual score report for document.
+    return 1 if len(failures) > 0 or progress.num_students == 0 else 0
 
-        Individual reports contain student data, scores, and a summary of responses
-        along with correct answers.
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-        """
-        paragraph = document.add_paragraph()
-        paragraph.paragraph_format.keep_together = True
-        
-        tab_stops = paragraph.paragraph_format.tab_stops
-        tab_stops.add_tab_stop(Inches(0.2))
-        tab_stops.add_tab_stop(Inches(0.9))
-        tab_stops.add_tab_stop(Inches(1.6))
-        tab_stops.add_tab_stop(Inches(2.3))
-        tab_stops.add_tab_stop(Inches(3.0))
-        tab_stops.add_tab_stop(Inches(3.7))
-        tab_stops.add_tab_stop(Inches(4.4))
-        tab_stops.add_tab_stop(Inches(5.1))
-        tab_stops.add_tab_stop(Inches(5.9))
-        tab_stops.add_tab_stop(Inches(6.6))
+def get_cache_dir():
+    """
+    Gets the directory where ZipGrade Reporter keeps cached data.
 
-        name = sheet.last_name + ", " + sheet.first_name
-        paragraph.add_run(name + " (ID: " + sheet.zip_id + ")\n").bold = True
+    The directory is created if it doesn't exist.
 
-        test_name = sheet.quiz_name
-        if len(sheet.key_version) > 0:
-            test_name += " (Key: " + sheet.key_version + ")"
-            
-        run = paragraph.add_run("Class: " + sheet.class_name + "\n")
-        run.font.size = Pt(9)
-        run = paragraph.add_run("Test: " + test_name + "\n")
-        run.font.size = Pt(9)
-        run = paragraph.add_run("Score: " + sheet.percent_correct + "% " +  
-                                "(" + sheet.earned_points + "/" + sheet.possible_points  + ")\n")
-        run.font.size = Pt(9)
-        
-        run = paragraph.add_run("Response Summary: Your Answer (Correct)\n")
-        run.font.size = Pt(9)
-        
-        count = 0
-        flagged_questions = []
-        
-        for r in sheet.responses:
-            q = str(r['question'])
-            a = str(r['answer'])
-            c = str(r['correct'])
+    Returns:
+        Path to the cache directory.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
 
-            if len(c) > 0:
-                item = "\t" + q + ". " + a
-                if a != c:
-                    item += " (" + c + ")"
+    path = os.path.join(base, 'ZipGradeReporter')
+    os.makedirs(path, exist_ok=True)
 
-                run = paragraph.add_run(item)
-                run.font.size = Pt(9)
+    return path
 
-                count += 1
-                if count % 10 == 0:
-                   paragraph.add_run('\n')
 
-                if len(c) != len(a):
-                    flagged_questions.append(q)
+def get_latest_version(timeout=update_check_timeout, max_age=update_cache_max_age):
+    """
+    Gets the version number of the latest release from the ZipGradeReporter website.
 
-                if len(flagged_questions) == 0:
-                    flagged = "None"
-                else:
-                    flagged = str(flagged_questions)[1: -1]
-                    
-        return name, flagged
-        
-    def add_flagged_report_list(self, document, flagged_quizzes):
-        """
-        Generates class and puts it on document.
+    The result is cached on disk, so the website is checked at most once
+    every max_age seconds.
 
-        Args:
-            document (docx.Document): Document for which content is being added.
-            flagged_quizzes (tuple): Class name, student name, and list of questions with flagged responses
-        """
-        document.add_heading('Flagged Reports', 1)
+    Args:
+        timeout (float): Seconds to wait for the website.
+        max_age (float): Seconds a cached result stays valid.
 
-        if len(flagged_quizzes) > 0:
-            paragraph = document.add_paragraph()
-            paragraph.add_run("Check that the student responses on flagged questions were scanned correctly. " +
-                              "Possible reasons include answers not scanned due light marking, stray marks " +
-                              "considered responses due to poor erasing, and marks not read due to glare or " +
-                              "poor lighting during scanning. Questions inadvertently left blank by students " +
-                              "will also be flagged.")
-            paragraph.add_run("\n\n")
-            
-            paragraph.add_run("From within the ZipGrade app, you can 'Review Papers' and 'Edit Answers' to make " +
-                              "corrections. Then redownload the CSV file and generate this report again.")
-            paragraph.add_run("\n")
-            
-            table = document.add_table(rows=1, cols=3)
-            table.style = 'Medium Shading 1'
+    Returns:
+        The latest version (e.g. 'v0.9-beta.12'), or None if it couldn't be found.
+    """
+    try:
+        cache_path = os.path.join(get_cache_dir(), 'latest_version.json')
+    except OSError:
+        cache_path = None
 
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = 'Class'
-            hdr_cells[1].text = 'Name'
-            hdr_cells[2].text = 'Flagged Questions'
+    if cache_path is not None:
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
 
-            for q in flagged_quizzes:
-                row_cells = table.add_row().cells
-                row_cells[0].text = q[0]
-                row_cells[1].text = q[1]
-                row_cells[2].text = q[2]
-        else:
-            paragraph = document.add_paragraph()
-            paragraph.add_run("No quizzes have been flagged. It appears that all answers were scanned correctly.")
-            paragraph.add_run("\n")
+            if 0 <= time.time() - cached['checked'] < max_age:
+                return cached['version']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
 
-    def generate(self):
-        """
-        Creates a ZipGrade report as a Word document.
+    import urllib.request
 
-        The report contains a cover page with basic quiz information and
-        summary statistics. Subsiquent pages include difficlty analysis, class
-        summaries, and individual score reports.
+    try:
+        with urllib.request.urlopen(version_url, timeout=timeout) as fp:
+            version_txt = fp.read().decode('utf8')
+    except (OSError, ValueError):
+        return None
 
-        Returns:
-            The completed report.
-        """
-        document = docx.Document()
+    start_del = "StringStruct(u'FileVersion', u'"
+    end_del = "'),"
 
-        # styling
-        style = document.styles['Normal']
-        font = style.font
-        font.size = Pt(11)
+    if start_del not in version_txt:
+        return None
 
-        sections = document.sections
-        for section in sections:
-            section.top_margin = Inches(0.6)
-            section.bottom_margin = Inches(0.6)
-            section.left_margin = Inches(0.6)
-            section.right_margin = Inches(0.6)
-        
-        # cover page
-        self.add_cover_page(document)
-        document.add_page_break()
+    start_loc = version_txt.find(start_del) + len(start_del)
+    end_loc = version_txt.find(end_del, start_loc)
 
-        # summary statistics
-        self.add_summary_statistics(document)
-        self.add_grade_distribution_graph(document)
-        document.add_page_break()
+    version = 'v' + version_txt[start_loc: end_loc]
 
-        # difficulty analysis
-        document.add_heading('Difficulty Analysis', 1)
-        for version in self.versions:
-            sheets = self.get_sheets_by_version(version)
-            self.add_difficulty_analysis(document, sheets, version)
-        document.add_page_break()
+    if cache_path is not None:
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump({'checked': time.time(), 'version': version}, f)
+        except OSError:
+            pass
 
-        # class reports
-        for class_name in self.classes:
-            sheets = self.get_sheets_by_class(class_name)
-            self.add_class_summary(document, sheets, class_name)
-            document.add_page_break()
+    return version
 
-        # individual reports
-        flagged_quizzes = []
-        
-        for i, class_name in enumerate(self.classes):
-            sheets = self.get_sheets_by_class(class_name)
-            self.add_individual_report_separator(document, class_name)
-            document.add_page_break()
 
-            for s in sheets:
-                name, flags = self.add_individual_report(document, s)
+def run_gui():
+    """Starts the ZipGrade Reporter GUI."""
+    from tkinter import Tk
 
-                if flags != "None":
-                    flagged_quizzes.append([class_name, name, flags])
+    root = Tk()
+    App(root)
+    root.mainloop()
 
-            if i + 1 < len(self.classes):
-                document.add_page_break()
 
-        document.add_page_break()
+class GenerationCancelled(Exception):
+    """Raised to stop report generation when the user cancels."""
 
-        # flagged reports
-        self.add_flagged_report_list(document, flagged_quizzes)
 
-        # all done
-        return document
-         
 class App:
     """
     GUI component of ZipGrade Reporter.
 
     Attributes:
-        import_path (str): Path to CSV file.
+        import_path (str or list): Path to CSV file, or paths of several exports to merge.
         export_path (str): Path to save final report.
+        worker (threading.Thread): Thread generating the report, if any.
     """
 
     def __init__(self, master):
@@ -680,6 +5624,10 @@ class App:
         self.import_path = None
         self.export_path = None
 
+        self.worker = None
+        self.cancel_requested = threading.Event()
+        self.messages = queue.Queue()
+
         self.master = master
         self.gui_init()
 
@@ -687,6 +5635,10 @@ class App:
         """
         Defines App layout
         """
+        import webbrowser
+        from tkinter import BooleanVar, Button, Checkbutton, DISABLED, E, Frame, LEFT, Label, StringVar, W
+        from tkinter import ttk
+
         self.master.iconbitmap(application_path + 'images/icon.ico')
         self.master.title("ZipGrade Reporter")
         self.master.resizable(False, False)
@@ -698,6 +5650,18 @@ class App:
         generate_button = Button(self.master, text="2. Generate Report", command=self.generate)
         generate_button.config(width=30)
         generate_button.grid(row=0, column=1, padx=5, pady=5, sticky=(E))
+        self.generate_button = generate_button
+
+        section_frame = Frame(self.master)
+        Label(section_frame, text="Include in report:").grid(row=0, column=0, columnspan=4, sticky=(W))
+
+        self.section_vars = {}
+        for i, name in enumerate(report_sections):
+            self.section_vars[name] = BooleanVar(value=True)
+            check = Checkbutton(section_frame, text=section_titles[name], variable=self.section_vars[name])
+            check.grid(row=1 + i // 4, column=i % 4, padx=5, sticky=(W))
+
+        section_frame.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky=(W))
 
         instr1 = Label(self.master, text="The following data file will be used to generate your report...")
         instr1.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky=(W))
@@ -719,21 +5683,27 @@ class App:
         status_lbl = Label(self.master, textvariable=self.status_lbl_text)
         status_lbl.grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky=(W))
 
+        self.progress_bar = ttk.Progressbar(self.master, orient='horizontal', mode='determinate')
+        self.progress_bar.grid(row=8, column=0, padx=5, pady=5, sticky=(W, E))
+
+        cancel_button = Button(self.master, text="Cancel", command=self.cancel, state=DISABLED)
+        cancel_button.config(width=30)
+        cancel_button.grid(row=8, column=1, padx=5, pady=5, sticky=(E))
+        self.cancel_button = cancel_button
+
         links = Frame(self.master)
 
         help_link = Label(links, text="Help", fg="blue", cursor="hand2")
         help_link.pack( side = LEFT )
         help_link.bind("<Button-1>", lambda e: webbrowser.open_new(help_url))
 
-        if not self.is_up_to_date():
-            slash = Label(links, text=" | ", fg="gray", cursor="hand2")
-            slash.pack( side = LEFT )
-                    
-            update_link = Label(links, text="Update ZipGrade Reporter", fg="blue", cursor="hand2")
-            update_link.pack( side = LEFT )
-            update_link.bind("<Button-1>", lambda e: webbrowser.open_new(help_url))
-
         links.grid(row=9, column=0, columnspan=1, padx=5, pady=5, sticky=(W))
+        self.links = links
+
+        # check for updates without holding up the window
+        self.update_available = None
+        threading.Thread(target=self.check_for_update, daemon=True).start()
+        self.master.after(250, self.show_update_link)
 
         version = Label(self.master, text=software_version, fg="gray")
         version.grid(row=9, column=1, columnspan=1, padx=5, pady=5, sticky=(E))
@@ -743,39 +5713,54 @@ class App:
         Checks the ZipGradeReporter website to see if application is latest version.
 
         Returns:
-            True if up-to-date, False otherwise
+            True if up-to-date or the latest version is unknown, False otherwise
         """
+        latest = get_latest_version()
 
-        try:
-            fp = urllib.request.urlopen(version_url)
-            mybytes = fp.read()
-            version_txt = mybytes.decode('utf8')
-            fp.close()
+        return latest is None or latest == software_version
+
+    def check_for_update(self):
+        """
+        Records whether an update is available. Runs on a background thread.
+        """
+        self.update_available = not self.is_up_to_date()
 
-            start_del = "StringStruct(u'FileVersion', u'"
-            end_del = "'),"
+    def show_update_link(self):
+        """
+        Adds the update link once the background check has finished.
+        """
+        import webbrowser
+        from tkinter import LEFT, Label
 
-            start_loc = version_txt.find(start_del) + len(start_del)
-            end_loc = version_txt.find(end_del, start_loc)
+        if self.update_available is None:
+            self.master.after(250, self.show_update_link)
+        elif self.update_available:
+            slash = Label(self.links, text=" | ", fg="gray", cursor="hand2")
+            slash.pack( side = LEFT )
 
-            version = 'v' + version_txt[start_loc: end_loc]
+            update_link = Label(self.links, text="Update ZipGrade Reporter", fg="blue", cursor="hand2")
+            update_link.pack( side = LEFT )
+            update_link.bind("<Button-1>", lambda e: webbrowser.open_new(help_url))
 
-            if version == software_version:
-                return True
-        except:
-            pass
-        
-        return False
-    
     def select_file(self):
         """
         Sets path to ZipGrade data file and sets export path to same directory.
+
+        Several exports of the same quiz (e.g. one for each class) can be
+        selected at once, and are merged into one report.
         """
 
-        self.import_path = askopenfilename()
-        self.export_path = os.path.dirname(self.import_path)
+        from tkinter.filedialog import askopenfilenames
+
+        paths = list(askopenfilenames(filetypes=[('CSV files', '*.csv'), ('All files', '*')]))
+
+        if len(paths) == 0:
+            return
+
+        self.import_path = paths[0] if len(paths) == 1 else paths
+        self.export_path = os.path.dirname(paths[0])
 
-        self.import_lbl_text.set(self.import_path)
+        self.import_lbl_text.set('\n'.join(paths))
         self.export_lbl_text.set(self.export_path)
 
     def change_export_path(self):
@@ -788,140 +5773,187 @@ class App:
 
     def get_export_filename(self, sheet):
         """
-        Gets path to save report.
-
-        The report file name is simply the quiz name and the export date. If no
-        quiz name exists, then the name will default to grade_report
-
-        Note:
-            ZipGrade date format: May 02 2018 02:14 PM (phone)
-                                  2019-09-18 00:00:00       (web)
-
+        Gets path to save report. See get_export_filename().
 
         Attributes:
             sheet (Scoresheet): Single scoresheet to extract quiz data from.
         """
+        return get_export_filename(sheet)
 
-        months = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04",
-                  "May": "05", "Jun": "06", "Jul": "07", "Aug": "08",
-                  "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
-        
-        title = sheet.quiz_name.strip()
-        if len(title) == 0:
-            title = "ZipGradeReport"
-
-        if "-" in sheet.date_exported:
-            date = sheet.date_exported.split("-")
-            yyyy = date[0]
-            mm = date[1]
-            dd = date[2][:2]
-        elif "/" in sheet.date_exported:
-            date = sheet.date_exported.split("/")
-            yyyy = date[2]
-            mm = date[0]
-            dd = date[1]
-        else:
-            date = sheet.date_exported.split(" ")
-            print(date)
-            yyyy = date[2]
-            mm = months[date[0]]
-            dd = date[1]
-
-        if int(dd) < 10:
-            dd = "0" + dd
-            
-        if int(mm) < 10:
-            mm = "0" + mm
-
-        temp = title + "_" + "_" + yyyy + mm + dd
-        filename = ""
-        underscore = True
-
-        for c in temp:
-            if c.isalnum():
-                filename += c
-                underscore = False
-            elif c == "_" and underscore == False:
-                filename += c
-                underscore = True
-            elif underscore == False:
-                filename += "_"
-                underscore = True
-
-        return filename  + ".docx"
-
-    def save(self, document):
+    def save(self, renderer):
         """
-        Sets save path for ZipGrade report.
+        Renders the ZipGrade report and saves it to save_path.
 
         Attributes:
-            document (docx.Document): Finalized document to save.
-        """
+            renderer (DocxRenderer): Renderer for the report.
 
-        try:
-            document.save(self.save_path)
-            self.status_lbl_text.set("Your report is ready!")
-        except:
-            self.status_lbl_text.set("Unable to save report. Check file and disk permissions.")
-
-    def fix_csv(self, header_str):
-        """
-        Replaces mobile app CSV headers with those from CSV file downloaded from
-        ZipGrade website.
+        Returns:
+            Status message for the user.
         """
 
-        if 'ZipGradeID' in header_str:
-            header_str = header_str.replace('ZipGradeID', 'StudentID')
-            header_str = header_str.replace('ExternalID', 'CustomID')
-            header_str = header_str.replace('EarnedPts', 'Earned Points')
-            header_str = header_str.replace('PossiblePts', 'Possible Points')
-            header_str = header_str.replace('Key', 'PriKey')
-            header_str = header_str.replace('PriKeyVersion', 'Key Version')
-            header_str = header_str.replace('EarnedPts', 'Earned Points')
-            header_str = header_str.replace('PossPt', 'Mark')
+        try:
+            save_file(self.save_path, renderer.render)
+            return "Your report is ready!"
+        except OSError:
+            return "Unable to save report. Check file and disk permissions."
 
-        return header_str
-                    
     def generate(self):
         """
         Reads ZipGrade CSV file and generates report.
 
         Valid CSV files begin with a single line with all data fields. Each subsiquent
         line contains individual student quiz data.
+
+        The report is generated on a background thread so that the window stays
+        responsive. Progress is shown in the progress bar, and the Cancel button
+        stops generation.
         """
-        
-        generated = False
+        from tkinter import DISABLED, NORMAL
 
-        if self.import_path != None:
-            try:
-                with open(self.import_path) as f:
-                    lines = f.readlines()
+        if not self.import_path:
+            self.status_lbl_text.set("You must select a file first!")
+            return
+
+        if self.worker is not None:
+            return
+
+        sections = [name for name in report_sections if self.section_vars[name].get()]
+
+        if len(sections) == 0:
+            self.status_lbl_text.set("Select at least one part of the report to create.")
+            return
+
+        self.cancel_requested.clear()
+        self.generate_button.config(state=DISABLED)
+        self.cancel_button.config(state=NORMAL)
+        self.progress_bar['value'] = 0
+        self.status_lbl_text.set("Reading data file...")
+
+        self.worker = threading.Thread(target=self.run_generate,
+                                       args=(self.import_path, self.export_path, sections), daemon=True)
+        self.worker.start()
+        self.master.after(100, self.poll_generate)
+
+    def run_generate(self, import_path, export_path, sections=report_sections):
+        """
+        Generates and saves the report. Runs on the worker thread.
 
-                header = lines[0]
-                header = self.fix_csv(header)
+        Results are passed back to the GUI through the message queue, since
+        Tk may only be used from the main thread.
 
-                all_sheets = []
+        Args:
+            import_path (str): Path to CSV file, or list of paths to merge.
+            export_path (str): Directory to save the report in.
+            sections (list): Names of the report sections to include.
+        """
+        instruments = Instrumentation()
+
+        try:
+            with instruments.stage('read'):
+                matrix = read_exports(import_path, os.cpu_count() or 1, self.report_progress)
+
+            instruments.count('rows_kept', matrix.num_rows)
+            self.report_progress(0, 1, 'Sorting students')
+
+            with instruments.stage('index'):
+                r = Report(matrix)
+
+            self.report_progress(0, 1, 'Loading the last report')
+
+            with instruments.stage('cache', 'load'):
+                cache = ReportCache(matrix)
+
+            with instruments.stage('compute'):
+                model = r.get_model(sections, cache, self.report_progress)
+
+            instruments.add_timings('compute', model.timings)
+
+            self.check_cancelled()
+            self.save_path = export_path + '/' + self.get_export_filename(r.scoresheets[0])
+            renderer = DocxRenderer(model, progress=self.report_progress, fragments=cache.fragments)
+
+            with instruments.stage('docx'):
+                status = self.save(renderer)
+
+            instruments.add_timings('docx', renderer.timings)
+            cache.save(model)
+        except GenerationCancelled:
+            status = "Report generation cancelled."
+        except Exception:
+            status = "Something went wrong. Be sure your CSV data file is valid."
+
+        # kept for troubleshooting slow reports
+        try:
+            instruments.save(os.path.join(get_cache_dir(), 'last_report.timings.json'))
+        except OSError:
+            pass
 
-                for line in lines[1:]:
-                    sheet = Scoresheet(header, line)
-                    all_sheets.append(sheet)
+        self.messages.put(('done', status))
 
-                r = Report(all_sheets)
-                document = r.generate()
-                generated = True
+    def check_cancelled(self):
+        """
+        Stops the worker thread if the user has cancelled.
+
+        Raises:
+            GenerationCancelled: If cancel() has been called.
+        """
+        if self.cancel_requested.is_set():
+            raise GenerationCancelled()
+
+    def report_progress(self, done, total, message):
+        """
+        Progress callback for reading, computing and rendering the report.
+        Runs on the worker thread.
 
-            except Exception as inst:
-                self.status_lbl_text.set("Something went wrong. Be sure your CSV data file is valid.")
+        Args:
+            done (int): Steps completed.
+            total (int): Total number of steps.
+            message (str): Description of the step just completed.
+        """
+        self.check_cancelled()
+        self.messages.put(('progress', done, total, message))
 
-            if generated:
-                self.save_path = self.export_path + '/' + self.get_export_filename(all_sheets[0])
-                self.save(document)
+    def poll_generate(self):
+        """
+        Shows messages from the worker thread and checks whether it is done.
+        """
+        from tkinter import DISABLED, NORMAL
+
+        finished = False
+
+        while not self.messages.empty():
+            message = self.messages.get()
+
+            if message[0] == 'progress':
+                done, total, text = message[1:]
+                self.progress_bar['maximum'] = total
+                self.progress_bar['value'] = done
+                if not self.cancel_requested.is_set():
+                    self.status_lbl_text.set(text + "...")
+            else:
+                self.status_lbl_text.set(message[1])
+                finished = True
+
+        if finished:
+            self.worker = None
+            self.generate_button.config(state=NORMAL)
+            self.cancel_button.config(state=DISABLED)
+            self.progress_bar['value'] = 0
         else:
-            self.status_lbl_text.set("You must select a file first!")
+            self.master.after(100, self.poll_generate)
+
+    def cancel(self):
+        """
+        Asks the worker thread to stop generating the report.
+        """
+        if self.worker is not None:
+            self.cancel_requested.set()
+            self.status_lbl_text.set("Cancelling...")
 
 
 # Let's do this!
 if __name__ == "__main__":
-    root = Tk()
-    my_gui = App(root)
-    root.mainloop()
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+    sys.exit(main())
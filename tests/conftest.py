@@ -0,0 +1,89 @@
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_dir, 'src'))
+
+import zipgrade_reporter as zgr
+
+sample_path = os.path.join(repo_dir, 'sample', 'sample_data.csv')
+
+layouts = {
+    'web': (['QuizName', 'QuizClass', 'FirstName', 'LastName', 'StudentID', 'CustomID', 'Earned Points',
+             'Possible Points', 'PercentCorrect', 'QuizCreated', 'DataExported', 'Key Version'],
+            ('Stu', 'PriKey', 'Points', 'Mark')),
+    'phone': (['QuizName', 'QuizClass', 'FirstName', 'LastName', 'ZipGradeID', 'ExternalID', 'EarnedPts',
+               'PossiblePts', 'PercentCorrect', 'QuizCreated', 'DataExported', 'KeyVersion'],
+              ('Stu', 'Key', 'PossPt')),
+}
+
+
+def export_text(students, key='AB', quiz_name='Unit Quiz', created='10/8/2019 0:00',
+                exported='10/10/2019 15:23', export_format='web'):
+    """
+    Writes a small ZipGrade export as CSV text, one point per question.
+
+    Args:
+        students (list): A dict for each student with their 'answers' (a
+            string of one letter per question, or a list of answers) and
+            optionally 'class_name', 'first', 'last', 'zip_id', and 'version'.
+        key (str): Correct answer to each question, or a dict of them for
+            each key version.
+        quiz_name (str): Name of the quiz.
+        created (str): QuizCreated date.
+        exported (str): DataExported date.
+        export_format (str): 'web' or 'phone'.
+    """
+    metadata, prefixes = layouts[export_format]
+    num_questions = len(key if isinstance(key, str) else next(iter(key.values())))
+
+    f = io.StringIO()
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(metadata + [p + str(q) for q in range(1, num_questions + 1) for p in prefixes])
+
+    for s in students:
+        version = s.get('version', '1')
+        correct = key if isinstance(key, str) else key[version]
+        marks = [int(a == k) for a, k in zip(s['answers'], correct)]
+        earned = sum(marks)
+
+        row = [quiz_name, s.get('class_name', 'Period 1'), s.get('first', 'Ann'), s.get('last', 'Lee'),
+               s.get('zip_id', '101'), '', earned, num_questions, round(earned / num_questions * 100, 2),
+               created, exported, version]
+
+        for a, k, m in zip(s['answers'], correct, marks):
+            row += [a, k, m, 'C' if m else 'X'] if export_format == 'web' else [a, k, 1]
+
+        writer.writerow(row)
+
+    return f.getvalue()
+
+
+@pytest.fixture
+def export():
+    """Makes a ScoreMatrix from the arguments of export_text()."""
+    def make(students, **kwargs):
+        return zgr.load_matrix(io.StringIO(export_text(students, **kwargs)))
+
+    return make
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    """Saves an export made from the arguments of export_text() and returns its path."""
+    def make(students, name='export.csv', **kwargs):
+        path = tmp_path / name
+        path.write_text(export_text(students, **kwargs))
+        return str(path)
+
+    return make
+
+
+@pytest.fixture
+def sample_matrix():
+    """Reads the sample export that ships with the repo."""
+    return zgr.read_export(sample_path)
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+import zipgrade_reporter as zgr
+
+
+def saved(directory, extension):
+    # Names of the files with an extension in a directory.
+    return sorted(name for name in os.listdir(directory) if name.endswith(extension))
+
+
+def test_report_is_saved_next_to_the_export(capsys, export_file):
+    path = export_file([{'answers': 'AB'}])
+
+    assert zgr.main([path]) == 0
+    assert saved(os.path.dirname(path), '.docx') == ['Unit_Quiz_20191010.docx']
+    assert '1 report(s) generated, 0 failed.' in capsys.readouterr().out
+
+
+def test_formats_sections_and_output_directory(tmp_path, export_file):
+    path = export_file([{'answers': 'AB'}])
+    output = tmp_path / 'reports'
+    output.mkdir()
+
+    assert zgr.main([path, '-o', str(output), '-f', 'json', '-f', 'html', '--only', 'cover',
+                     '--only', 'individual', '--skip', 'cover']) == 0
+    assert saved(output, '.json') == ['Unit_Quiz_20191010.json']
+    assert saved(output, '.html') == ['Unit_Quiz_20191010.html']
+    assert saved(output, '.docx') == []
+
+    with open(output / 'Unit_Quiz_20191010.json') as f:
+        assert json.load(f)['sections'] == ['individual']
+
+
+def test_missing_files_fail_without_stopping_the_rest(capsys, tmp_path, export_file):
+    path = export_file([{'answers': 'AB'}])
+
+    assert zgr.main([path, str(tmp_path / 'missing.csv')]) == 1
+
+    out, err = capsys.readouterr()
+    assert '1 report(s) generated, 1 failed.' in out
+    assert 'missing.csv: No such file or directory' in err
+
+
+def test_merge_makes_one_report(capsys, export_file):
+    first = export_file([{'answers': 'AB', 'class_name': 'Period 1'}], name='p1.csv')
+    second = export_file([{'answers': 'BB', 'class_name': 'Period 2', 'zip_id': '102'}], name='p2.csv')
+
+    assert zgr.main([first, second, '--merge', '-f', 'json']) == 0
+    assert '1 report(s) generated' in capsys.readouterr().out
+
+    with open(os.path.join(os.path.dirname(first), 'Unit_Quiz_20191010.json')) as f:
+        assert json.load(f)['classes'] == ['Period 1', 'Period 2']
+
+
+def test_progress_report_replaces_the_quiz_reports(tmp_path, export_file):
+    path = export_file([{'answers': 'AB'}])
+    save_path = tmp_path / 'progress.docx'
+
+    assert zgr.main([path, '--progress', str(save_path)]) == 0
+    assert save_path.exists()
+    assert saved(tmp_path, '.docx') == ['progress.docx']
+
+
+@pytest.mark.parametrize('args, message', [(['--jobs', '0'], '--jobs must be at least 1'),
+                                           (['--only', 'cover', '--skip', 'cover'], 'no report sections selected'),
+                                           (['-o', 'no/such/dir'], 'output directory does not exist')])
+def test_bad_arguments_exit_with_usage_error(capsys, export_file, args, message):
+    path = export_file([{'answers': 'AB'}])
+
+    with pytest.raises(SystemExit) as excinfo:
+        zgr.main([path] + args)
+
+    assert excinfo.value.code == 2
+    assert message in capsys.readouterr().err
@@ -0,0 +1,62 @@
+import io
+import zipfile
+
+from docx.oxml.ns import qn
+
+import zipgrade_reporter as zgr
+
+
+def document_text(document):
+    # Every run of text, including those in tables, in document order.
+    return [node.text or '' for node in document.element.body.iter(qn('w:t'))]
+
+
+def test_parallel_report_matches_serial(sample_matrix):
+    report = zgr.Report(sample_matrix)
+
+    assert document_text(report.generate(jobs=2)) == document_text(report.generate(jobs=1))
+
+
+def test_parallel_class_documents_match_serial(sample_matrix):
+    report = zgr.Report(sample_matrix)
+    serial = report.generate_class_documents(jobs=1)
+    parallel = report.generate_class_documents(jobs=2)
+
+    assert list(parallel) == list(serial)
+    for class_name, document in serial.items():
+        assert document_text(parallel[class_name]) == document_text(document)
+
+
+def rendered_xml(model, jobs, fragments=None):
+    # The document part of the report saved by render().
+    f = io.BytesIO()
+    zgr.DocxRenderer(model, jobs=jobs, fragments=fragments).render(f)
+    with zipfile.ZipFile(f) as package:
+        return package.read('word/document.xml')
+
+
+def test_render_with_workers_matches_serial(monkeypatch, sample_matrix):
+    monkeypatch.setattr(zgr, 'individual_chunk_size', 3)
+    model = zgr.Report(sample_matrix).get_model()
+
+    assert rendered_xml(model, 2) == rendered_xml(model, 1)
+
+
+def test_render_with_workers_fills_and_reuses_fragments(monkeypatch, sample_matrix):
+    monkeypatch.setattr(zgr, 'individual_chunk_size', 3)
+    model = zgr.Report(sample_matrix).get_model()
+    model.fingerprints = {c: [c + str(i) for i in range(len(s))] for c, s in model.students.items()}
+    fragments = {}
+
+    first = rendered_xml(model, 2, fragments)
+
+    assert len(fragments) == model.num_students
+    assert rendered_xml(model, 2, fragments) == first
+
+
+def test_class_score_rows_keep_the_wide_name_column(sample_matrix):
+    document = zgr.Report(sample_matrix).generate(sections=('classes',))
+
+    for table in document.tables:
+        assert [cell.width for cell in table.rows[-1].cells] == [cell.width for cell in table.rows[0].cells]
+        assert table.rows[-1].cells[0].width.inches == 3.0
@@ -0,0 +1,47 @@
+import numpy as np
+
+import zipgrade_reporter as zgr
+
+
+def analysis(export, answers, key):
+    # Item analysis of every student, who all took the same key.
+    matrix = export([{'answers': a} for a in answers], key=key)
+    matrix.trim()
+
+    return zgr.ItemAnalysis(matrix, np.arange(matrix.num_rows))
+
+
+def test_item_statistics(export):
+    items = analysis(export, ['AB', 'AC', 'BB', 'CC'], 'AB')
+
+    assert items.question_numbers.tolist() == [1, 2]
+    assert items.keys == ['A', 'B']
+    assert items.misses.tolist() == [2, 2]
+    assert items.percent_missed.tolist() == [50, 50]
+    assert items.p_values.tolist() == [0.5, 0.5]
+    assert np.allclose(items.point_biserial, [0.7071, 0.7071], atol=1e-4)
+    assert items.discrimination.tolist() == [1, 1]
+
+
+def test_distractors_are_most_common_first(export):
+    items = analysis(export, ['AB', 'AC', 'BB', 'CC'], 'AB')
+
+    assert items.options == ['A', 'B', 'C']
+    assert items.distractors(0) == [('A', 2), ('B', 1), ('C', 1)]
+    assert items.distractors(1) == [('B', 2), ('C', 2)]
+
+
+def test_unkeyed_questions_are_left_out(export):
+    items = analysis(export, ['AB', 'BA'], {'1': ['A', '']})
+
+    assert items.question_numbers.tolist() == [1]
+    assert items.misses.tolist() == [1]
+
+
+def test_no_students(export):
+    matrix = export([{'answers': 'AB'}])
+    matrix.trim()
+    items = zgr.ItemAnalysis(matrix, np.zeros(0, dtype=np.intp))
+
+    assert items.num_students == 0
+    assert len(items.question_numbers) == 0
@@ -0,0 +1,28 @@
+import zipgrade_reporter as zgr
+
+
+def exported_at(export, exported, answer):
+    # One student's single-question quiz, exported at the given time.
+    return export([{'answers': answer}], key='A', exported=exported)
+
+
+def test_zipgrade_timestamp_reads_each_format():
+    assert zgr.zipgrade_timestamp('May 02 2018 02:14 PM') == '2018-05-02 14:14:00'
+    assert zgr.zipgrade_timestamp('May 02 2018 12:14 AM') == '2018-05-02 00:14:00'
+    assert zgr.zipgrade_timestamp('2019-09-18 13:04:05') == '2019-09-18 13:04:05'
+    assert zgr.zipgrade_timestamp('10/10/2019 9:05') == '2019-10-10 09:05:00'
+
+
+def test_later_export_on_the_same_day_wins(export):
+    merged = zgr.merge_matrices([exported_at(export, '10/10/2019 15:23', 'A'),
+                                 exported_at(export, '10/10/2019 9:05', 'B')])
+
+    assert merged.num_rows == 1
+    assert merged.metadata['date_exported'] == ['10/10/2019 15:23']
+
+
+def test_later_file_wins_when_timestamps_are_equal(export):
+    merged = zgr.merge_matrices([exported_at(export, '10/10/2019 15:23', 'A'),
+                                 exported_at(export, '10/10/2019 15:23', 'B')])
+
+    assert merged.responses.tolist() == [['B']]
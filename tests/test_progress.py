@@ -0,0 +1,45 @@
+import zipgrade_reporter as zgr
+
+
+def add(progress, export, quiz_name, created, exported, answers):
+    # Adds an export of a two-question quiz from (ZipGrade ID, answers) pairs.
+    progress.add_matrix(export([{'zip_id': zip_id, 'answers': a} for zip_id, a in answers],
+                               quiz_name=quiz_name, created=created, exported=exported))
+
+
+def test_reexported_quiz_counts_once_with_latest_scores(export):
+    progress = zgr.ProgressReport()
+    add(progress, export, 'Quiz 1', '11/1/2019 0:00', '11/2/2019 15:00', [('7', 'AC'), ('8', 'CC')])
+    add(progress, export, 'Quiz 1', '11/1/2019 0:00', '11/2/2019 9:00', [('7', 'CC')])
+    add(progress, export, 'Quiz 1', '11/1/2019 0:00', '11/3/2019 8:00', [('8', 'AB')])
+
+    students, table, starts = progress.get_scores()
+
+    assert len(progress.quizzes) == 1
+    assert table[:, 1].tolist() == [50.0, 100.0]
+    assert progress.get_recurring() == {}
+
+
+def test_recurring_misses_are_matched_by_quiz_name(export):
+    progress = zgr.ProgressReport()
+    add(progress, export, 'Quiz 1', '11/1/2019 0:00', '11/1/2019 15:00', [('7', 'AC')])
+    add(progress, export, 'Quiz 2', '11/8/2019 0:00', '11/8/2019 15:00', [('7', 'AC')])
+    add(progress, export, 'Quiz 1', '11/15/2019 0:00', '11/15/2019 15:00', [('7', 'CC')])
+
+    recurring = progress.get_recurring()
+
+    assert len(progress.quizzes) == 3
+    assert [(progress.item_names[item], missed, asked) for item, missed, asked in recurring[0]] == \
+        [(('Quiz 1', 2), 2, 2)]
+
+
+def test_phone_and_web_exports_of_one_quiz_count_once(export):
+    progress = zgr.ProgressReport()
+    progress.add_matrix(export([{'zip_id': '7', 'answers': 'AC'}], created='Oct 08 2019 08:00 AM',
+                               exported='Oct 10 2019 03:23 PM', export_format='phone'))
+    progress.add_matrix(export([{'zip_id': '8', 'answers': 'AB'}], created='2019-10-08 08:00:00',
+                               exported='2019-10-10 15:30:00'))
+
+    assert progress.quizzes == [('2019-10-08', 'Unit Quiz')]
+    assert zgr.quiz_identity('Unit Quiz', 'Oct 08 2019 08:00 AM') == \
+        zgr.quiz_identity('Unit Quiz', '2019-10-08 08:00:00')
@@ -0,0 +1,55 @@
+import zipgrade_reporter as zgr
+
+
+students = [{'answers': 'AB', 'first': 'Ann', 'last': 'Zed', 'class_name': 'Period 2', 'version': '1'},
+            {'answers': 'AB', 'first': 'Bo', 'last': 'Lee', 'class_name': 'Period 1', 'version': '2'},
+            {'answers': 'AB', 'first': 'Cy', 'last': 'Kim', 'class_name': 'Period 2', 'version': '2'},
+            {'answers': 'AB', 'first': 'Di', 'last': 'Ames', 'class_name': 'Period 1', 'version': '1'}]
+
+
+def names(report, rows):
+    # Names of the students in some matrix rows, in the same order.
+    return [report.get_names()[i] for i in rows.tolist()]
+
+
+def test_rows_are_indexed_by_class_and_version_in_name_order(export):
+    report = zgr.Report(export(students, key={'1': 'AB', '2': 'BA'}))
+
+    assert report.classes == ['Period 1', 'Period 2']
+    assert report.versions == ['1', '2']
+    assert names(report, report.get_rows()) == ['Ames, Di', 'Kim, Cy', 'Lee, Bo', 'Zed, Ann']
+    assert names(report, report.get_rows('Period 2')) == ['Kim, Cy', 'Zed, Ann']
+    assert names(report, report.get_rows(key_version='1')) == ['Ames, Di', 'Zed, Ann']
+    assert names(report, report.get_rows('Period 1', '2')) == ['Lee, Bo']
+    assert [s.first_name for s in report.get_sheets_by_class('Period 1')] == ['Di', 'Bo']
+
+
+def test_missing_groups_have_no_rows(export):
+    report = zgr.Report(export(students, key={'1': 'AB', '2': 'BA'}))
+
+    assert len(report.get_rows('Period 3')) == 0
+    assert report.get_sheets('Period 1', '3') == []
+
+
+def test_unselected_sections_are_not_computed(monkeypatch, export):
+    report = zgr.Report(export(students, key={'1': 'AB', '2': 'BA'}))
+
+    def fail(*args):
+        raise AssertionError('computed an unselected section')
+
+    for method in ('get_student_report', 'get_class_rows', 'get_difficulty', 'get_similar_pairs'):
+        monkeypatch.setattr(report, method, fail)
+
+    model = report.get_model(['flagged', 'cover'])
+
+    assert model.sections == ('cover', 'flagged')
+    assert model.students == {} and model.class_rows == {} and model.difficulty == {}
+    assert model.cover_info != [] and model.summary_statistics == []
+
+
+def test_unselected_sections_are_not_rendered(export):
+    report = zgr.Report(export(students, key={'1': 'AB', '2': 'BA'}))
+    text = '\n'.join(p.text for p in report.generate(sections=['individual']).paragraphs)
+
+    assert 'Zed, Ann (ID: 101)' in text
+    assert 'Quiz Name' not in text and 'Difficulty' not in text
@@ -0,0 +1,72 @@
+import io
+
+import zipgrade_reporter as zgr
+
+
+students = [{'answers': 'AB', 'first': 'Ann', 'zip_id': '101'},
+            {'answers': 'BB', 'first': 'Bo', 'zip_id': '102'},
+            {'answers': 'AA', 'first': 'Cy', 'zip_id': '103'}]
+
+
+def run(export, path, students, sections=zgr.report_sections):
+    # Makes a report's model with the cache at path, renders it, and saves the cache.
+    matrix = export(students)
+    cache = zgr.ReportCache(matrix, str(path))
+    model = zgr.Report(matrix).get_model(sections, cache)
+    zgr.DocxRenderer(model, fragments=cache.fragments).render(io.BytesIO())
+    cache.save(model)
+
+    return cache, model
+
+
+def test_unchanged_export_reuses_the_whole_model(tmp_path, export):
+    path = tmp_path / 'cache.pickle'
+    first, model = run(export, path, students)
+    second, reused = run(export, path, students)
+
+    assert (first.hits, first.misses) == (0, 3)
+    assert (second.hits, second.misses) == (3, 0)
+    assert reused.students == model.students
+    assert reused.class_rows == model.class_rows
+
+
+def test_only_changed_students_are_recomputed(tmp_path, export):
+    path = tmp_path / 'cache.pickle'
+    run(export, path, students)
+
+    changed = students[:2] + [dict(students[2], answers='AB')]
+    cache, model = run(export, path, changed)
+
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert [s.items for s in model.students['Period 1']] == [['1. A', '2. B'], ['1. B (A)', '2. B'],
+                                                             ['1. A', '2. B']]
+
+
+def test_other_sections_recompute_the_model_but_reuse_students(tmp_path, export):
+    path = tmp_path / 'cache.pickle'
+    run(export, path, students)
+    cache, model = run(export, path, students, sections=('individual',))
+
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert model.sections == ('individual',)
+    assert model.class_rows == {}
+
+
+def test_fragments_are_kept_for_current_students_only(tmp_path, export):
+    path = tmp_path / 'cache.pickle'
+    run(export, path, students)
+    run(export, path, students[:2])
+
+    cache = zgr.ReportCache(export(students[:2]), str(path))
+
+    assert sorted(cache.fragments) == sorted(cache.fingerprints)
+
+
+def test_unreadable_cache_is_treated_as_empty(tmp_path, export):
+    path = tmp_path / 'cache.pickle'
+    path.write_bytes(b'not a pickle')
+
+    cache, model = run(export, path, students)
+
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert zgr.ReportCache(export(students), str(path)).students != {}
@@ -0,0 +1,43 @@
+import zipgrade_reporter as zgr
+
+
+def add(store, export, class_name, answers, exported='10/10/2019 15:23'):
+    return store.add_matrix(export([{'class_name': class_name, 'zip_id': zip_id, 'answers': a}
+                                    for zip_id, a in answers], exported=exported))
+
+
+def classes(store, quiz_id):
+    return sorted(store.matrix(quiz_id).metadata['class_name'])
+
+
+def test_per_class_exports_of_one_quiz_are_kept(tmp_path, export):
+    with zgr.ResultStore(str(tmp_path / 'results.db')) as store:
+        first = add(store, export, 'Period 1', [('101', 'AB'), ('102', 'AC')])
+        second = add(store, export, 'Period 2', [('201', 'AB'), ('202', 'AB'), ('203', 'AD')])
+
+        assert first == second
+        assert len(store.quizzes()) == 1
+        assert classes(store, first) == ['Period 1'] * 2 + ['Period 2'] * 3
+
+
+def test_reexported_class_replaces_only_its_own_scores(tmp_path, export):
+    with zgr.ResultStore(str(tmp_path / 'results.db')) as store:
+        quiz_id = add(store, export, 'Period 1', [('101', 'AB'), ('102', 'AC')])
+        add(store, export, 'Period 2', [('201', 'AB')])
+        add(store, export, 'Period 1', [('101', 'AB'), ('102', 'AB')], exported='10/11/2019 8:00')
+
+        assert classes(store, quiz_id) == ['Period 1', 'Period 1', 'Period 2']
+        assert [row['percent_correct'] for row in store.student_history('102')] == [100.0]
+        assert store.quizzes()[0]['date_exported'] == '10/11/2019 8:00'
+
+
+def test_phone_and_web_exports_of_one_quiz_are_one_quiz(tmp_path, export):
+    with zgr.ResultStore(str(tmp_path / 'results.db')) as store:
+        first = store.add_matrix(export([{'class_name': 'Period 1', 'answers': 'AB'}], export_format='phone',
+                                        created='Oct 08 2019 08:00 AM', exported='Oct 10 2019 03:23 PM'))
+        second = store.add_matrix(export([{'class_name': 'Period 2', 'zip_id': '201', 'answers': 'AB'}],
+                                         created='2019-10-08 08:00:00', exported='2019-10-10 15:30:00'))
+
+        assert first == second
+        assert [tuple(row)[1:3] for row in store.quizzes()] == [('Unit Quiz', '2019-10-08 08:00')]
+        assert classes(store, first) == ['Period 1', 'Period 2']
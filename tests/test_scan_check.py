@@ -0,0 +1,42 @@
+import zipgrade_reporter as zgr
+
+
+def flagged(export, students, key):
+    # Class, name, questions, and reasons for each flagged paper.
+    return zgr.Report(export(students, key=key)).get_flagged('Period 1')
+
+
+def test_marks_that_differ_from_the_key(export):
+    students = [{'answers': ['A', '', 'C'], 'first': 'Blank'},
+                {'answers': ['AB', 'B', 'CD'], 'first': 'Extra'},
+                {'answers': ['A', 'B', 'C'], 'first': 'Missing'},
+                {'answers': ['A', 'B', 'CD'], 'first': 'Right'}]
+
+    assert flagged(export, students, {'1': ['A', 'B', 'CD']}) == [
+        ['Period 1', 'Lee, Blank', "'2', '3'", '1 blank; 1 missing mark'],
+        ['Period 1', 'Lee, Extra', "'1'", '1 extra mark'],
+        ['Period 1', 'Lee, Missing', "'3'", '1 missing mark']]
+
+
+def test_long_run_of_an_answer_not_in_the_key(export):
+    students = [{'answers': 'AAAAAAAAAA', 'first': 'Run'}, {'answers': 'ABCDABCDAB', 'first': 'Right'}]
+
+    assert flagged(export, students, 'ABCDABCDAB') == [['Period 1', 'Lee, Run', 'None',
+                                                        '10 same answers in a row']]
+
+
+def test_same_answers_with_several_wrong(export):
+    students = [{'answers': 'ABDCAB', 'first': 'Copy'}, {'answers': 'ABDCAB', 'first': 'Scan'},
+                {'answers': 'ABCDCD', 'first': 'Right'}, {'answers': 'ABCDCD', 'first': 'Same'}]
+
+    assert flagged(export, students, 'ABCDCD') == [
+        ['Period 1', 'Lee, Copy', 'None', 'same answers as Lee, Scan'],
+        ['Period 1', 'Lee, Scan', 'None', 'same answers as Lee, Copy']]
+
+
+def test_score_far_from_the_rest(export):
+    key = 'ABCDABCDAB'
+    students = [{'answers': key[:n] + 'DCBADCBADC'[n:], 'first': str(i)} for i, n in enumerate([8, 9] * 4)]
+    students.append({'answers': 'DCBADCBADC', 'first': 'Low'})
+
+    assert flagged(export, students, key) == [['Period 1', 'Lee, Low', 'None', 'score far below the rest']]
@@ -0,0 +1,118 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import zipgrade_reporter as zgr
+from conftest import layouts
+
+
+students = [{'answers': 'AB', 'first': 'Ann', 'last': 'Lee', 'zip_id': '101'},
+            {'answers': 'BB', 'first': 'Bo', 'last': 'Kim', 'zip_id': '102'},
+            {'answers': ['A', ''], 'first': 'Cy', 'last': 'Ng', 'zip_id': '103', 'class_name': 'Period 2'}]
+
+
+def test_rows_are_stored_as_columns(export):
+    matrix = export(students)
+    matrix.trim()
+
+    assert matrix.num_rows == 3
+    assert matrix.question_numbers.tolist() == [1, 2]
+    assert matrix.metadata['first_name'] == ['Ann', 'Bo', 'Cy']
+    assert matrix.metadata['class_name'] == ['Period 1', 'Period 1', 'Period 2']
+    assert matrix.responses.tolist() == [['A', 'B'], ['B', 'B'], ['A', '']]
+    assert matrix.keys.tolist() == [['A', 'B']] * 3
+    assert matrix.earned_points.tolist() == [2, 1, 1]
+    assert matrix.percent_correct.tolist() == [100, 50, 50]
+    assert matrix.correct.tolist() == [[True, True], [False, True], [True, False]]
+
+
+def test_rows_appended_in_chunks_match_one_chunk(monkeypatch, export):
+    whole = export(students)
+    whole.trim()
+
+    monkeypatch.setattr(zgr.ScoreMatrix, 'chunk_size', 2)
+    chunked = export(students)
+    chunked.trim()
+
+    for name in zgr.ScoreMatrix.array_columns:
+        assert np.array_equal(getattr(chunked, name), getattr(whole, name))
+    assert chunked.metadata == whole.metadata
+
+
+def test_scoresheet_reads_its_row(export):
+    matrix = export(students)
+    matrix.trim()
+    sheet = zgr.Scoresheet(matrix, 1)
+
+    assert (sheet.first_name, sheet.zip_id, sheet.earned_points) == ('Bo', '102', '1')
+    assert sheet.responses == [{'question': 1, 'answer': 'B', 'correct': 'A'},
+                               {'question': 2, 'answer': 'B', 'correct': 'B'}]
+
+
+def test_subset_keeps_only_the_given_rows(export):
+    matrix = export(students).subset([2, 0])
+
+    assert matrix.num_rows == 2
+    assert matrix.metadata['zip_id'] == ['103', '101']
+    assert matrix.responses.tolist() == [['A', ''], ['A', 'B']]
+
+
+def test_quoted_commas_stay_in_one_field(export):
+    matrix = export([{'answers': 'AB', 'last': 'Smith, Jr.'}])
+    matrix.trim()
+
+    assert matrix.metadata['last_name'] == ['Smith, Jr.']
+    assert matrix.metadata['first_name'] == ['Ann']
+    assert matrix.responses.tolist() == [['A', 'B']]
+
+
+def test_multiple_answers_widen_the_answer_columns(export):
+    matrix = export([{'answers': ['AC', 'B']}, {'answers': 'AB'}], key={'1': ['AC', 'B']})
+    matrix.trim()
+
+    assert matrix.responses.tolist() == [['AC', 'B'], ['A', 'B']]
+    assert matrix.earned_points.tolist() == [2, 1]
+
+
+def test_blank_lines_are_skipped_and_progress_is_reported(monkeypatch, export_file):
+    monkeypatch.setattr(zgr.ScoreMatrix, 'chunk_size', 2)
+    path = export_file([{'answers': 'AB'}] * 5)
+    with open(path, 'a') as f:
+        f.write('\n\n')
+    reported = []
+
+    matrix = zgr.read_export(path, progress=reported.append)
+
+    assert matrix.num_rows == 5
+    assert reported == [2, 4]
+
+
+def test_phone_and_web_exports_read_the_same(export):
+    web = export(students, export_format='web')
+    phone = export(students, export_format='phone')
+    web.trim()
+    phone.trim()
+
+    assert (web.schema.flavor, phone.schema.flavor) == ('web', 'phone')
+    assert phone.schema.header_fields[:12] == web.schema.header_fields[:12]
+    assert phone.schema.points_index == [None, None]
+    assert phone.metadata == web.metadata
+    for name in ('earned_points', 'responses', 'keys'):
+        assert np.array_equal(getattr(phone, name), getattr(web, name))
+
+
+def test_schema_needs_every_metadata_column():
+    metadata, _ = layouts['web']
+
+    with pytest.raises(ValueError, match='Missing columns: QuizClass'):
+        zgr.Schema([c for c in metadata if c != 'QuizClass'] + ['Stu1', 'PriKey1'])
+
+
+def test_schemas_are_compiled_once_and_pickle_by_header():
+    header = layouts['phone'][0] + ['Stu1', 'Key1', 'PossPt1']
+    schema = zgr.compile_schema(header)
+
+    assert zgr.compile_schema(list(header)) is schema
+    assert pickle.loads(pickle.dumps(schema)) is schema
+    assert schema.question_numbers == (1,)
@@ -0,0 +1,57 @@
+import math
+import random
+
+import numpy as np
+
+import zipgrade_reporter as zgr
+
+
+key = 'ABCDE' * 4
+
+
+def paper(rng, num_wrong):
+    # A paper with wrong answers picked at random.
+    answers = list(key)
+    for q in rng.sample(range(len(key)), num_wrong):
+        answers[q] = rng.choice([c for c in 'ABCDE' if c != key[q]])
+
+    return ''.join(answers)
+
+
+def class_with_copier(copier_version='1'):
+    # Sixteen students working alone, and two sharing twelve wrong answers.
+    rng = random.Random(1)
+    students = [{'answers': paper(rng, 8), 'first': 'S{:02}'.format(i)} for i in range(16)]
+    copied = paper(rng, 12)
+    students += [{'answers': copied, 'first': 'Copier', 'version': copier_version},
+                 {'answers': copied, 'first': 'Source'}]
+
+    return students
+
+
+def test_pair_sharing_many_wrong_answers_is_flagged(export):
+    report = zgr.Report(export(class_with_copier(), key={'1': key, '2': key}))
+
+    pairs = report.get_similar_pairs('Period 1')
+
+    assert [pair[:4] for pair in pairs] == [['Period 1', 'Lee, Copier', 'Lee, Source', '12 of 12']]
+
+
+def test_students_working_alone_are_not_flagged(export):
+    report = zgr.Report(export(class_with_copier()[:16], key={'1': key}))
+
+    assert report.get_similar_pairs('Period 1') == []
+
+
+def test_only_students_with_the_same_key_version_are_compared(export):
+    report = zgr.Report(export(class_with_copier('2'), key={'1': key, '2': key}))
+
+    assert report.get_similar_pairs('Period 1') == []
+
+
+def test_binomial_tail():
+    counts, trials, p = np.array([0, 3, 5]), np.array([5, 5, 5]), np.array([0.2, 0.2, 0.5])
+    expected = [sum(math.comb(n, x) * q ** x * (1 - q) ** (n - x) for x in range(k, n + 1))
+                for k, n, q in zip(counts.tolist(), trials.tolist(), p.tolist())]
+
+    assert np.allclose(zgr.AnswerSimilarity.binomial_tail(counts, trials, p), expected)
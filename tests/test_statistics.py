@@ -0,0 +1,36 @@
+import numpy as np
+
+import zipgrade_reporter as zgr
+
+
+def summary(report):
+    # The summary statistics as a flat label -> value dict.
+    return {label: value for group in report.get_summary_statistics() for label, value in group}
+
+
+def test_statistics_of_raw_scores_and_percentages():
+    stats = zgr.ScoreStatistics(np.array([4, 1, 3, 2]), np.array([80, 20, 60, 40]))
+
+    assert stats.num_scores == 4
+    assert (stats.mean_raw, stats.mean_pct) == (2.5, 50)
+    assert (stats.median_raw, stats.median_pct) == (2.5, 50)
+    assert (stats.st_dev_raw, stats.st_dev_pct) == (1.29, 25.82)
+    assert (stats.min_raw, stats.max_raw) == (1, 4)
+    assert (stats.q1_raw, stats.q3_raw) == (1.5, 3.5)
+    assert (stats.q1_pct, stats.q3_pct) == (30, 70)
+
+
+def test_median_raw_comes_from_the_raw_scores(export):
+    report = zgr.Report(export([{'answers': 'AAAA'}, {'answers': 'AAAB'}, {'answers': 'BBBB'}], key='AAAA'))
+
+    assert summary(report)['Median (raw/percent): '] == '3.0 / 75%'
+
+
+def test_single_score_has_no_standard_deviation(export):
+    report = zgr.Report(export([{'answers': 'AB'}]))
+    values = summary(report)
+
+    assert values['Mean (raw/percent): '] == '2.0 / 100%'
+    assert values['Standard Deviation (raw/percent): '] == '—'
+    assert values['Q1 (raw/percent): '] == '—'
+    assert 'nan' not in ''.join(values.values())
@@ -0,0 +1,29 @@
+import os
+import zipfile
+
+import zipgrade_reporter as zgr
+
+
+def model(export, names):
+    # Report model of a one-question quiz in one class, from (first, last, ID) names.
+    return zgr.Report(export([{'first': first, 'last': last, 'zip_id': zip_id, 'answers': 'A'}
+                              for first, last, zip_id in names], key='A')).get_model()
+
+
+def test_students_with_the_same_name_and_no_id_get_their_own_files(tmp_path, export):
+    zip_path = str(tmp_path / 'students.zip')
+
+    paths = zgr.save_student_files(model(export, [('Ann', 'Lee', ''), ('Ann', 'Lee', ''), ('Bo', 'Kim', '7')]),
+                                   str(tmp_path / 'students'), ('docx',), zip_path=zip_path)
+
+    assert len(set(paths)) == 3
+    assert all(os.path.exists(path) for path in paths)
+    with zipfile.ZipFile(zip_path) as package:
+        assert sorted(package.namelist()) == ['Period_1/Kim_Bo_7.docx', 'Period_1/Lee_Ann_.docx',
+                                              'Period_1/Lee_Ann__3.docx']
+
+
+def test_names_differing_only_in_case_are_kept_apart(export):
+    names = zgr.student_file_names(model(export, [('Ann', 'Lee', ''), ('Ann', 'LEE', '')]))['Period 1']
+
+    assert len({name.lower() for name in names}) == 2